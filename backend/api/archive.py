@@ -0,0 +1,129 @@
+"""
+Archive storage for crime reports.
+
+Archiving a case moves the report and its suspects out of the hot
+CrimeReport / Suspect tables into ArchivedCrimeReport / ArchivedSuspect
+(same columns, same ids, original timestamps), so the hot tables and their
+indexes only hold active cases. Restoring moves them back.
+
+Portable across SQLite and PostgreSQL; plain tables were picked over
+PostgreSQL partitions so local development keeps working.
+
+While rows are being moved, `moving()` is true and the delete signal
+handlers (tombstones, live events, photo hashes) stay quiet: the case was
+archived, not deleted.
+"""
+
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
+
+from . import events, persons
+from .models import ArchivedCrimeReport, ArchivedSuspect, CrimeReport, Suspect
+
+_moving = ContextVar("api_archive_moving", default=False)
+
+
+def moving():
+    return _moving.get()
+
+
+def _copy(src, model, **overrides):
+    names = {f.attname for f in model._meta.concrete_fields}
+    values = {f.attname: getattr(src, f.attname) for f in src._meta.concrete_fields if f.attname in names}
+    values.update(overrides)
+    return model(**values)
+
+
+def _quietly_delete(obj):
+    token = _moving.set(True)
+    try:
+        obj.delete()
+    finally:
+        _moving.reset(token)
+
+
+@transaction.atomic
+def archive_report(report):
+    now = timezone.now()
+    archived = _copy(report, ArchivedCrimeReport, is_archived=True, archived_at=now)
+    archived.save(force_insert=True)
+    ArchivedSuspect.objects.bulk_create(
+        [_copy(s, ArchivedSuspect, archived_at=now) for s in report.suspects.all()]
+    )
+    _quietly_delete(report)   # cascades to the hot suspects
+    event = events.crime_event(archived)
+    transaction.on_commit(lambda: events.publish(event))
+    return archived
+
+
+@transaction.atomic
+def restore_report(archived):
+    report = _copy(archived, CrimeReport, is_archived=False)
+    report.save(force_insert=True)   # fresh updated_at so change feeds pick it up
+    # auto_now_add overwrote created_at on insert; put the original back.
+    report.created_at = archived.created_at
+    CrimeReport.objects.filter(pk=report.pk).update(created_at=archived.created_at)
+
+    originals = list(archived.suspects.all())
+    suspects = Suspect.objects.bulk_create([_copy(s, Suspect) for s in originals])
+    for suspect, original in zip(suspects, originals):
+        suspect.created_at = original.created_at
+    Suspect.objects.bulk_update(suspects, ["created_at"])
+    for suspect in suspects:   # bulk_create skipped post_save
+        persons.resolve(suspect)
+
+    archived.delete()   # cascades to the archived suspects
+    return report
+
+
+class IncludeArchivedMixin:
+    """
+    `?include_archived=true` adds archived rows to list / retrieve,
+    `?include_archived=only` returns just those. Needs `archive_model` and
+    `archive_serializer_class` on the viewset.
+    """
+
+    archive_model = None
+    archive_serializer_class = None
+
+    def archived_mode(self):
+        value = self.request.query_params.get("include_archived", "").lower()
+        if value == "only":
+            return "only"
+        if value in ("1", "true", "yes"):
+            return "with"
+        return None
+
+    def get_archive_serializer(self, *args, **kwargs):
+        kwargs.setdefault("context", self.get_serializer_context())
+        return self.archive_serializer_class(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        mode = self.archived_mode()
+        if mode is None:
+            return super().list(request, *args, **kwargs)
+        archived = self.filter_queryset(self.archive_model.objects.all())
+        data = list(self.get_archive_serializer(archived, many=True).data)
+        if mode == "with":
+            active = self.filter_queryset(self.get_queryset())
+            data += self.get_serializer(active, many=True).data
+            ordering = OrderingFilter().get_ordering(request, active, self) or ["-created_at"]
+            field = ordering[0].lstrip("-")
+            data.sort(
+                key=lambda row: (row.get(field) is not None, row.get(field) or ""),
+                reverse=ordering[0].startswith("-"),
+            )
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        mode = self.archived_mode()
+        pk = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        if mode is None or (mode == "with" and self.get_queryset().filter(pk=pk).exists()):
+            return super().retrieve(request, *args, **kwargs)
+        obj = get_object_or_404(self.archive_model, pk=pk)
+        return Response(self.get_archive_serializer(obj).data)
@@ -0,0 +1,166 @@
+"""
+Batch writes with idempotency keys, for devices that queue forms offline.
+
+    POST /api/batch/
+    {"items": [
+        {"key": "<client id>", "op": "create", "resource": "crime", "data": {...}},
+        {"key": "<client id>", "op": "create", "resource": "suspect",
+         "data": {..., "crime_report_key": "<key of the report's create>"}},
+        {"key": "<client id>", "op": "update", "resource": "crime", "id": 12, "data": {...}}
+    ]}
+    -> {"results": [{"key", "status", "resource", "id", "replayed"} | {"key", "status", "errors"}, ...]}
+
+Officers out at sea or on the coast re-send their whole queue whenever a
+connection comes back. Every item carries a key the device made up
+(a UUID); once an item has been applied its key is stored in
+IdempotencyKey (unique, indexed), and a later item with the same key gets
+the stored result back (`replayed: true`) instead of a second report.
+The same key with different content is refused with 422.
+
+A batch runs in one transaction, each item in its own savepoint: an item
+that fails validation is reported (400 / 404) and rolled back on its own,
+without its key, so it can be fixed and sent again. A suspect may point
+at a report created earlier in the same batch, or in an earlier one,
+through `crime_report_key`. Photos go through chunked uploads
+(`v_photo_upload` / `s_photo_upload`).
+
+Keys are kept IDEMPOTENCY_KEY_DAYS, longer than any device stays offline.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import CrimeReport, IdempotencyKey, Suspect
+from .serializers import CrimeReportSerializer, SuspectSerializer
+
+MAX_ITEMS = 100
+MAX_KEY_LENGTH = 100
+OPS = ("create", "update")
+RESOURCES = {
+    "crime": (CrimeReport, CrimeReportSerializer),
+    "suspect": (Suspect, SuspectSerializer),
+}
+
+
+class ItemError(Exception):
+    def __init__(self, status, errors):
+        super().__init__(errors)
+        self.status = status
+        self.errors = errors
+
+
+def retention():
+    return timedelta(days=getattr(settings, "IDEMPOTENCY_KEY_DAYS", 30))
+
+
+def fingerprint(item):
+    """Hash of everything but the key, to tell a retry from a reused key."""
+    body = {name: item.get(name) for name in ("op", "resource", "id", "data")}
+    return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def stored_result(row, replayed):
+    return {"key": row.key, "status": row.status, "resource": row.resource, "id": row.object_id, "replayed": replayed}
+
+
+def check(item):
+    if not isinstance(item, dict):
+        raise ItemError(400, {"detail": "Each item must be an object."})
+    key = item.get("key")
+    if not isinstance(key, str) or not 0 < len(key) <= MAX_KEY_LENGTH:
+        raise ItemError(400, {"key": f"Required, a string of at most {MAX_KEY_LENGTH} characters."})
+    if item.get("op") not in OPS:
+        raise ItemError(400, {"op": f"Must be one of: {', '.join(OPS)}."})
+    if item.get("resource") not in RESOURCES:
+        raise ItemError(400, {"resource": f"Must be one of: {', '.join(RESOURCES)}."})
+    if not isinstance(item.get("data", {}), dict):
+        raise ItemError(400, {"data": "Must be an object."})
+    if item["op"] == "update" and not isinstance(item.get("id"), int):
+        raise ItemError(400, {"id": "Required for updates, an integer."})
+
+
+def resolve_report_key(data, created):
+    """Swap `crime_report_key` for the id of the report that key created."""
+    ref = data.pop("crime_report_key", None)
+    if ref is None:
+        return data
+    report_id = created.get(ref)
+    if report_id is None:
+        row = IdempotencyKey.objects.filter(key=ref, resource="crime", op="create").first()
+        report_id = row.object_id if row else None
+    if report_id is None:
+        raise ItemError(400, {"crime_report_key": "No report was created with that key."})
+    return {**data, "crime_report": report_id}
+
+
+def apply(item, created, context):
+    """Validate and save one item; returns (status, object id)."""
+    Model, Serializer = RESOURCES[item["resource"]]
+    data = dict(item.get("data") or {})
+    if item["resource"] == "suspect":
+        data = resolve_report_key(data, created)
+    if item["op"] == "create":
+        serializer = Serializer(data=data, context=context)
+        status = 201
+    else:
+        instance = Model.objects.filter(pk=item["id"]).first()
+        if instance is None:
+            raise ItemError(404, {"id": f"No {item['resource']} with that id."})
+        serializer = Serializer(instance, data=data, partial=True, context=context)
+        status = 200
+    if not serializer.is_valid():
+        raise ItemError(400, serializer.errors)
+    return status, serializer.save().pk
+
+
+def process(items, context):
+    """Apply a batch in one transaction; one result per item, in order."""
+    keys = [item.get("key") for item in items if isinstance(item, dict) and isinstance(item.get("key"), str)]
+    done = {row.key: row for row in IdempotencyKey.objects.filter(key__in=keys)}
+    created = {}   # key -> id of reports created in this batch, for crime_report_key
+    results = []
+    with transaction.atomic():
+        for item in items:
+            try:
+                check(item)
+            except ItemError as exc:
+                results.append({"key": item.get("key") if isinstance(item, dict) else None,
+                                "status": exc.status, "errors": exc.errors})
+                continue
+            key, digest = item["key"], fingerprint(item)
+            row = done.get(key)
+            if row is None:
+                try:
+                    with transaction.atomic():
+                        status, object_id = apply(item, created, context)
+                        row = IdempotencyKey.objects.create(
+                            key=key, request_hash=digest, op=item["op"], resource=item["resource"],
+                            object_id=object_id, status=status,
+                        )
+                except ItemError as exc:
+                    results.append({"key": key, "status": exc.status, "errors": exc.errors})
+                    continue
+                except IntegrityError:
+                    # the same item arrived through another request meanwhile
+                    row = IdempotencyKey.objects.filter(key=key).first()
+                    if row is None:
+                        results.append({"key": key, "status": 409, "errors": {"detail": "Conflicts with stored data."}})
+                        continue
+                else:
+                    done[key] = row
+                    if row.resource == "crime" and row.op == "create":
+                        created[key] = row.object_id
+                    results.append(stored_result(row, replayed=False))
+                    continue
+            if row.request_hash != digest:
+                results.append({"key": key, "status": 422,
+                                "errors": {"key": "Already used for a different item."}})
+                continue
+            results.append(stored_result(row, replayed=True))
+        IdempotencyKey.objects.filter(created_at__lt=timezone.now() - retention()).delete()
+    return results
@@ -0,0 +1,164 @@
+"""
+Response compression for API payloads (br / gzip).
+
+The list endpoints return large, very repetitive JSON (the same keys and
+PSGC codes on every row), which shrinks 5-10x. The encoding is negotiated
+from Accept-Encoding: Brotli when the client takes it and the `brotli`
+package is installed, otherwise gzip.
+
+Levels are tuned for latency, not ratio: the body is compressed on every
+request, so Brotli quality 4 and gzip level 5 are used by default, which
+get most of the size win at a fraction of the CPU of the maximum levels.
+Bodies under API_COMPRESSION_MIN_BYTES fit in a packet or two anyway and
+are sent as is. `python manage.py bench_compression` measures bytes and
+CPU per response size for every level, to re-check those numbers.
+
+Streaming responses (the server-sent events feed) are compressed chunk by
+chunk and flushed after each chunk, so every event still reaches the
+client as soon as it is sent.
+"""
+
+import re
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:   # optional: gzip only
+    brotli = None
+
+DEFAULT_MIN_BYTES = 1024
+DEFAULT_BROTLI_QUALITY = 4
+DEFAULT_GZIP_LEVEL = 5
+DEFAULT_PATH_PREFIXES = ("/api/",)
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "text/event-stream",
+    "text/plain",
+    "text/csv",
+}
+
+_coding_re = re.compile(r"^\s*([^\s;]+)\s*(?:;\s*q\s*=\s*([^\s;]*))?")
+
+
+# -----------------------------
+# Encoders
+# -----------------------------
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level=DEFAULT_GZIP_LEVEL):
+        self.level = level
+        self._stream = None
+
+    def _compressor(self):
+        # wbits 31 = gzip header and trailer; mtime is 0, so output is stable.
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        stream = self._compressor()
+        return stream.compress(data) + stream.flush()
+
+    def chunk(self, data):
+        if self._stream is None:
+            self._stream = self._compressor()
+        return self._stream.compress(data) + self._stream.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        stream, self._stream = self._stream or self._compressor(), None
+        return stream.flush()
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality=DEFAULT_BROTLI_QUALITY):
+        self.quality = quality
+        self._stream = None
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.quality, mode=brotli.MODE_TEXT)
+
+    def chunk(self, data):
+        if self._stream is None:
+            self._stream = brotli.Compressor(quality=self.quality, mode=brotli.MODE_TEXT)
+        return self._stream.process(data) + self._stream.flush()
+
+    def finish(self):
+        stream, self._stream = self._stream, None
+        if stream is None:
+            stream = brotli.Compressor(quality=self.quality, mode=brotli.MODE_TEXT)
+        return stream.finish()
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def get_encoder(name):
+    if name == "br":
+        return BrotliEncoder(getattr(settings, "API_COMPRESSION_BROTLI_QUALITY", DEFAULT_BROTLI_QUALITY))
+    return GzipEncoder(getattr(settings, "API_COMPRESSION_GZIP_LEVEL", DEFAULT_GZIP_LEVEL))
+
+
+# -----------------------------
+# Negotiation
+# -----------------------------
+def parse_accept_encoding(header):
+    """{coding: q} from an Accept-Encoding header; malformed q-values count as 0."""
+    accepted = {}
+    for part in (header or "").split(","):
+        match = _coding_re.match(part)
+        if not match:
+            continue
+        try:
+            q = float(match.group(2)) if match.group(2) is not None else 1.0
+        except ValueError:
+            q = 0.0
+        accepted[match.group(1).lower()] = q
+    return accepted
+
+
+def negotiate(header):
+    """The encoding to use for this Accept-Encoding, or None for identity."""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    # available_encodings() is in order of preference, so ties go to br.
+    for name in available_encodings():
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def is_compressible(request, response):
+    if response.status_code in (204, 304) or response.has_header("Content-Encoding"):
+        return False
+    if "no-transform" in response.get("Cache-Control", ""):
+        return False
+    content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type not in COMPRESSIBLE_TYPES:
+        return False
+    prefixes = getattr(settings, "API_COMPRESSION_PATH_PREFIXES", DEFAULT_PATH_PREFIXES)
+    return request.path.startswith(tuple(prefixes))
+
+
+# -----------------------------
+# Streaming
+# -----------------------------
+def compress_stream(encoder, chunks):
+    for data in chunks:
+        out = encoder.chunk(data)
+        if out:
+            yield out
+    yield encoder.finish()
+
+
+async def acompress_stream(encoder, chunks):
+    async for data in chunks:
+        out = encoder.chunk(data)
+        if out:
+            yield out
+    yield encoder.finish()
@@ -0,0 +1,251 @@
+"""
+In-memory count cube for cross-filtered crime analytics.
+
+    GET /api/stats/cube/?by=day|province|crime_type|status|loc_kind
+        [&date_from=&date_to=&province=<code>[,<code>]&crime_type=&status=&loc_kind=]
+
+Each worker keeps the number of active crime reports per
+(day, province, crime type, status, loc_kind) in a dense NumPy int32
+array, stored as running totals along the day axis: a date range is the
+difference of two day slices, and the other filters are index picks on
+that small array plus one sum. No query is made, so the analytics page
+can re-filter on every change.
+
+The cube is built with one GROUP BY on first use. Saves and deletes in
+this process adjust it on commit (pre_save remembers where the report was
+counted before), and it is rebuilt every CUBE_REFRESH_SECONDS to pick up
+other workers' writes.
+
+Memory is bounded by CUBE_MAX_BYTES: when a cube at daily resolution
+would not fit, days are grouped into 7-, 30-, 91- or 365-day buckets
+(`bucket_days` in the response), and date filters then match whole
+buckets. Reports without a date are counted in their own slot, left out
+whenever a date filter is given. `cube` in every response reports the
+shape, resolution and bytes held.
+"""
+
+import math
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import CrimeReport
+from .psgc import areas
+
+AXES = ("day", "province", "crime_type", "status", "loc_kind")
+COLUMNS = ("happened_at", "loc_province_code", "crime_type", "status", "loc_kind")
+CATEGORIES = AXES[1:]
+BUCKETS = (1, 7, 30, 91, 365)
+DAY_HEADROOM = 30   # spare day slots at each end, so new dates rarely resize the array
+
+
+def max_bytes():
+    return getattr(settings, "CUBE_MAX_BYTES", 32 * 1024 * 1024)
+
+
+def refresh_seconds():
+    return getattr(settings, "CUBE_REFRESH_SECONDS", 300)
+
+
+def key_for(report):
+    """The report's coordinates as raw column values."""
+    return tuple(getattr(report, column) for column in COLUMNS)
+
+
+class CountCube:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = None
+        self._built_at = 0.0
+
+    # -----------------------------
+    # Building
+    # -----------------------------
+    def _ensure(self):
+        if self.counts is not None and time.monotonic() - self._built_at <= refresh_seconds():
+            return
+        with self._lock:
+            if self.counts is not None and time.monotonic() - self._built_at <= refresh_seconds():
+                return
+            self._build()
+
+    def _build(self):
+        rows = list(
+            CrimeReport.objects.order_by().values_list(*COLUMNS).annotate(n=Count("pk"))
+        )
+        self.labels = {axis: [] for axis in CATEGORIES}
+        self.index = {axis: {} for axis in CATEGORIES}
+        for row in rows:
+            for axis, value in zip(CATEGORIES, row[1:5]):
+                if value not in self.index[axis]:
+                    self.index[axis][value] = len(self.labels[axis])
+                    self.labels[axis].append(value)
+
+        days = [row[0] for row in rows if row[0] is not None]
+        first, last = (min(days), max(days)) if days else (date.today(), date.today())
+        width = int(np.prod([max(len(self.labels[axis]), 1) for axis in CATEGORIES]))
+        for bucket in BUCKETS:
+            slots = 1 + math.ceil(((last - first).days + 1) / bucket) + 2 * DAY_HEADROOM
+            if slots * width * 4 <= max_bytes():
+                break
+        self.bucket = bucket
+        # slot 0: no date; slots 1.. : buckets from day0, with headroom before the first date
+        self.day0 = first - timedelta(days=DAY_HEADROOM * bucket)
+        self.counts = np.zeros([slots] + [max(len(self.labels[axis]), 1) for axis in CATEGORIES], dtype=np.int32)
+        if rows:
+            coords = np.array([self._coords(row[:5]) for row in rows]).T
+            np.add.at(self.counts, tuple(coords), np.array([row[5] for row in rows], dtype=np.int32))
+        np.cumsum(self.counts, axis=0, out=self.counts)
+        self._built_at = time.monotonic()
+
+    def _day_slot(self, day):
+        return 0 if day is None else 1 + (day - self.day0).days // self.bucket
+
+    def _coords(self, key):
+        return (self._day_slot(key[0]),) + tuple(self.index[axis][value] for axis, value in zip(CATEGORIES, key[1:]))
+
+    def _grow(self, key):
+        """Make room for a key with a new category value or a date outside the array."""
+        for position, (axis, value) in enumerate(zip(CATEGORIES, key[1:]), start=1):
+            if value not in self.index[axis]:
+                self.index[axis][value] = len(self.labels[axis])
+                self.labels[axis].append(value)
+                if len(self.labels[axis]) > self.counts.shape[position]:
+                    self.counts = np.concatenate(
+                        [self.counts, np.zeros_like(self.counts.take([0], axis=position))], axis=position,
+                    )
+        slot = self._day_slot(key[0])
+        if slot < 1 and key[0] is not None:
+            extra = 1 - slot + DAY_HEADROOM
+            pad = np.repeat(self.counts[:1], extra, axis=0)   # running totals carry over
+            self.counts = np.concatenate([self.counts[:1], pad, self.counts[1:]])
+            self.day0 -= timedelta(days=extra * self.bucket)
+        elif slot >= self.counts.shape[0]:
+            extra = slot - self.counts.shape[0] + 1 + DAY_HEADROOM
+            self.counts = np.concatenate([self.counts, np.repeat(self.counts[-1:], extra, axis=0)])
+        if self.counts.nbytes > max_bytes():
+            self._built_at = 0.0   # over budget: rebuild, at a coarser resolution, on next use
+
+    # -----------------------------
+    # Incremental updates
+    # -----------------------------
+    # Only patch an already built cube; otherwise the next build reads the
+    # change from the table anyway.
+    def move(self, old, new):
+        """A report counted under `old` (None = new report) is now under `new` (None = gone)."""
+        with self._lock:
+            if self.counts is None or old == new:
+                return
+            if old is not None:
+                try:
+                    self._add(old, -1)
+                except (KeyError, IndexError):
+                    self._built_at = 0.0   # never counted here; resync on next use
+            if new is not None:
+                self._grow(new)
+                self._add(new, 1)
+
+    def _add(self, key, n):
+        """Count `n` more reports under `key`: every running total from its day on."""
+        slot, *rest = self._coords(key)
+        if not 0 <= slot < self.counts.shape[0]:
+            raise IndexError(slot)
+        self.counts[(slice(slot, None), *rest)] += n
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _selection(self, filters):
+        """Per-axis selection: a slice, an index array, or None for everything."""
+        picks = [None] * len(AXES)
+        date_from, date_to = filters.get("date_from"), filters.get("date_to")
+        if date_from or date_to:
+            start = max(self._day_slot(date_from), 1) if date_from else 1
+            end = min(self._day_slot(date_to) + 1, self.counts.shape[0]) if date_to else self.counts.shape[0]
+            picks[0] = slice(start, max(start, end))
+        for position, axis in enumerate(CATEGORIES, start=1):
+            wanted = filters.get(axis)
+            if wanted is None:
+                continue
+            folded = {value.lower() for value in wanted}
+            picks[position] = np.array(
+                [i for value, i in self.index[axis].items() if (value or "").lower() in folded], dtype=np.intp,
+            )
+        return picks
+
+    def query(self, filters, by):
+        self._ensure()
+        with self._lock:
+            picks = self._selection(filters)
+            days = picks[0] or slice(0, self.counts.shape[0])
+            if by == "day":
+                # running totals from the slot before the range, differenced per slot
+                sub = self.counts[max(days.start - 1, 0):days.stop]
+            elif days.start == 0:
+                sub = self.counts[-1:]
+            else:
+                sub = self.counts[days.stop - 1:days.stop] - self.counts[days.start - 1:days.start]
+            for position, pick in enumerate(picks[1:], start=1):
+                if pick is not None:
+                    sub = np.take(sub, pick, axis=position)
+            if by == "day":
+                sub = np.diff(sub, axis=0, prepend=0) if days.start == 0 else np.diff(sub, axis=0)
+            keep = AXES.index(by)
+            totals = sub.sum(axis=tuple(i for i in range(len(AXES)) if i != keep), dtype=np.int64)
+            pick = picks[keep]
+            if by == "day":
+                keys = [None if slot == 0 else self.day0 + timedelta(days=(slot - 1) * self.bucket)
+                        for slot in range(days.start, days.start + len(totals))]
+            else:
+                positions = pick if pick is not None else range(len(totals))
+                keys = [self.labels[by][i] if i < len(self.labels[by]) else None for i in positions]
+            groups = [(key, int(n)) for key, n in zip(keys, totals) if n]
+            stats = self.stats()
+        return groups, stats
+
+    def stats(self):
+        return {
+            "shape": dict(zip(AXES, self.counts.shape)),
+            "bucket_days": self.bucket,
+            "bytes": int(self.counts.nbytes),
+            "max_bytes": max_bytes(),
+            "age_seconds": round(time.monotonic() - self._built_at, 1),
+        }
+
+
+cube = CountCube()
+
+
+def parse_filters(params):
+    filters = {}
+    for name in ("date_from", "date_to"):
+        if params.get(name):
+            value = parse_date(params[name])
+            if value is None:
+                raise ValidationError({name: "Use YYYY-MM-DD."})
+            filters[name] = value
+    for axis in CATEGORIES:
+        if params.get(axis):
+            filters[axis] = [value.strip() for value in params[axis].split(",")]
+    return filters
+
+
+def counts(params):
+    by = params.get("by") or "day"
+    if by not in AXES:
+        raise ValidationError({"by": f"Must be one of: {', '.join(AXES)}."})
+    groups, stats = cube.query(parse_filters(params), by)
+    if by == "day":
+        rows = [{"key": key.isoformat() if key else None, "count": n} for key, n in groups]
+    elif by == "province":
+        rows = [{"key": key, "label": areas.name(key) or key or "Unspecified", "count": n} for key, n in groups]
+        rows.sort(key=lambda row: -row["count"])
+    else:
+        rows = [{"key": key, "count": n} for key, n in sorted(groups, key=lambda group: -group[1])]
+    return {"by": by, "total": sum(row["count"] for row in rows), "groups": rows, "cube": stats}
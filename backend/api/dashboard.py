@@ -0,0 +1,112 @@
+"""
+Dashboard summary: every KPI the dashboard shows, in one request.
+
+    GET /api/dashboard/summary/
+
+The dashboard used to page through all of /api/personnel/ and /api/crimes/
+and count in the browser. Here each figure is a COUNT / GROUP BY on
+indexed columns (status + crime_type, region codes, is_archived,
+created_at), and the whole summary is cached for DASHBOARD_CACHE_SECONDS,
+so a room full of open dashboards costs one set of queries per interval.
+
+Region IV-A follows the dashboard's isRegion4A(): the crime location's
+region, else the victim's, is CALABARZON (040000000, or a region the PSGC
+table names IV-A / CALABARZON).
+"""
+
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import ArchivedCrimeReport, CrimeReport, PersonnelProfile, PsgcArea, Suspect
+from .psgc import REGION, areas
+
+CACHE_KEY = "dashboard:summary"
+REGION_4A_CODE = "040000000"
+REGION_4A_CODES = {REGION_4A_CODE, "0400000000"}   # 9- and 10-digit PSGC forms
+REGION_4A_NAME = re.compile(r"IV-A|CALABARZON", re.I)
+SNIPPET_CHARS = 140
+
+
+def region_4a_codes():
+    named = PsgcArea.objects.filter(level=REGION).values_list("code", "name")
+    return REGION_4A_CODES | {code for code, name in named if REGION_4A_NAME.search(name)}
+
+
+def region_4a_filter(codes):
+    return Q(loc_region_code__in=codes) | (Q(loc_region_code="") & Q(v_region_code__in=codes))
+
+
+def crime_breakdown(queryset):
+    """{total, by_status, by_type} from one GROUP BY status, crime_type."""
+    by_status = {value: 0 for value, _ in CrimeReport.STATUS_CHOICES}
+    by_type = {}
+    total = 0
+    groups = queryset.order_by().values_list("status", "crime_type").annotate(n=Count("pk"))
+    for status, crime_type, n in groups:
+        by_status[status] = by_status.get(status, 0) + n
+        by_type[crime_type] = by_type.get(crime_type, 0) + n
+        total += n
+    by_type = dict(sorted(by_type.items(), key=lambda item: (-item[1], item[0])))
+    return {"total": total, "by_status": by_status, "by_type": by_type}
+
+
+def officer_counts():
+    counts = dict(PersonnelProfile.objects.order_by().values_list("is_archived").annotate(n=Count("pk")))
+    active, archived = counts.get(False, 0), counts.get(True, 0)
+    return {"active": active, "archived": archived, "total": active + archived}
+
+
+def recent_reports(limit, codes):
+    rows = CrimeReport.objects.order_by("-created_at").values(
+        "id", "crime_type", "status", "description", "happened_at", "created_at",
+        "v_first_name", "v_last_name", "loc_region_code", "v_region_code",
+        "loc_province_code", "loc_city_mun_code", "loc_barangay_code",
+    )[:limit]
+    recent = []
+    for row in rows:
+        description = " ".join(row["description"].split())
+        if len(description) > SNIPPET_CHARS:
+            description = description[: SNIPPET_CHARS - 1].rstrip() + "…"
+        recent.append({
+            "id": row["id"],
+            "crime_type": row["crime_type"],
+            "status": row["status"],
+            "snippet": description,
+            "victim": " ".join(filter(None, [row["v_first_name"], row["v_last_name"]])),
+            "happened_at": row["happened_at"].isoformat() if row["happened_at"] else None,
+            "created_at": row["created_at"].isoformat(),
+            "barangay": areas.name(row["loc_barangay_code"]),
+            "city_municipality": areas.name(row["loc_city_mun_code"]),
+            "province": areas.name(row["loc_province_code"]),
+            "in_region_4a": (row["loc_region_code"] or row["v_region_code"]) in codes,
+        })
+    return recent
+
+
+def build_summary():
+    codes = region_4a_codes()
+    crimes = crime_breakdown(CrimeReport.objects.all())
+    crimes["archived"] = ArchivedCrimeReport.objects.count()
+    region = crime_breakdown(CrimeReport.objects.filter(region_4a_filter(codes)))
+    return {
+        "officers": officer_counts(),
+        "crimes": crimes,
+        "region_4a": {"code": REGION_4A_CODE, **region},
+        "suspects": {"total": Suspect.objects.count()},
+        "recent": recent_reports(getattr(settings, "DASHBOARD_RECENT_REPORTS", 10), codes),
+        "generated_at": timezone.now().isoformat(),
+    }
+
+
+def summary():
+    """The cached summary; rebuilt at most once per DASHBOARD_CACHE_SECONDS per cache."""
+    cache = caches[getattr(settings, "DASHBOARD_CACHE", "default")]
+    data = cache.get(CACHE_KEY)
+    if data is None:
+        data = build_summary()
+        cache.set(CACHE_KEY, data, timeout=getattr(settings, "DASHBOARD_CACHE_SECONDS", 30))
+    return data
@@ -0,0 +1,86 @@
+"""
+Read-replica routing.
+
+Replicas are configured with REPLICA_DATABASE_URLS (see settings). Reads
+only go to a replica when the current request opted in through
+ReplicaReadMixin (safe list / retrieve style endpoints). Everything else,
+and every read after a write in the same request, uses "default".
+
+Per-request state lives in a contextvar set up by ReplicaRoutingMiddleware,
+so it follows the request into DRF's sync views under ASGI as well.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY = "default"
+
+
+class RoutingState:
+    def __init__(self):
+        self.read_from_replica = False
+        self.replica = None
+        self.wrote = False   # once set, this request reads from the primary
+
+
+_state = ContextVar("api_db_routing", default=None)
+
+
+def begin_request():
+    return _state.set(RoutingState())
+
+
+def end_request(token):
+    _state.reset(token)
+
+
+def use_replica():
+    state = _state.get()
+    if state is not None and replica_aliases():
+        state.read_from_replica = True
+
+
+def replica_aliases():
+    return getattr(settings, "REPLICA_DATABASES", [])
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.read_from_replica or state.wrote:
+            return PRIMARY
+        if state.replica is None:
+            # One replica per request so all its reads see the same snapshot.
+            state.replica = random.choice(replica_aliases())
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+
+class ReplicaReadMixin:
+    """
+    Views / viewsets whose safe requests may read from a replica. Limit it
+    to some viewset actions with `replica_actions`; None means every safe
+    request of the view.
+    """
+
+    replica_actions = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method not in SAFE_METHODS:
+            return
+        action = getattr(self, "action", None)
+        if self.replica_actions is None or action in self.replica_actions:
+            use_replica()
@@ -0,0 +1,195 @@
+"""
+Duplicate crime report detection.
+
+The same incident is often encoded twice by different officers. Instead
+of comparing every new report with every old one, each report is filed
+under a few blocking keys when it is saved (ReportBlockKey, indexed):
+
+    name + date + barangay   phonetic victim name, happened_at, loc_barangay_code
+    name + date + type       phonetic victim name, happened_at, crime_type
+    date + barangay + type   catches names misspelled beyond phonetic repair
+    name + barangay          catches a wrong or missing date
+
+Possible duplicates of a report are the reports sharing at least one key:
+a few index lookups, however long the history, after which only that
+handful is scored (victim name, date, place, type, description). Keys
+that are missing a part (no date, no barangay, ...) are not built.
+
+    GET  /api/crimes/<id>/duplicates/
+    POST /api/crimes/ and /api/crimes/intake/ answer with `possible_duplicates`
+
+`python manage.py find_duplicate_reports` scans the whole history in one
+pass by grouping rows on the same keys.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.db import transaction
+
+from .matching import jaccard, name_similarity, ngrams, normalize, phonetic
+
+FIELDS = [
+    "id", "v_first_name", "v_last_name", "happened_at", "crime_type",
+    "loc_barangay_code", "loc_city_mun_code", "description",
+]
+
+WEIGHTS = {"name": 0.4, "date": 0.25, "place": 0.15, "type": 0.1, "description": 0.1}
+
+
+def row_for(report):
+    return {field: getattr(report, field) for field in FIELDS}
+
+
+def raw_keys(row):
+    """Blocking keys of a report as readable strings (see the module docstring)."""
+    name = "".join(filter(None, [phonetic(row["v_last_name"]), phonetic(row["v_first_name"])]))
+    date = row["happened_at"].isoformat() if row["happened_at"] else ""
+    barangay = (row["loc_barangay_code"] or "").strip()
+    crime_type = normalize(row["crime_type"])
+    keys = set()
+    if name and date and barangay:
+        keys.add(f"nd-b:{name}|{date}|{barangay}")
+    if name and date and crime_type:
+        keys.add(f"nd-t:{name}|{date}|{crime_type}")
+    if date and barangay and crime_type:
+        keys.add(f"d-bt:{date}|{barangay}|{crime_type}")
+    if name and barangay:
+        keys.add(f"n-b:{name}|{barangay}")
+    return keys
+
+
+def hashed(key):
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def block_keys(row):
+    return {hashed(key) for key in raw_keys(row)}
+
+
+def score(a, b):
+    """(similarity 0..1, per-part scores) of two report rows."""
+    parts = {
+        "name": name_similarity(a["v_first_name"], a["v_last_name"], b["v_first_name"], b["v_last_name"]),
+        "date": 0.0,
+        "place": 0.0,
+        "type": 1.0 if a["crime_type"] and a["crime_type"] == b["crime_type"] else 0.0,
+        "description": jaccard(ngrams(a["description"]), ngrams(b["description"])),
+    }
+    if a["happened_at"] and b["happened_at"]:
+        days = abs((a["happened_at"] - b["happened_at"]).days)
+        parts["date"] = 1.0 if days == 0 else 0.5 if days == 1 else 0.0
+    if a["loc_barangay_code"] and a["loc_barangay_code"] == b["loc_barangay_code"]:
+        parts["place"] = 1.0
+    elif a["loc_city_mun_code"] and a["loc_city_mun_code"] == b["loc_city_mun_code"]:
+        parts["place"] = 0.5
+    total = sum(WEIGHTS[part] * value for part, value in parts.items())
+    return round(total, 3), {part: round(value, 3) for part, value in parts.items()}
+
+
+def min_score():
+    return getattr(settings, "DEDUP_MIN_SCORE", 0.7)
+
+
+def max_block():
+    """Keys shared by more reports than this are too common to say anything."""
+    return getattr(settings, "DEDUP_MAX_BLOCK", 50)
+
+
+# -----------------------------
+# Index
+# -----------------------------
+def index_report(report):
+    """Bring the report's ReportBlockKey rows in line with its current fields."""
+    from .models import ReportBlockKey
+
+    wanted = block_keys(row_for(report))
+    current = set(ReportBlockKey.objects.filter(report_id=report.pk).values_list("key", flat=True))
+    if wanted == current:
+        return
+    with transaction.atomic():
+        ReportBlockKey.objects.filter(report_id=report.pk, key__in=current - wanted).delete()
+        ReportBlockKey.objects.bulk_create(
+            [ReportBlockKey(report_id=report.pk, key=key) for key in wanted - current],
+            ignore_conflicts=True,
+        )
+
+
+def reindex(rows):
+    """Rebuild the whole ReportBlockKey table from report rows; returns the number of keys."""
+    from .models import ReportBlockKey
+
+    keys = [ReportBlockKey(report_id=row["id"], key=key) for row in rows for key in block_keys(row)]
+    with transaction.atomic():
+        ReportBlockKey.objects.all().delete()
+        ReportBlockKey.objects.bulk_create(keys, batch_size=1000)
+    return len(keys)
+
+
+def candidates(report, threshold=None):
+    """Reports sharing a blocking key with `report`, scored, best first."""
+    from .models import CrimeReport, ReportBlockKey
+
+    keys = block_keys(row_for(report))
+    if not keys:
+        return []
+    ids = set()
+    limit = max_block()
+    for key in keys:
+        block = list(
+            ReportBlockKey.objects.filter(key=key).exclude(report_id=report.pk)
+            .values_list("report_id", flat=True)[:limit + 1]
+        )
+        if len(block) <= limit:
+            ids.update(block)
+    if not ids:
+        return []
+    threshold = min_score() if threshold is None else threshold
+    row = row_for(report)
+    found = []
+    for other in CrimeReport.objects.filter(pk__in=ids).values(*FIELDS):
+        similarity, parts = score(row, other)
+        if similarity >= threshold:
+            found.append({
+                "id": other["id"],
+                "score": similarity,
+                "scores": parts,
+                "crime_type": other["crime_type"],
+                "happened_at": other["happened_at"].isoformat() if other["happened_at"] else None,
+                "victim": " ".join(filter(None, [other["v_first_name"], other["v_last_name"]])),
+            })
+    found.sort(key=lambda item: (-item["score"], item["id"]))
+    return found
+
+
+# -----------------------------
+# Whole history, one pass
+# -----------------------------
+def scan(rows, threshold=None):
+    """
+    Yield (score, row a, row b, parts) for every pair of rows that share a
+    blocking key and score at least `threshold`. Rows are read once and
+    grouped by key; only rows within a block are compared, each pair once.
+    """
+    threshold = min_score() if threshold is None else threshold
+    limit = max_block()
+    blocks = {}
+    by_id = {}
+    for row in rows:
+        by_id[row["id"]] = row
+        for key in raw_keys(row):
+            blocks.setdefault(key, []).append(row["id"])
+
+    seen = set()
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > limit:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                pair = (a, b) if a < b else (b, a)
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                similarity, parts = score(by_id[pair[0]], by_id[pair[1]])
+                if similarity >= threshold:
+                    yield similarity, by_id[pair[0]], by_id[pair[1]], parts
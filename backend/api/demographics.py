@@ -0,0 +1,85 @@
+"""
+Parsers for the free-text demographic fields.
+
+Ages, heights and weights are typed in by hand ("25", "25 yrs old",
+"30-35", "5'7\"", "1.70 m", "154 lbs"), so they are stored as entered and
+parsed into numeric copies (v_age_years, s_age_years, height_cm,
+weight_kg) on save. The histograms in api/histograms.py group by those.
+Anything that can't be read, or is out of a plausible range, parses to
+None and is counted as unknown.
+"""
+
+import re
+
+MAX_AGE = 120
+HEIGHT_CM_RANGE = (50.0, 250.0)
+WEIGHT_KG_RANGE = (2.0, 350.0)
+CM_PER_INCH = 2.54
+KG_PER_LB = 0.45359237
+
+_number = r"(\d+(?:[.,]\d+)?)"
+_range_re = re.compile(_number + r"\s*(?:-|–|to)\s*" + _number)
+_number_re = re.compile(_number)
+_years_re = re.compile(_number + r"\s*(?:years?|yrs?|y)(?![a-z])")
+_months_re = re.compile(r"(?<![a-z])(mos?|months?|weeks?|wks?|days?)\b")   # "6mos" too
+_feet_re = re.compile(r"(\d+(?:\.\d+)?)\s*(?:'|’|ft|feet|foot)\s*(?:(\d+(?:\.\d+)?)\s*(?:\"|”|''|in|inch|inches)?)?")
+
+
+def _float(text):
+    return float(text.replace(",", "."))
+
+
+def _number_in(text):
+    """The value of `text`: its first number, or the middle of an "a-b" range."""
+    match = _range_re.search(text)
+    if match:
+        return (_float(match.group(1)) + _float(match.group(2))) / 2
+    match = _number_re.search(text)
+    return _float(match.group(1)) if match else None
+
+
+def _within(value, bounds):
+    return value if value is not None and bounds[0] <= value <= bounds[1] else None
+
+
+def parse_age(value):
+    """Whole years, or None. "1 yr 6 mos" is 1; months / weeks / days alone count as 0 (an infant)."""
+    text = str(value or "").strip().lower()
+    number = _number_in(text)
+    if number is None:
+        return None
+    if _months_re.search(text):
+        years = _years_re.search(text)
+        if years is None:
+            return 0
+        number = _float(years.group(1))
+    age = int(number)
+    return age if 0 <= age <= MAX_AGE else None
+
+
+def parse_height_cm(value):
+    """Centimetres from "170", "170 cm", "1.70 m", "5'7\"", "5 ft 7 in" or "67 in"."""
+    text = str(value or "").strip().lower()
+    feet = _feet_re.search(text)
+    if feet:
+        inches = float(feet.group(1)) * 12 + float(feet.group(2) or 0)
+        return _within(round(inches * CM_PER_INCH, 1), HEIGHT_CM_RANGE)
+    number = _number_in(text)
+    if number is None:
+        return None
+    if re.search(r"\d\s*(?:in|inch|inches|\")\s*$", text):
+        number *= CM_PER_INCH
+    elif re.search(r"\d\s*m\s*$", text) or number < 3:   # metres: "1.70" / "1.70 m"
+        number *= 100
+    return _within(round(number, 1), HEIGHT_CM_RANGE)
+
+
+def parse_weight_kg(value):
+    """Kilograms from "70", "70 kg", "70.5kgs" or "154 lbs"."""
+    text = str(value or "").strip().lower()
+    number = _number_in(text)
+    if number is None:
+        return None
+    if re.search(r"\b(lbs?|pounds?)\b|\d\s*lbs?\b", text):
+        number *= KG_PER_LB
+    return _within(round(number, 1), WEIGHT_KG_RANGE)
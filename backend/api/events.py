@@ -0,0 +1,222 @@
+"""
+Live change events for dashboards (server-sent events).
+
+Model signals (see api/signals.py) publish compact create / update /
+archive / delete events after the transaction commits. A broadcaster fans
+them out to every open /api/events/ stream:
+
+    LocalBroadcaster     in-process only; fine for a single worker.
+    PostgresBroadcaster  relays through LISTEN/NOTIFY so every worker sees
+                         every event (needs the default DB on PostgreSQL).
+
+Pick one with EVENTS_BACKEND. Subscribers that fall behind lose their
+oldest events and receive a `resync` event, telling them to catch up
+through the /changes/ feeds instead.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    def __init__(self, topics=None, maxsize=100):
+        self.topics = set(topics or ())
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def wants(self, event):
+        return not self.topics or event["type"].split(".")[0] in self.topics
+
+    def push(self, event):
+        # Called from any thread; the queue belongs to the subscriber's loop.
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.queue.full():
+            # Client is too slow: drop the oldest event and have it resync.
+            self.queue.get_nowait()
+            event = RESYNC
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class LocalBroadcaster:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._ids = itertools.count(1)
+
+    def publish(self, event):
+        self.deliver(event)
+
+    def deliver(self, event):
+        event = {**event, "seq": next(self._ids)}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            if sub.wants(event):
+                try:
+                    sub.push(event)
+                except RuntimeError:   # subscriber's loop already closed
+                    self.unsubscribe(sub)
+
+    def subscribe(self, topics=None):
+        sub = Subscription(topics, maxsize=getattr(settings, "EVENTS_QUEUE_SIZE", 100))
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+
+class PostgresBroadcaster(LocalBroadcaster):
+    """
+    Publishes with pg_notify and runs one LISTEN thread per worker process
+    that hands notifications to the local subscribers.
+    """
+
+    channel = "api_events"
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def publish(self, event):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, json.dumps(event, default=str)])
+
+    def subscribe(self, topics=None):
+        self._ensure_listener()
+        return super().subscribe(topics)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="api-events-listen", daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        import psycopg2
+
+        params = connections["default"].get_connection_params()
+        while True:
+            try:
+                conn = psycopg2.connect(**params)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.deliver(json.loads(conn.notifies.pop(0).payload))
+            except Exception:
+                logger.exception("Event listener lost its connection, reconnecting")
+                time.sleep(5)
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster():
+    global _broadcaster
+    if _broadcaster is None:
+        with _broadcaster_lock:
+            if _broadcaster is None:
+                backend = getattr(settings, "EVENTS_BACKEND", "api.events.LocalBroadcaster")
+                _broadcaster = import_string(backend)()
+    return _broadcaster
+
+
+# -----------------------------
+# Event payloads
+# -----------------------------
+def crime_event(instance, created=False, deleted=False):
+    return _event("crime", instance, created, deleted, {
+        "crime_type": instance.crime_type,
+        "status": instance.status,
+        "happened_at": instance.happened_at,
+        "latitude": instance.latitude,
+        "longitude": instance.longitude,
+        "loc_kind": instance.loc_kind,
+        "loc_province_code": instance.loc_province_code,
+        "is_archived": instance.is_archived,
+    }, archived=instance.is_archived)
+
+
+def suspect_event(instance, created=False, deleted=False):
+    return _event("suspect", instance, created, deleted, {
+        "crime_report": instance.crime_report_id,
+        "name": instance.suspect_full_name,
+        "latitude": instance.latitude,
+        "longitude": instance.longitude,
+    })
+
+
+def _event(topic, instance, created, deleted, data, archived=False):
+    if deleted:
+        action, data = "deleted", {}
+    elif created:
+        action = "created"
+    elif archived:
+        action = "archived"
+    else:
+        action = "updated"
+    return {
+        "type": f"{topic}.{action}",
+        "id": instance.pk,
+        "updated_at": instance.updated_at,
+        "data": data,
+    }
+
+
+def publish(event):
+    try:
+        get_broadcaster().publish(event)
+    except Exception:
+        # A dashboard push must never break the write that caused it.
+        logger.exception("Could not publish %s", event.get("type"))
+
+
+# -----------------------------
+# SSE stream
+# -----------------------------
+def format_sse(event):
+    body = json.dumps(event, default=str)
+    return f"id: {event.get('seq', '')}\nevent: {event['type']}\ndata: {body}\n\n"
+
+
+async def sse_stream(topics=None):
+    broadcaster = get_broadcaster()
+    sub = broadcaster.subscribe(topics)
+    heartbeat = getattr(settings, "EVENTS_HEARTBEAT_SECONDS", 15)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(sub.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        broadcaster.unsubscribe(sub)
@@ -0,0 +1,250 @@
+"""
+Fast path for large read-only lists.
+
+CrimeReportSerializer / SuspectSerializer build a model instance per row
+and run every field through DRF, photo URLs through build_absolute_uri()
+one at a time. On GET /api/crimes/ and /api/suspects/ that is most of the
+CPU of the request.
+
+FastListMixin answers `list` from `queryset.values()` instead and returns
+the same JSON:
+
+- the row layout (RowPlan) is derived once from the viewset's serializer,
+  so field order and formatting (dates, choices, foreign keys) match;
+- photo URLs are the storage's base URL, made absolute once per request,
+  plus the stored file name;
+- PSGC names come straight from the area cache (api/psgc.py);
+- the body is encoded with orjson when it is installed.
+
+A serializer field the plan can't derive from a column (a
+SerializerMethodField, say) needs an entry in the viewset's `fast_fields`:
+a function (rows, request, plan) -> one value per row, free to batch its
+own queries. Without one, building the plan fails instead of serving a
+different shape.
+
+`?fast=0` (or API_FAST_LIST = False) goes back to the serializer.
+`python manage.py bench_serializers` compares rows / second.
+"""
+
+import json
+import threading
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.utils.encoding import filepath_to_uri
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .psgc import areas, name_fields
+
+try:
+    import orjson
+except ImportError:   # optional: stdlib json, same output
+    orjson = None
+
+# Fields whose to_representation() leaves a values() column as it is.
+PASSTHROUGH = (
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.FloatField,
+    serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+_default = JSONEncoder().default
+
+
+def dumps(data):
+    """JSON bytes as DRF's JSONRenderer writes them (compact, UTF-8)."""
+    if orjson is not None:
+        content = orjson.dumps(data, default=_default)
+    else:
+        content = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")).encode()
+    # JSONRenderer escapes these two so the JSON is also valid JavaScript.
+    return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type or "", renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class MediaURL:
+    """Stored file name -> URL, as FieldFile.url + build_absolute_uri() would give it."""
+
+    def __init__(self, storage, request):
+        self.storage = storage
+        self.request = request
+        self.prefix = None
+        if isinstance(storage, FileSystemStorage):
+            base = storage.base_url
+            self.prefix = request.build_absolute_uri(base) if request is not None else base
+
+    def __call__(self, name):
+        if not name:
+            return None
+        if self.prefix is not None:
+            return self.prefix + filepath_to_uri(name).lstrip("/")
+        url = self.storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request is not None else url
+
+
+def photo_url(column):
+    """fast_fields entry for a `<photo>_url` method field ("" when there is no photo)."""
+
+    def urls(rows, request, plan):
+        url = MediaURL(plan.model._meta.get_field(column).storage, request)
+        return [url(row[column]) or "" for row in rows]
+
+    urls.columns = [column]
+    return urls
+
+
+def suspect_summaries(rows, request, plan):
+    """CrimeReportSerializer.get_suspects for a page of reports, in one query."""
+    from .models import Suspect
+
+    by_report = {row["id"]: [] for row in rows}
+    suspects = (
+        Suspect.objects.filter(crime_report_id__in=list(by_report))
+        .order_by(*Suspect._meta.ordering)
+        .values_list("crime_report_id", "id", "s_first_name", "s_middle_name", "s_last_name", "s_crime_type")
+    )
+    for report_id, pk, first, middle, last, crime_type in suspects:
+        by_report[report_id].append({
+            "id": pk,
+            "name": " ".join(filter(None, [first, middle, last])),
+            "s_crime_type": crime_type,
+        })
+    return [by_report[row["id"]] for row in rows]
+
+
+class RowPlan:
+    """How to turn one values() row into the serializer's dict, field by field."""
+
+    def __init__(self, serializer_class, model, fast_fields):
+        self.model = model
+        self.steps = []     # (field name, kind, argument)
+        pk = model._meta.pk.attname
+        columns = {pk}
+        concrete = {f.name: f for f in model._meta.concrete_fields}
+        psgc_fields = name_fields(model)
+
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            source = field.source
+            if name in fast_fields:
+                func = fast_fields[name]
+                columns.update(getattr(func, "columns", ()))
+                self.steps.append((name, "batch", func))
+            elif source in psgc_fields:
+                code, attr = psgc_fields[source]
+                columns.add(code)
+                self.steps.append((name, "psgc", (code, getattr(areas, attr))))
+            elif source in concrete and isinstance(concrete[source], models.FileField):
+                columns.add(source)
+                self.steps.append((name, "file", source))
+            elif source in concrete:
+                columns.add(source)
+                kind = "copy" if isinstance(field, PASSTHROUGH) else "convert"
+                self.steps.append((name, kind, (source, field.to_representation)))
+            else:
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name} has no column to read; "
+                    f"add it to fast_fields on the viewset."
+                )
+        self.columns = sorted(columns)
+
+    def values(self, queryset):
+        return queryset.prefetch_related(None).values(*self.columns)
+
+    def _getters(self, request):
+        getters = []
+        for name, kind, arg in self.steps:
+            if kind == "copy":
+                get = itemgetter(arg[0])
+            elif kind == "convert":
+                get = _converter(*arg)
+            elif kind == "psgc":
+                code, lookup = arg
+                get = lambda row, code=code, lookup=lookup: lookup(row[code])
+            elif kind == "file":
+                url = MediaURL(self.model._meta.get_field(arg).storage, request)
+                get = lambda row, column=arg, url=url: url(row[column])
+            else:
+                get = _placeholder
+            getters.append((name, get))
+        return getters
+
+    def render(self, rows, request=None):
+        rows = list(rows)
+        getters = self._getters(request)
+        data = [{name: get(row) for name, get in getters} for row in rows]
+        # Batch fields were placeholders so far; filling them in keeps key order.
+        for name, kind, func in self.steps:
+            if kind == "batch":
+                for item, value in zip(data, func(rows, request, self)):
+                    item[name] = value
+        return data
+
+
+def _placeholder(row):
+    return None
+
+
+def _converter(column, to_representation):
+    def get(row):
+        value = row[column]
+        return None if value is None else to_representation(value)
+    return get
+
+
+_plans = {}
+_plans_lock = threading.Lock()
+
+
+class FastListMixin:
+    """
+    Serves a ModelViewSet's `list` through RowPlan; see the module docstring.
+    Put it after IncludeArchivedMixin so archived lists keep their own path.
+    """
+
+    fast_fields = {}   # serializer field -> function(rows, request, plan) -> values
+
+    def use_fast_list(self):
+        return getattr(settings, "API_FAST_LIST", True) and self.request.query_params.get("fast") != "0"
+
+    def get_row_plan(self):
+        serializer_class = self.get_serializer_class()
+        key = (type(self), serializer_class)
+        plan = _plans.get(key)
+        if plan is None:
+            with _plans_lock:
+                plan = _plans.get(key)
+                if plan is None:
+                    plan = _plans[key] = RowPlan(serializer_class, self.get_queryset().model, self.fast_fields)
+        return plan
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list():
+            return super().list(request, *args, **kwargs)
+        plan = self.get_row_plan()
+        queryset = plan.values(self.filter_queryset(self.get_queryset()))
+        if isinstance(request.accepted_renderer, JSONRenderer):
+            request.accepted_renderer = FastJSONRenderer()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.render(page, request))
+        return Response(plan.render(queryset, request))
@@ -0,0 +1,33 @@
+import operator
+from functools import reduce
+
+from django.db.models import Q
+from rest_framework import filters
+
+from .models import PsgcArea
+
+
+class PsgcSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter that can also match PSGC address names. Those are stored as
+    codes only, so for every `psgc_search_fields` entry on the view (a code
+    column) a term matches when the code belongs to an area whose name
+    contains the term.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request) or []
+        code_fields = getattr(view, "psgc_search_fields", [])
+        search_terms = self.get_search_terms(request)
+
+        if not search_terms or not (search_fields or code_fields):
+            return queryset
+
+        orm_lookups = [self.construct_search(str(field), queryset) for field in search_fields]
+        conditions = []
+        for term in search_terms:
+            codes = PsgcArea.objects.filter(name__icontains=term).values("code")
+            lookups = [Q(**{lookup: term}) for lookup in orm_lookups]
+            lookups += [Q(**{f"{field}__in": codes}) for field in code_fields]
+            conditions.append(reduce(operator.or_, lookups))
+        return queryset.filter(*conditions)
@@ -0,0 +1,222 @@
+"""
+Forward geocoding: PSGC address selection -> map coordinates.
+
+Offline first. The picked PSGC codes are looked up in a centroid table
+(api/data/psgc_centroids.csv, or a fuller export named by
+PSGC_CENTROIDS_FILE), from the most specific level down to the region -
+the same progressively coarser search the address forms did against
+Nominatim, without leaving the server. Levels that weren't picked are
+read off the more specific code (a barangay code carries its city,
+province and region), so a barangay alone still lands on its province
+when the table has no barangay or city rows; the bundled table only has
+regions and some provinces.
+
+When GEOCODER_BACKEND names an external geocoder, levels the table does
+not cover are asked there first. Every external answer, misses included,
+is kept in GeocodeCache (at most GEOCODE_CACHE_MAX_ENTRIES rows, least
+recently used go first), so the same address never goes out twice.
+"""
+
+import csv
+import hashlib
+import json
+import threading
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .psgc import BARANGAY, CITY_MUN, PROVINCE, REGION, areas
+
+LEVELS = [BARANGAY, CITY_MUN, PROVINCE, REGION]   # most specific first
+BUNDLED_CENTROIDS = Path(__file__).resolve().parent / "data" / "psgc_centroids.csv"
+PH_BOUNDS = (4.2, 21.5, 116.0, 127.0)   # lat min/max, lon min/max
+TOUCH_AFTER = timedelta(hours=1)        # don't rewrite used_at on every hit
+
+
+def normalize_code(code):
+    """PSGC codes as 9 digits; the 10-digit (2023) form pads the province part with a 0."""
+    code = (code or "").strip()
+    if len(code) == 10 and code.isdigit() and code[2] == "0":
+        return code[:2] + code[3:]
+    return code
+
+
+# digits of a PSGC code that identify each level, for the 9- and 10-digit forms
+LEVEL_DIGITS = {
+    9: {REGION: 2, PROVINCE: 4, CITY_MUN: 6, BARANGAY: 9},
+    10: {REGION: 2, PROVINCE: 5, CITY_MUN: 7, BARANGAY: 10},
+}
+
+
+def parent_code(code, level):
+    """The code of the `level` area containing `code` ("" for codes that aren't PSGC digits)."""
+    code = normalize_code(code)
+    digits = LEVEL_DIGITS.get(len(code))
+    if digits is None or not code.isdigit():
+        return ""
+    return code[:digits[level]].ljust(len(code), "0")
+
+
+def fill_levels(codes):
+    """{level: code} with the levels left blank taken from the most specific code given."""
+    filled = {level: (codes.get(level) or "").strip() for level in LEVELS}
+    for i, level in enumerate(LEVELS):
+        if filled[level]:
+            for coarser in LEVELS[i + 1:]:
+                filled[coarser] = filled[coarser] or parent_code(filled[level], coarser)
+    return filled
+
+
+def in_philippines(lat, lon):
+    return PH_BOUNDS[0] <= lat <= PH_BOUNDS[1] and PH_BOUNDS[2] <= lon <= PH_BOUNDS[3]
+
+
+class CentroidTable:
+    """code -> (latitude, longitude), read once from the centroid CSV."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = None
+
+    def path(self):
+        return Path(getattr(settings, "PSGC_CENTROIDS_FILE", "") or BUNDLED_CENTROIDS)
+
+    def _table(self):
+        if self._rows is None:
+            with self._lock:
+                if self._rows is None:
+                    rows = {}
+                    with open(self.path(), newline="", encoding="utf-8") as fh:
+                        for row in csv.DictReader(fh):
+                            try:
+                                rows[normalize_code(row["code"])] = (float(row["latitude"]), float(row["longitude"]))
+                            except (KeyError, ValueError):
+                                continue
+                    self._rows = rows
+        return self._rows
+
+    def get(self, code):
+        return self._table().get(normalize_code(code)) if code else None
+
+    def __len__(self):
+        return len(self._table())
+
+    def clear(self):
+        with self._lock:
+            self._rows = None
+
+
+centroids = CentroidTable()
+
+
+# -----------------------------
+# External geocoders
+# -----------------------------
+class NominatimGeocoder:
+    """OpenStreetMap Nominatim, limited to the Philippines. Mind its one-request-per-second policy."""
+
+    name = "nominatim"
+    url = "https://nominatim.openstreetmap.org/search"
+
+    def geocode(self, query):
+        params = urlencode({"q": query, "format": "jsonv2", "limit": 1, "countrycodes": "ph"})
+        request = Request(f"{self.url}?{params}", headers={
+            "User-Agent": getattr(settings, "GEOCODER_USER_AGENT", "crms-api"),
+            "Accept-Language": "en",
+        })
+        with urlopen(request, timeout=getattr(settings, "GEOCODER_TIMEOUT", 5)) as response:
+            data = json.load(response)
+        if not data:
+            return None
+        return float(data[0]["lat"]), float(data[0]["lon"])
+
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder():
+    """The configured external geocoder, or None when running offline only."""
+    global _geocoder
+    backend = getattr(settings, "GEOCODER_BACKEND", "")
+    if not backend:
+        return None
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                _geocoder = import_string(backend)()
+    return _geocoder
+
+
+def cache_key(query):
+    return hashlib.sha1(" ".join(query.lower().split()).encode()).hexdigest()
+
+
+def cached_lookup(geocoder, query):
+    """(coords or None, source). Network errors are not cached; the caller moves on."""
+    GeocodeCache = apps.get_model("api", "GeocodeCache")
+    key = cache_key(query)
+    now = timezone.now()
+    row = GeocodeCache.objects.filter(key=key).first()
+    if row is not None:
+        if now - row.used_at > TOUCH_AFTER:
+            GeocodeCache.objects.filter(pk=row.pk).update(used_at=now)
+        coords = (row.latitude, row.longitude) if row.latitude is not None else None
+        return coords, "cache"
+
+    source = getattr(geocoder, "name", type(geocoder).__name__)
+    try:
+        coords = geocoder.geocode(query)
+    except (OSError, ValueError, KeyError):
+        return None, source
+    if coords is not None and not in_philippines(*coords):
+        coords = None
+    GeocodeCache.objects.update_or_create(key=key, defaults={
+        "query": query[:500],
+        "latitude": coords[0] if coords else None,
+        "longitude": coords[1] if coords else None,
+        "source": source,
+        "used_at": now,
+    })
+    prune_cache()
+    return coords, source
+
+
+def prune_cache():
+    GeocodeCache = apps.get_model("api", "GeocodeCache")
+    limit = getattr(settings, "GEOCODE_CACHE_MAX_ENTRIES", 5000)
+    stale = list(GeocodeCache.objects.order_by("-used_at").values_list("pk", flat=True)[limit:])
+    if stale:
+        GeocodeCache.objects.filter(pk__in=stale).delete()
+
+
+# -----------------------------
+# Lookup
+# -----------------------------
+def geocode(codes, names=None):
+    """
+    Coordinates for an address picked as PSGC codes ({level: code}, names
+    optional as {level: name}). Returns {latitude, longitude, level, code,
+    source} for the most specific level that resolved, or None.
+    """
+    names = names or {}
+    codes = fill_levels(codes)
+    geocoder = get_geocoder()
+    for i, level in enumerate(LEVELS):
+        code = codes[level]
+        coords = centroids.get(code)
+        source = "psgc"
+        # Only ask outside when this level has a name; otherwise the query
+        # would just be the next coarser one.
+        if coords is None and geocoder is not None and (names.get(level) or areas.name(code)):
+            parts = [names.get(lvl) or areas.name(codes.get(lvl)) for lvl in LEVELS[i:]]
+            coords, source = cached_lookup(geocoder, ", ".join([p for p in parts if p] + ["Philippines"]))
+        if coords is not None:
+            return {"latitude": coords[0], "longitude": coords[1], "level": level, "code": code, "source": source}
+    return None
@@ -0,0 +1,281 @@
+"""
+Incident heatmap as slippy-map raster tiles.
+
+    GET /api/heatmap/<z>/<x>/<y>.png?crime_type=&province=&date_from=&date_to=&region_4a=1
+
+The maps used to download every report and draw the heat in the browser
+(leaflet.heat), which stalls past a few tens of thousands of points. Here
+each 256 px Web Mercator tile is drawn on the server, so the browser only
+fetches images, however many incidents there are:
+
+  1. the reports inside the tile, plus a margin as wide as the heat
+     radius, are read through the (geo_lat, geo_lng) index
+  2. NumPy bins them into a per-pixel weight grid (homicide counts twice,
+     as on the old maps)
+  3. the grid is convolved with a Gaussian stamp blurred by Pillow, and
+     overlapping heat saturates the way leaflet.heat's alpha blending does
+  4. the intensity is colored with leaflet.heat's default gradient
+
+Filters match the analytics line chart: the province is the incident's,
+or the victim's when the incident has none, and reports without a date
+are left out.
+
+Rendered tiles are kept on disk under HEATMAP_TILE_DIR, in a directory
+per data generation and per filter set. Adding, deleting or archiving a
+crime report, or changing one of the COLUMNS a tile depends on, starts a
+new generation (on commit), so no stale tile is ever served; old
+generations are removed then. Tiles are drawn from a read replica when
+one is configured; for REPLICA_LAG_SECONDS after a change they are served
+without being stored, so a tile drawn before the change reached the
+replica isn't kept for the whole generation.
+"""
+
+import hashlib
+import io
+import math
+import os
+import shutil
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Case, FloatField, Q, Value, When
+from django.utils.dateparse import parse_date
+from PIL import Image, ImageDraw, ImageFilter
+from rest_framework.exceptions import ValidationError
+
+from .dashboard import region_4a_codes, region_4a_filter
+from .models import CrimeReport
+
+TILE_SIZE = 256
+MAX_LATITUDE = 85.0511287798   # Web Mercator's square world
+GRADIENT = [(0.4, (0, 0, 255)), (0.6, (0, 255, 255)), (0.7, (0, 255, 0)), (0.8, (255, 255, 0)), (1.0, (255, 0, 0))]
+GENERATION_FILE = "generation"
+# what a tile is drawn from (position, weight, filters); other edits leave the tiles alone
+COLUMNS = (
+    "geo_lat", "geo_lng", "crime_type", "happened_at",
+    "loc_province_code", "v_province_code", "loc_region_code", "v_region_code",
+)
+
+
+def tile_dir():
+    return Path(getattr(settings, "HEATMAP_TILE_DIR", settings.BASE_DIR / "tiles"))
+
+
+def max_zoom():
+    return getattr(settings, "HEATMAP_MAX_ZOOM", 18)
+
+
+# -----------------------------
+# Projection
+# -----------------------------
+def world_pixels(lat, lng, zoom):
+    """Web Mercator pixel coordinates at `zoom` (arrays or floats)."""
+    scale = TILE_SIZE * 2 ** zoom
+    lat = np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE)
+    x = (np.asarray(lng) + 180.0) / 360.0 * scale
+    sin = np.sin(np.radians(lat))
+    y = (0.5 - np.log((1 + sin) / (1 - sin)) / (4 * math.pi)) * scale
+    return x, y
+
+
+def pixel_to_latlng(x, y, zoom):
+    scale = TILE_SIZE * 2 ** zoom
+    lng = x / scale * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / scale))))
+    return lat, lng
+
+
+# -----------------------------
+# Filters
+# -----------------------------
+def parse_filters(params):
+    """Validated filters, as a dict of strings (also the cache key)."""
+    filters = {}
+    for name in ("crime_type", "province"):
+        value = (params.get(name) or "").strip()
+        if value:
+            filters[name] = value
+    for name in ("date_from", "date_to"):
+        value = (params.get(name) or "").strip()
+        if value:
+            if parse_date(value) is None:
+                raise ValidationError({name: "Use YYYY-MM-DD."})
+            filters[name] = value
+    if (params.get("region_4a") or "").lower() in ("1", "true", "yes"):
+        filters["region_4a"] = "1"
+    return filters
+
+
+def filtered(filters):
+    queryset = CrimeReport.objects.order_by().filter(happened_at__isnull=False)
+    if "crime_type" in filters:
+        queryset = queryset.filter(crime_type__iexact=filters["crime_type"])
+    if "province" in filters:
+        province = filters["province"]
+        queryset = queryset.filter(
+            Q(loc_province_code=province) | (Q(loc_province_code="") & Q(v_province_code=province))
+        )
+    if "date_from" in filters:
+        queryset = queryset.filter(happened_at__gte=filters["date_from"])
+    if "date_to" in filters:
+        queryset = queryset.filter(happened_at__lte=filters["date_to"])
+    if "region_4a" in filters:
+        queryset = queryset.filter(region_4a_filter(region_4a_codes()))
+    return queryset
+
+
+def filter_key(filters):
+    if not filters:
+        return "all"
+    canonical = "&".join(f"{name}={filters[name]}" for name in sorted(filters))
+    return hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+
+# -----------------------------
+# Rendering
+# -----------------------------
+def radius():
+    return getattr(settings, "HEATMAP_RADIUS_PX", 16)
+
+
+@lru_cache(maxsize=4)
+def stamp(radius_px):
+    """Heat left by one point: a disc blurred by Pillow, peak 1.0, (2r+1)^2 floats."""
+    size = 2 * radius_px + 1
+    disc = Image.new("L", (size, size), 0)
+    core = radius_px // 2
+    ImageDraw.Draw(disc).ellipse(
+        [radius_px - core, radius_px - core, radius_px + core, radius_px + core], fill=255,
+    )
+    blurred = np.asarray(disc.filter(ImageFilter.GaussianBlur(radius_px / 3)), dtype=np.float64)
+    return blurred / blurred.max()
+
+
+@lru_cache(maxsize=1)
+def palette():
+    """256 RGB rows: leaflet.heat's default gradient."""
+    stops = [position for position, _ in GRADIENT]
+    levels = np.linspace(0.0, 1.0, 256)
+    channels = [np.interp(levels, stops, [color[i] for _, color in GRADIENT]) for i in range(3)]
+    return np.stack(channels, axis=1).astype(np.uint8)
+
+
+def convolve(grid, kernel):
+    """`grid` convolved with `kernel` (same shape as `grid`), through the FFT."""
+    shape = (grid.shape[0] + kernel.shape[0] - 1, grid.shape[1] + kernel.shape[1] - 1)
+    out = np.fft.irfft2(np.fft.rfft2(grid, shape) * np.fft.rfft2(kernel, shape), shape)
+    r = kernel.shape[0] // 2
+    return out[r:r + grid.shape[0], r:r + grid.shape[1]]
+
+
+def points_for_tile(filters, z, x, y, margin):
+    """(pixel x, pixel y, weight) arrays of the reports within `margin` px of the tile, tile-relative."""
+    left, top = x * TILE_SIZE - margin, y * TILE_SIZE - margin
+    right, bottom = (x + 1) * TILE_SIZE + margin, (y + 1) * TILE_SIZE + margin
+    north, west = pixel_to_latlng(left, top, z)
+    south, east = pixel_to_latlng(right, bottom, z)
+    weight = Case(When(crime_type__iexact="homicide", then=Value(2.0)), default=Value(1.0), output_field=FloatField())
+    rows = list(
+        filtered(filters)
+        .filter(geo_lat__range=(south, north), geo_lng__range=(west, east))
+        .values_list("geo_lat", "geo_lng", weight)
+    )
+    if not rows:
+        return None
+    data = np.asarray(rows, dtype=np.float64)
+    px, py = world_pixels(data[:, 0], data[:, 1], z)
+    return px - left, py - top, data[:, 2]
+
+
+def render(filters, z, x, y):
+    """PNG bytes of one tile."""
+    r = radius()
+    side = TILE_SIZE + 2 * r
+    points = points_for_tile(filters, z, x, y, r)
+    if points is None:
+        return empty_tile()
+    px, py, weights = points
+
+    # one bin per pixel of the padded tile
+    grid, _, _ = np.histogram2d(py, px, bins=side, range=[[0, side], [0, side]], weights=weights)
+    heat = convolve(grid, stamp(r))[r:r + TILE_SIZE, r:r + TILE_SIZE]
+    # stacked translucent stamps: 1 - (1 - a)^n, as leaflet.heat's canvas blending
+    opacity = getattr(settings, "HEATMAP_POINT_OPACITY", 0.3)
+    intensity = 1.0 - np.exp(np.log1p(-opacity) * np.maximum(heat, 0.0))
+    if intensity.max() < 1.0 / 255:
+        return empty_tile()
+
+    levels = np.round(intensity * 255).astype(np.uint8)
+    rgba = np.empty((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+    rgba[..., :3] = palette()[levels]
+    min_opacity = getattr(settings, "HEATMAP_MIN_OPACITY", 0.05)
+    rgba[..., 3] = np.where(levels > 0, np.maximum(levels, round(min_opacity * 255)), 0)
+    return encode(Image.fromarray(rgba, "RGBA"))
+
+
+def encode(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=1)
+def empty_tile():
+    return encode(Image.new("RGBA", (TILE_SIZE, TILE_SIZE), (0, 0, 0, 0)))
+
+
+# -----------------------------
+# Disk cache
+# -----------------------------
+def generation():
+    try:
+        return (tile_dir() / GENERATION_FILE).read_text().strip() or "0"
+    except OSError:
+        return "0"
+
+
+def settling(current):
+    """True while a replica may not have the writes that started this generation yet."""
+    if not getattr(settings, "REPLICA_DATABASES", []) or not current.isdigit():
+        return False
+    return time.time_ns() - int(current) < getattr(settings, "REPLICA_LAG_SECONDS", 10) * 1_000_000_000
+
+
+def invalidate():
+    """Start a new tile generation and remove the older ones."""
+    root = tile_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    current = str(time.time_ns())
+    temp = root / f".{GENERATION_FILE}.{os.getpid()}"
+    temp.write_text(current)
+    os.replace(temp, root / GENERATION_FILE)
+    for entry in root.iterdir():
+        if entry.is_dir() and entry.name != current:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def tile(params, z, x, y):
+    """PNG bytes of a tile, from disk when drawn before. ValueError for a tile outside the world."""
+    if not 0 <= z <= max_zoom() or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise ValueError("No such tile.")
+    filters = parse_filters(params)
+    current = generation()
+    path = tile_dir() / current / filter_key(filters) / str(z) / str(x) / f"{y}.png"
+    try:
+        return path.read_bytes()
+    except OSError:
+        pass
+    data = render(filters, z, x, y)
+    if settling(current):
+        return data
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(f".{y}.{os.getpid()}.png")
+        temp.write_bytes(data)
+        os.replace(temp, path)
+    except OSError:
+        pass   # generation removed meanwhile, or a read-only disk: serve it uncached
+    return data
@@ -0,0 +1,130 @@
+"""
+Demographic histograms, counted by the database.
+
+    GET /api/stats/ages/?subject=victim|suspect&by=crime_type|province|loc_province&band=10
+    GET /api/stats/personnel/?field=height|weight&bin=5&by=sex
+
+Ages are banded with integer division on the parsed age columns
+(v_age_years / s_age_years, see api/demographics.py) and grouped in the
+same query, so only one row per (group, band) leaves the database; the
+(group column, age) indexes let it answer from the index alone.
+
+`province` is where the victim / suspect lives, `loc_province` where the
+crime happened. Rows whose age (or height / weight) couldn't be parsed are
+counted per group as `unknown`.
+"""
+
+from django.db.models import Count, F, IntegerField, Value
+from django.db.models.functions import Floor, Substr, Trim, Upper
+from rest_framework.exceptions import ValidationError
+
+from .models import CrimeReport, PersonnelProfile, Suspect
+from .psgc import areas
+
+AGE_SUBJECTS = {
+    # subject: (model, age column, {by: group column})
+    "victim": (CrimeReport, "v_age_years", {
+        "crime_type": "crime_type", "province": "v_province_code", "loc_province": "loc_province_code",
+    }),
+    "suspect": (Suspect, "s_age_years", {
+        "crime_type": "s_crime_type", "province": "s_province_code", "loc_province": "loc_province_code",
+    }),
+}
+PERSONNEL_FIELDS = {"height": ("height_cm", "cm"), "weight": ("weight_kg", "kg")}
+SEX_LABELS = {"M": "Male", "F": "Female", "": "Unspecified"}
+MAX_GROUPS = 200
+
+
+def _choice(params, name, choices, default):
+    value = params.get(name) or default
+    if value not in choices:
+        raise ValidationError({name: f"Must be one of: {', '.join(sorted(choices))}."})
+    return value
+
+
+def _width(params, name, default, high):
+    raw = params.get(name) or default
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        raise ValidationError({name: "Must be a whole number."})
+    if not 1 <= value <= high:
+        raise ValidationError({name: f"Must be between 1 and {high}."})
+    return value
+
+
+def histogram(counts, width, label):
+    """
+    {group: {bin start | None: n}} -> response body. Bins run without gaps
+    from the lowest to the highest start seen, shared by every group.
+    """
+    starts = {start for bins in counts.values() for start in bins if start is not None}
+    edges = list(range(min(starts), max(starts) + width, width)) if starts else []
+    groups = []
+    for key, bins in counts.items():
+        known = [bins.get(start, 0) for start in edges]
+        groups.append({
+            "key": key,
+            "label": label(key),
+            "counts": known,
+            "unknown": bins.get(None, 0),
+            "total": sum(known) + bins.get(None, 0),
+        })
+    groups.sort(key=lambda group: (-group["total"], str(group["key"])))
+    return {"bins": edges, "groups": groups[:MAX_GROUPS]}
+
+
+def age_histogram(params):
+    subject = _choice(params, "subject", AGE_SUBJECTS, "victim")
+    model, age, group_columns = AGE_SUBJECTS[subject]
+    by = _choice(params, "by", set(group_columns) | {"none"}, "crime_type")
+    band = _width(params, "band", 10, 50)
+
+    group = Value("all") if by == "none" else F(group_columns[by])
+    start = F(age) / Value(band) * Value(band)   # integer division
+    rows = (
+        model.objects.order_by()
+        .values(group_key=group, start=start)
+        .annotate(n=Count("pk"))
+        .values_list("group_key", "start", "n")
+    )
+    counts = {}
+    for key, bin_start, n in rows:
+        counts.setdefault(key, {})[bin_start] = n
+
+    if by == "none":
+        label = lambda key: "All"
+    elif by in ("province", "loc_province"):
+        label = lambda code: areas.name(code) or code or "Unspecified"
+    else:
+        label = lambda value: value or "Unspecified"
+    return {"subject": subject, "by": by, "band": band, "unit": "years", **histogram(counts, band, label)}
+
+
+def personnel_histogram(params):
+    field = _choice(params, "field", PERSONNEL_FIELDS, "height")
+    column, unit = PERSONNEL_FIELDS[field]
+    by = _choice(params, "by", {"sex", "none"}, "none")
+    width = _width(params, "bin", 5, 50)
+
+    queryset = PersonnelProfile.objects.order_by()
+    if params.get("include_archived", "").lower() not in ("1", "true", "yes"):
+        queryset = queryset.filter(is_archived=False)
+    # first letter of the free-text sex column: M / F / other
+    group = Value("all") if by == "none" else Upper(Substr(Trim("sex"), 1, 1))
+    start = Floor(F(column) / Value(float(width)), output_field=IntegerField())
+    rows = (
+        queryset.values(group_key=group, start=start)
+        .annotate(n=Count("pk"))
+        .values_list("group_key", "start", "n")
+    )
+    counts = {}
+    for key, bin_index, n in rows:
+        if by == "sex":
+            key = key if key in SEX_LABELS else "other"
+        bins = counts.setdefault(key, {})
+        bin_start = None if bin_index is None else int(bin_index) * width
+        bins[bin_start] = bins.get(bin_start, 0) + n
+
+    label = lambda key: SEX_LABELS.get(key, "Other") if by == "sex" else "All"
+    return {"field": field, "by": by, "bin": width, "unit": unit, **histogram(counts, width, label)}
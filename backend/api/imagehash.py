@@ -0,0 +1,223 @@
+"""
+Perceptual hashes for duplicate photo detection.
+
+Every suspect / victim / profile photo gets a 64-bit dHash (difference
+hash) when it is saved. Visually identical images (re-encoded, resized,
+slightly cropped or recoloured) end up a few bits apart, so "near
+duplicate" means a small Hamming distance.
+
+Hashes are stored in ImageHash and served from a per-process BK-tree, which
+only visits the parts of the tree that can be within the requested
+distance instead of comparing against every photo.
+"""
+
+import threading
+import time
+
+from django.apps import apps
+from django.db import transaction
+
+HASH_SIZE = 8                # 8x8 comparisons -> 64 bits
+DEFAULT_DISTANCE = 8
+MAX_DISTANCE = 20
+CACHE_SECONDS = 300
+
+# kind -> (app model name, image field)
+PHOTO_FIELDS = {
+    "suspect": ("Suspect", "s_photo"),
+    "victim": ("CrimeReport", "v_photo"),
+    "profile": ("PersonnelProfile", "profile_image"),
+}
+
+
+def dhash(fileobj):
+    """64-bit difference hash of an image file, as an unsigned int."""
+    from PIL import Image   # loaded on the first photo, not at app start
+
+    with Image.open(fileobj) as img:
+        img.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))   # cheap JPEG downscale on decode
+        small = img.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+        pixels = list(small.getdata())
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def to_signed(value):
+    """Unsigned 64-bit hash -> value that fits a BigIntegerField."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def distance(a, b):
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance. Nodes are [hash, keys, children]."""
+
+    def __init__(self):
+        self.root = None
+
+    def add(self, value, key):
+        if self.root is None:
+            self.root = [value, [key], {}]
+            return
+        node = self.root
+        while True:
+            d = distance(value, node[0])
+            if d == 0:
+                node[1].append(key)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, [key], {}]
+                return
+            node = child
+
+    def search(self, value, radius):
+        """[(distance, hash, keys)] for every stored hash within `radius`."""
+        if self.root is None:
+            return []
+        found, stack = [], [self.root]
+        while stack:
+            node = stack.pop()
+            d = distance(value, node[0])
+            if d <= radius:
+                found.append((d, node[0], node[1]))
+            for edge, child in node[2].items():
+                if d - radius <= edge <= d + radius:
+                    stack.append(child)
+        return found
+
+
+class HashIndex:
+    """
+    BK-tree of all stored hashes keyed by (kind, object_id). Changes are
+    added incrementally; replaced or deleted hashes are filtered out on
+    lookup through `current`. Reloaded every CACHE_SECONDS to pick up other
+    workers' writes (and shed the stale nodes).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tree = None
+        self._current = {}
+        self._loaded_at = 0.0
+
+    def _ensure(self):
+        if self._tree is not None and time.monotonic() - self._loaded_at <= CACHE_SECONDS:
+            return
+        with self._lock:
+            if self._tree is not None and time.monotonic() - self._loaded_at <= CACHE_SECONDS:
+                return
+            ImageHash = apps.get_model("api", "ImageHash")
+            tree, current = BKTree(), {}
+            for kind, object_id, value in ImageHash.objects.values_list("kind", "object_id", "dhash").iterator():
+                value = to_unsigned(value)
+                tree.add(value, (kind, object_id))
+                current[(kind, object_id)] = value
+            self._tree, self._current, self._loaded_at = tree, current, time.monotonic()
+
+    # put/remove only patch an already loaded index; otherwise the next
+    # load reads the change from the table anyway.
+    def put(self, kind, object_id, value):
+        with self._lock:
+            if self._tree is not None:
+                self._tree.add(value, (kind, object_id))
+                self._current[(kind, object_id)] = value
+
+    def remove(self, kind, object_id):
+        with self._lock:
+            self._current.pop((kind, object_id), None)
+
+    def get(self, kind, object_id):
+        self._ensure()
+        return self._current.get((kind, object_id))
+
+    def similar(self, value, radius=DEFAULT_DISTANCE, exclude=None):
+        self._ensure()
+        with self._lock:
+            hits = self._tree.search(value, radius)
+            current = self._current
+            matches = [
+                {"kind": key[0], "id": key[1], "distance": d}
+                for d, stored, keys in hits
+                for key in keys
+                if key != exclude and current.get(key) == stored
+            ]
+        matches.sort(key=lambda m: (m["distance"], m["kind"], m["id"]))
+        return matches
+
+    def __len__(self):
+        self._ensure()
+        return len(self._current)
+
+
+index = HashIndex()
+
+
+def kind_for(instance):
+    name = type(instance).__name__
+    for kind, (model_name, field) in PHOTO_FIELDS.items():
+        if model_name == name:
+            return kind, field
+    return None, None
+
+
+def update_hash(instance, force=False):
+    """
+    Hash the instance's photo if it changed since the last time (or always,
+    with `force`); drop the hash if it was cleared. True when a hash was written.
+    """
+    ImageHash = apps.get_model("api", "ImageHash")
+    kind, field = kind_for(instance)
+    photo = getattr(instance, field)
+    if not photo:
+        forget(kind, instance.pk)
+        return False
+    if not force and ImageHash.objects.filter(kind=kind, object_id=instance.pk, file_name=photo.name).exists():
+        return False
+    try:
+        with photo.open("rb") as fh:
+            value = dhash(fh)
+    except (OSError, ValueError):
+        return False   # missing or not an image; any hash it had is kept
+    ImageHash.objects.update_or_create(
+        kind=kind, object_id=instance.pk,
+        defaults={"dhash": to_signed(value), "file_name": photo.name},
+    )
+    pk = instance.pk
+    # the in-process index only learns of it once it's committed; a rolled-back save never happened
+    transaction.on_commit(lambda: index.put(kind, pk, value))
+    return True
+
+
+def forget(kind, object_id):
+    ImageHash = apps.get_model("api", "ImageHash")
+    ImageHash.objects.filter(kind=kind, object_id=object_id).delete()
+    transaction.on_commit(lambda: index.remove(kind, object_id))
+
+
+def backfill(force=False):
+    """
+    Hash every stored photo not hashed yet (every one, with `force`); {kind: counts}.
+    Hashes are overwritten one by one, so photos that can't be read keep theirs.
+    """
+    ImageHash = apps.get_model("api", "ImageHash")
+    counts = {}
+    for kind, (model_name, field) in PHOTO_FIELDS.items():
+        Model = apps.get_model("api", model_name)
+        rows = Model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True}).only("pk", field)
+        total = hashed = 0
+        for obj in rows.iterator():
+            hashed += update_hash(obj, force=force)
+            total += 1
+        counts[kind] = {"photos": total, "hashed": hashed, "indexed": ImageHash.objects.filter(kind=kind).count()}
+    return counts
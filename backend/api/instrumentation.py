@@ -0,0 +1,221 @@
+"""
+Per-endpoint request instrumentation.
+
+Keeps an in-process registry of latency / query / payload metrics per route
+and renders them in the Prometheus text exposition format for `/metrics`.
+Each worker process keeps its own counters (scrape every worker, or run a
+single worker when you want exact totals).
+"""
+
+import hmac
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+# Seconds. Roughly the Prometheus client defaults, trimmed for an API.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes.
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# Queries per request.
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, same semantics as a Prometheus histogram."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Thread-safe store of per-(method, route) metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.requests = defaultdict(int)                   # (method, route, status) -> count
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.query_seconds = defaultdict(float)
+        self.serialize_seconds = defaultdict(float)
+        self.response_bytes = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+
+    def reset(self):
+        with self._lock:
+            self._reset()
+
+    def record(self, method, route, status, stats):
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, str(status))] += 1
+            self.latency[key].observe(stats.duration)
+            self.queries[key].observe(stats.query_count)
+            self.query_seconds[key] += stats.query_seconds
+            self.serialize_seconds[key] += stats.serialize_seconds
+            self.response_bytes[key].observe(stats.response_bytes)
+
+    # -----------------------------
+    # Prometheus text format
+    # -----------------------------
+    def render(self):
+        with self._lock:
+            lines = []
+            lines += _counter(
+                "api_requests_total", "Requests handled, by route and status.",
+                {_labels(method=m, route=r, status=s): v for (m, r, s), v in self.requests.items()},
+            )
+            lines += _histogram(
+                "api_request_duration_seconds", "Wall time spent handling a request.", self.latency,
+            )
+            lines += _histogram(
+                "api_db_queries_per_request", "Database queries executed per request.", self.queries,
+            )
+            lines += _counter(
+                "api_db_query_seconds_total", "Time spent in database queries.",
+                {_labels(method=m, route=r): v for (m, r), v in self.query_seconds.items()},
+            )
+            lines += _counter(
+                "api_serialize_seconds_total", "Time spent rendering response bodies.",
+                {_labels(method=m, route=r): v for (m, r), v in self.serialize_seconds.items()},
+            )
+            lines += _histogram(
+                "api_response_bytes", "Size of response bodies.", self.response_bytes,
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels):
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+def _counter(name, help_text, samples):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for labels, value in sorted(samples.items()):
+        lines.append(f"{name}{{{labels}}} {value}")
+    return lines
+
+
+def _histogram(name, help_text, series):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, route), hist in sorted(series.items()):
+        base = _labels(method=method, route=route)
+        for bound, count in zip(hist.buckets, hist.counts):
+            lines.append(f'{name}_bucket{{{base},le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{base},le="+Inf"}} {hist.total}')
+        lines.append(f"{name}_sum{{{base}}} {hist.sum}")
+        lines.append(f"{name}_count{{{base}}} {hist.total}")
+    return lines
+
+
+registry = MetricsRegistry()
+
+
+# -----------------------------
+# Per-request collection
+# -----------------------------
+class QueryRecorder:
+    """
+    `connection.execute_wrapper` hook that counts and times every query.
+    When `capture_sql` is set it also keeps the statements themselves
+    (bounded by `max_statements`) so slow requests can be explained.
+    """
+
+    def __init__(self, capture_sql=False, max_statements=200):
+        self.capture_sql = capture_sql
+        self.max_statements = max_statements
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []   # (seconds, alias, sql)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.seconds += elapsed
+            if self.capture_sql and len(self.statements) < self.max_statements:
+                alias = context["connection"].alias
+                self.statements.append((elapsed, alias, sql))
+
+    def install(self, stack):
+        """Register on every configured database for the life of `stack`."""
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(self))
+
+    def slowest(self, limit=10):
+        return sorted(self.statements, key=lambda s: s[0], reverse=True)[:limit]
+
+
+class RequestStats:
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.duration = 0.0
+        self.serialize_seconds = 0.0
+        self.response_bytes = 0
+
+    @property
+    def query_count(self):
+        return self.recorder.count
+
+    @property
+    def query_seconds(self):
+        return self.recorder.seconds
+
+
+def route_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match.route or "unnamed"
+
+
+def response_size(response):
+    if response.streaming:
+        return 0
+    return len(response.content)
+
+
+# -----------------------------
+# /metrics endpoint
+# -----------------------------
+def metrics_view(request):
+    """
+    Prometheus scrape target, for admin accounts and for scrapers sending
+    `Authorization: Bearer <METRICS_TOKEN>`. METRICS_PUBLIC opens it to anyone.
+    """
+    if not getattr(settings, "METRICS_PUBLIC", False) and not metrics_allowed(request):
+        return HttpResponseForbidden("Forbidden")
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def metrics_allowed(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    sent = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(sent.encode(), f"Bearer {token}".encode()):
+        return True
+    from .middleware import ProfilingMiddleware
+    from .permissions import is_admin_user
+
+    return is_admin_user(ProfilingMiddleware.authenticated_user(request))
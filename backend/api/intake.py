@@ -0,0 +1,39 @@
+"""
+Case intake: a crime report and its suspects recorded in one request.
+
+    POST /api/crimes/intake/   (see CaseIntakeSerializer for the body)
+
+Everything is written in one transaction, so a bad suspect leaves no
+half-recorded case behind. The suspects go in with a single bulk_create;
+since that skips Suspect.save() and post_save, create_case() does their
+work itself (coordinates, parsed ages, PSGC names, photo hashes, person
+matching, live events).
+"""
+
+from django.db import transaction
+
+from . import events, imagehash, persons
+from .models import CrimeReport, Suspect, sync_geo, sync_typed
+from .psgc import remember_names
+
+MAX_SUSPECTS = 50
+
+
+@transaction.atomic
+def create_case(report_data, suspects_data):
+    report = CrimeReport.objects.create(**report_data)
+
+    suspects = [Suspect(crime_report=report, **data) for data in suspects_data]
+    for suspect in suspects:
+        sync_geo(suspect, {})
+        sync_typed(suspect, {})
+    Suspect.objects.bulk_create(suspects)
+
+    for suspect in suspects:
+        remember_names(suspect)
+        if suspect.s_photo:
+            imagehash.update_hash(suspect)
+        persons.resolve(suspect)
+    created = [events.suspect_event(suspect, created=True) for suspect in suspects]
+    transaction.on_commit(lambda: [events.publish(event) for event in created])
+    return report, suspects
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api import imagehash
+
+
+class Command(BaseCommand):
+    help = "Compute perceptual hashes for existing suspect, victim and profile photos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rehash photos that already have a hash (photos that can't be read keep theirs).")
+
+    def handle(self, *args, **options):
+        for kind, counts in imagehash.backfill(force=options["force"]).items():
+            self.stdout.write(
+                f"{kind}: {counts['photos']} photos, {counts['hashed']} hashed, {counts['indexed']} indexed"
+            )
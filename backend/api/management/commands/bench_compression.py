@@ -0,0 +1,140 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import compression
+
+SIZES = [512, 1024, 4096, 16384, 65536, 262144, 1048576]
+GZIP_LEVELS = [1, 5, 6, 9]
+BROTLI_QUALITIES = [1, 4, 5, 6, 9, 11]
+
+FIRST = ["Juan", "Maria", "Jose", "Ana", "Pedro", "Rosa", "Mark", "Liza", "Ramon", "Grace"]
+LAST = ["Santos", "Reyes", "Cruz", "Bautista", "Garcia", "Mendoza", "Torres", "Aquino", "Ramos"]
+CRIMES = ["Theft", "Robbery", "Physical Injury", "Illegal Fishing", "Carnapping", "Homicide"]
+STATUSES = ["Ongoing", "Solved", "Unsolved"]
+
+
+def synthetic_rows(count, seed=0):
+    """Rows shaped like CrimeReportSerializer output, with varied values."""
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(count):
+        city = rnd.choice(["041005", "041014", "042103", "043404", "045624"])
+        rows.append({
+            "id": i + 1,
+            "crime_type": rnd.choice(CRIMES),
+            "description": " ".join(rnd.choice(FIRST + LAST + CRIMES).lower() for _ in range(rnd.randint(4, 20))),
+            "happened_at": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "status": rnd.choice(STATUSES),
+            "v_first_name": rnd.choice(FIRST),
+            "v_middle_name": "",
+            "v_last_name": rnd.choice(LAST),
+            "v_age": str(rnd.randint(12, 80)),
+            "v_address": f"{rnd.randint(1, 999)} Purok {rnd.randint(1, 9)}",
+            "v_region_code": "040000000",
+            "v_province_code": city[:4] + "00000",
+            "v_city_mun_code": city + "000",
+            "v_barangay_code": city + f"{rnd.randint(1, 80):03d}",
+            "v_photo": rnd.choice([None, f"http://localhost:8000/media/victims/{rnd.getrandbits(40):x}.jpg"]),
+            "loc_region_code": "040000000",
+            "loc_province_code": city[:4] + "00000",
+            "loc_city_mun_code": city + "000",
+            "loc_barangay_code": city + f"{rnd.randint(1, 80):03d}",
+            "latitude": f"{rnd.uniform(13.5, 14.8):.6f}",
+            "longitude": f"{rnd.uniform(120.6, 122.2):.6f}",
+            "loc_kind": rnd.choice(["inland", "coastal", "marine"]),
+            "is_archived": False,
+            "created_at": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T0{rnd.randint(0, 9)}:12:45.123456+08:00",
+            "suspects": [],
+        })
+    return rows
+
+
+def db_rows():
+    from api.models import CrimeReport
+    from api.serializers import CrimeReportSerializer
+
+    return CrimeReportSerializer(CrimeReport.objects.all()[:2000], many=True).data
+
+
+def payload(rows, size):
+    """A JSON list of rows, cut to about `size` bytes (whole rows, repeated if needed)."""
+    out, total, i = [], 2, 0
+    while total < size and rows:
+        row = dict(rows[i % len(rows)], id=i + 1)
+        encoded = json.dumps(row, separators=(",", ":"))
+        if out and total + len(encoded) + 1 > size:
+            break
+        out.append(encoded)
+        total += len(encoded) + 1
+        i += 1
+    return ("[" + ",".join(out) + "]").encode()
+
+
+def measure(encoder, data, min_seconds):
+    """(compressed bytes, CPU seconds per call)."""
+    out = encoder.compress(data)
+    runs, start = 0, time.process_time()
+    while True:
+        encoder.compress(data)
+        runs += 1
+        elapsed = time.process_time() - start
+        if elapsed >= min_seconds and runs >= 3:
+            return len(out), elapsed / runs
+
+
+class Command(BaseCommand):
+    help = (
+        "Compressed size and CPU time per response size for every gzip level and "
+        "Brotli quality, plus the time to first byte saved on a given link speed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Body sizes in bytes.")
+        parser.add_argument("--gzip", type=int, nargs="*", default=GZIP_LEVELS, help="gzip levels to try.")
+        parser.add_argument("--brotli", type=int, nargs="*", default=BROTLI_QUALITIES, help="Brotli qualities to try.")
+        parser.add_argument("--mbps", type=float, default=10.0, help="Link speed used for the transfer-time column.")
+        parser.add_argument("--from-db", action="store_true", help="Use serialized crime reports instead of synthetic rows.")
+        parser.add_argument("--min-time", type=float, default=0.2, help="CPU seconds to spend per measurement.")
+
+    def handle(self, *args, **options):
+        rows = db_rows() if options["from_db"] else synthetic_rows(2000)
+        if not rows:
+            self.stderr.write("No rows to benchmark with.")
+            return
+
+        encoders = [compression.GzipEncoder(level) for level in options["gzip"]]
+        if options["brotli"]:
+            if compression.brotli is None:
+                self.stderr.write("brotli is not installed; skipping br.")
+            else:
+                encoders += [compression.BrotliEncoder(quality) for quality in options["brotli"]]
+
+        bytes_per_ms = options["mbps"] * 1e6 / 8 / 1000
+        self.stdout.write(
+            f"{'size':>9} {'codec':<8} {'bytes':>9} {'ratio':>6} {'cpu ms':>8} {'MB/s':>7} "
+            f"{'send ms':>8} {'total ms':>9} {'saved ms':>9}"
+        )
+        seen = set()
+        for size in options["sizes"]:
+            data = payload(rows, size)
+            if len(data) in seen:   # smaller than one row: same body as before
+                continue
+            seen.add(len(data))
+            raw_ms = len(data) / bytes_per_ms
+            self.stdout.write(
+                f"{len(data):>9} {'identity':<8} {len(data):>9} {1:>6.2f} {0:>8.3f} {'':>7} "
+                f"{raw_ms:>8.2f} {raw_ms:>9.2f} {0:>9.2f}"
+            )
+            for encoder in encoders:
+                level = getattr(encoder, "level", getattr(encoder, "quality", ""))
+                out, cpu = measure(encoder, data, options["min_time"])
+                cpu_ms = cpu * 1000
+                send_ms = out / bytes_per_ms
+                self.stdout.write(
+                    f"{'':>9} {f'{encoder.name}-{level}':<8} {out:>9} {len(data) / out:>6.2f} "
+                    f"{cpu_ms:>8.3f} {len(data) / cpu / 1e6:>7.1f} {send_ms:>8.2f} "
+                    f"{cpu_ms + send_ms:>9.2f} {raw_ms - cpu_ms - send_ms:>9.2f}"
+                )
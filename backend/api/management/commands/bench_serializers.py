@@ -0,0 +1,117 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api import fastlist
+from api.models import CrimeReport, Suspect
+from api.views import CrimeReportViewSet, SuspectViewSet
+
+
+class Rollback(Exception):
+    pass
+
+
+def make_rows(count):
+    """`count` reports with 0-2 suspects each, half of them with photos."""
+    reports = CrimeReport.objects.bulk_create(
+        CrimeReport(
+            crime_type="Theft",
+            description=f"Bench report {i}: phone taken near the public market",
+            v_first_name="Juan",
+            v_last_name=f"Dela Cruz {i}",
+            v_region_code="040000000",
+            v_province_code="041000000",
+            v_city_mun_code="041005000",
+            loc_region_code="040000000",
+            loc_city_mun_code="041005000",
+            latitude="14.0",
+            longitude="121.1",
+            v_photo=f"victims/new/bench_{i}.jpg" if i % 2 else None,
+        )
+        for i in range(count)
+    )
+    Suspect.objects.bulk_create(
+        Suspect(
+            crime_report=report,
+            s_first_name=f"Suspect {j}",
+            s_last_name="Santos",
+            s_crime_type="Theft",
+            s_region_code="040000000",
+            s_photo=f"suspects/new/bench_{report.pk}_{j}.jpg" if j else None,
+        )
+        for report in reports
+        for j in range(report.pk % 3)
+    )
+
+
+def best_of(repeat, func):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func()
+        times.append(time.perf_counter() - start)
+    return count, min(times)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rows per second for the crime / suspect list: DRF serializers + JSONRenderer "
+        "against the values() fast path (api/fastlist.py), including the queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000,
+                            help="Reports to create for the run (rolled back afterwards); 0 uses the existing rows.")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best one is reported.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options["rows"]:
+                    make_rows(options["rows"])
+                self.run(options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, repeat):
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else "localhost"
+        request = RequestFactory().get("/api/", HTTP_HOST=host)
+        renderer = JSONRenderer()
+        self.stdout.write(f"orjson: {'yes' if fastlist.orjson is not None else 'no (stdlib json)'}")
+        self.stdout.write(f"{'endpoint':<10} {'path':<22} {'rows':>6} {'ms':>9} {'rows/s':>10} {'speedup':>8}")
+
+        for name, viewset, prefetch in [("crimes", CrimeReportViewSet, "suspects"), ("suspects", SuspectViewSet, None)]:
+            queryset = viewset.queryset.all()
+            plan = fastlist.RowPlan(viewset.serializer_class, queryset.model, viewset.fast_fields)
+
+            def serializer(qs):
+                def run():
+                    data = viewset.serializer_class(qs.all(), many=True, context={"request": request}).data
+                    renderer.render(data)
+                    return len(data)
+                return run
+
+            def fast():
+                data = plan.render(plan.values(queryset.all()), request)
+                fastlist.dumps(data)
+                return len(data)
+
+            paths = [("serializer", serializer(queryset))]
+            if prefetch:
+                paths.append(("serializer+prefetch", serializer(queryset.prefetch_related(prefetch))))
+            paths.append(("fast", fast))
+
+            baseline = None
+            for label, func in paths:
+                count, seconds = best_of(repeat, func)
+                rate = count / seconds if seconds else 0
+                baseline = baseline or rate
+                self.stdout.write(
+                    f"{name:<10} {label:<22} {count:>6} {seconds * 1000:>9.1f} {rate:>10.0f} "
+                    f"{rate / baseline if baseline else 0:>7.1f}x"
+                )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from api import dedup
+from api.models import CrimeReport
+
+
+class Command(BaseCommand):
+    help = "List pairs of crime reports that look like the same incident (one pass, blocked on dedup keys)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--min-score", type=float, default=None,
+                            help="Report pairs scoring at least this (default DEDUP_MIN_SCORE).")
+        parser.add_argument("--limit", type=int, default=200, help="Print at most this many pairs, best first.")
+        parser.add_argument("--reindex", action="store_true",
+                            help="Rebuild the blocking-key table from the reports first.")
+
+    def handle(self, *args, **options):
+        rows = list(CrimeReport.objects.order_by().values(*dedup.FIELDS).iterator())
+        if options["reindex"]:
+            keys = dedup.reindex(rows)
+            self.stdout.write(f"indexed {len(rows)} reports under {keys} keys")
+
+        pairs = sorted(dedup.scan(rows, options["min_score"]), key=lambda pair: (-pair[0], pair[1]["id"], pair[2]["id"]))
+        for similarity, a, b, parts in pairs[: options["limit"]]:
+            detail = " ".join(f"{part}={value:.2f}" for part, value in parts.items())
+            self.stdout.write(f"{similarity:.3f}  #{a['id']} / #{b['id']}  {a['crime_type'] or '-'}  {detail}")
+        self.stdout.write(f"{len(pairs)} possible duplicate pairs among {len(rows)} reports")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import persons
+from api.models import Person, PersonLink, Suspect, SuspectBlockKey
+
+
+class Command(BaseCommand):
+    help = "Match suspects to persons: link the ones not linked yet, or recluster everything with --rebuild."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true",
+                            help="Drop every person and recluster all suspects in one pass (also splits "
+                                 "persons that edits have left joined).")
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            with transaction.atomic():
+                suspects, groups = persons.rebuild(Suspect, Person, PersonLink, SuspectBlockKey)
+            self.stdout.write(f"{suspects} suspects clustered into {groups} persons")
+            return
+        pending = Suspect.objects.filter(person_link__isnull=True).order_by("pk")
+        total = 0
+        for suspect in pending.iterator():
+            persons.resolve(suspect)
+            total += 1
+        self.stdout.write(f"{total} suspects linked, {Person.objects.count()} persons")
@@ -0,0 +1,84 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api import tasks
+
+RECOVER_EVERY = 60   # seconds
+PRUNE_EVERY = 3600
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks (api/tasks.py), each attempt in its own process."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=getattr(settings, "TASKS_CONCURRENCY", 2),
+                            help="Tasks run at the same time (default TASKS_CONCURRENCY).")
+        parser.add_argument("--poll", type=float, default=getattr(settings, "TASKS_POLL_SECONDS", 2),
+                            help="Seconds between looks at an empty queue.")
+        parser.add_argument("--burst", action="store_true",
+                            help="Exit once the queue has nothing due and every started task is done.")
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options["concurrency"])
+        worker = tasks.worker_id()
+        context = multiprocessing.get_context()
+        running = {}   # task id -> (process, deadline)
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.stdout.write(f"worker {worker}: {concurrency} at a time, tasks: {', '.join(sorted(tasks.registry))}")
+
+        recovered_at = pruned_at = 0.0
+        while running or not self.stopping:
+            for task_id, (process, deadline) in list(running.items()):
+                if not process.is_alive():
+                    process.join()
+                    outcome = "finished"
+                    if process.exitcode != 0:
+                        outcome = f"process exited with code {process.exitcode}"
+                        tasks.fail(task_id, worker, f"Task process exited with code {process.exitcode}.")
+                elif time.monotonic() > deadline:
+                    process.kill()
+                    process.join()
+                    outcome = "timed out"
+                    tasks.fail(task_id, worker, "Timed out.")
+                else:
+                    continue
+                del running[task_id]
+                self.stdout.write(f"task #{task_id} {outcome}")
+
+            claimed = False
+            if not self.stopping:
+                if time.monotonic() - recovered_at > RECOVER_EVERY:
+                    tasks.recover()
+                    recovered_at = time.monotonic()
+                if time.monotonic() - pruned_at > PRUNE_EVERY:
+                    tasks.prune()
+                    pruned_at = time.monotonic()
+                while len(running) < concurrency:
+                    task = tasks.claim(worker)
+                    if task is None:
+                        break
+                    claimed = True
+                    self.stdout.write(f"task #{task.pk} {task.name}, attempt {task.attempts}/{task.max_attempts}")
+                    connections.close_all()   # the child opens its own
+                    # daemonic, so quitting on a second signal doesn't wait for them; their leases run out
+                    process = context.Process(
+                        target=tasks.execute, args=(task.pk, worker), name=f"task-{task.pk}", daemon=True,
+                    )
+                    process.start()
+                    running[task.pk] = (process, time.monotonic() + task.timeout)
+                if options["burst"] and not running and not claimed:
+                    break
+            time.sleep(0.1 if claimed or running else options["poll"])
+
+    def stop(self, signum, frame):
+        if self.stopping:   # second signal: don't wait for the running tasks
+            raise SystemExit(1)
+        self.stopping = True
+        self.stdout.write("stopping once the running tasks finish (signal again to quit now)")
@@ -0,0 +1,198 @@
+"""
+Cold-start profile of the API.
+
+Starts fresh Python processes the way a woken-up Render instance does and
+times each phase:
+
+    setup          django.setup() (settings, app registry, ApiConfig.ready)
+    application    get_asgi_application() (middleware chain)
+    first_request  first ASGI request (URLconf, views, DB connection, query)
+    warm_request   the same request again, for comparison
+
+One extra run under `python -X importtime` breaks the import time down per
+module and per phase. `--record` appends the timings, tagged with the git
+commit, to a JSON-lines history file and compares them with the last
+commit recorded there, so cold-start regressions show up commit to commit.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PHASES = ["setup", "application", "first_request", "warm_request"]
+PHASE_MARK = "startup-phase:"
+FIRST_PARTY = ("api", "backend")
+
+# Runs in the child process. Phase markers go to stderr so they interleave
+# with -X importtime's output and imports can be attributed to a phase.
+CHILD = r"""
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+def mark(name, times, start):
+    times[name] = (time.perf_counter() - start) * 1000
+    sys.stderr.write("%s %s\n" % (MARK, name))
+    sys.stderr.flush()
+    return time.perf_counter()
+
+times = {}
+import django
+django.setup()
+t = mark("setup", times, t0)
+from django.core.asgi import get_asgi_application
+app = get_asgi_application()
+t = mark("application", times, t)
+
+def request():
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": PATH, "raw_path": PATH.encode(),
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 50000),
+        "server": (HOST, 80), "headers": [(b"host", HOST.encode())],
+    }
+    sent, body = [], [{"type": "http.request", "body": b"", "more_body": False}]
+    async def receive():
+        if body:
+            return body.pop()
+        await asyncio.Event().wait()   # no disconnect; Django cancels this once it replied
+    async def send(message):
+        sent.append(message)
+    asyncio.run(app(scope, receive, send))
+    return next(m["status"] for m in sent if m["type"] == "http.response.start")
+
+status = request()
+t = mark("first_request", times, t)
+request()
+mark("warm_request", times, t)
+print(json.dumps({"times": times, "status": status}))
+"""
+
+
+def _percent(part, whole):
+    return f"{100 * part / whole:5.1f}%" if whole else "    -"
+
+
+class Command(BaseCommand):
+    help = "Measure cold-start time (setup, middleware, first request) and break it down by import."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/crimes/", help="URL of the first request (default /api/crimes/).")
+        parser.add_argument("--runs", type=int, default=5, help="Timed cold starts to take the median of.")
+        parser.add_argument("--top", type=int, default=20, help="Modules to list in the import breakdown.")
+        parser.add_argument("--no-imports", action="store_true", help="Skip the -X importtime breakdown.")
+        parser.add_argument(
+            "--record", nargs="?", const=str(settings.BASE_DIR / "benchmarks" / "startup.jsonl"), default=None,
+            metavar="FILE", help="Append the result to a history file (default benchmarks/startup.jsonl) "
+                                 "and compare with the previous commit in it.",
+        )
+
+    def handle(self, *args, **options):
+        runs = []
+        for _ in range(max(1, options["runs"])):
+            result, _stderr, wall = self.run_child(options["path"])
+            result["times"]["process"] = wall
+            runs.append(result["times"])
+        status = result["status"]
+
+        summary = {name: statistics.median(r[name] for r in runs) for name in PHASES + ["process"]}
+        self.stdout.write(f"Cold start, median of {len(runs)} run(s), GET {options['path']} -> {status}")
+        for name in PHASES + ["process"]:
+            best = min(r[name] for r in runs)
+            self.stdout.write(f"  {name:<14} {summary[name]:8.1f} ms   (best {best:.1f})")
+        self.stdout.write(
+            f"  {'to first reply':<14} {summary['setup'] + summary['application'] + summary['first_request']:8.1f} ms"
+        )
+
+        if not options["no_imports"]:
+            _result, stderr, _wall = self.run_child(options["path"], importtime=True)
+            self.report_imports(stderr, options["top"])
+
+        if options["record"]:
+            self.record(Path(options["record"]), options["path"], summary)
+
+    def run_child(self, path, importtime=False):
+        host = next((h for h in settings.ALLOWED_HOSTS if h not in ("*",) and not h.startswith(".")), "localhost")
+        code = f"MARK = {PHASE_MARK!r}\nPATH = {path!r}\nHOST = {host!r}\n" + CHILD
+        cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "backend.settings"))
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        wall = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0 or not proc.stdout.strip():
+            raise CommandError(f"Startup run failed:\n{proc.stderr[-2000:]}")
+        return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr, wall
+
+    def report_imports(self, stderr, top):
+        """Parse `-X importtime` output: self time per module, per package and per phase."""
+        modules, packages, phases = [], defaultdict(int), defaultdict(int)
+        phase_names = iter(PHASES)
+        phase = next(phase_names)
+        for line in stderr.splitlines():
+            if line.startswith(PHASE_MARK):
+                phase = next(phase_names, phase)
+                continue
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            parts = line[len("import time:"):].split("|")
+            self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2].strip()
+            modules.append((self_us, cumulative_us, name, phase))
+            root = name.split(".")[0]
+            packages[name.rsplit(".", 1)[0] if root in FIRST_PARTY else root] += self_us
+            phases[phase] += self_us
+
+        total = sum(phases.values())
+        self.stdout.write(f"\nImports: {len(modules)} modules, {total / 1000:.1f} ms (under -X importtime)")
+        self.stdout.write("  by phase:")
+        for name in PHASES:
+            self.stdout.write(f"    {name:<14} {phases[name] / 1000:8.1f} ms  {_percent(phases[name], total)}")
+        self.stdout.write("  by package (self time):")
+        for name, us in sorted(packages.items(), key=lambda kv: -kv[1])[:top]:
+            self.stdout.write(f"    {name:<40} {us / 1000:8.1f} ms  {_percent(us, total)}")
+        self.stdout.write("  slowest modules (self / cumulative, phase):")
+        for self_us, cumulative_us, name, phase in sorted(modules, reverse=True)[:top]:
+            self.stdout.write(f"    {name:<40} {self_us / 1000:8.1f} / {cumulative_us / 1000:8.1f} ms  {phase}")
+
+    def record(self, history, path, summary):
+        entry = {
+            "commit": self.git_commit(),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "path": path,
+            **{f"{name}_ms": round(value, 1) for name, value in summary.items()},
+        }
+        previous = None
+        if history.exists():
+            for line in history.read_text().splitlines():
+                if line.strip():
+                    row = json.loads(line)
+                    if row.get("commit") != entry["commit"] and row.get("path") == path:
+                        previous = row
+        history.parent.mkdir(parents=True, exist_ok=True)
+        with history.open("a") as fh:
+            fh.write(json.dumps(entry) + "\n")
+        self.stdout.write(f"\nRecorded {entry['commit']} in {history}")
+
+        if previous:
+            self.stdout.write(f"Compared with {previous['commit']}:")
+            for name in PHASES + ["process"]:
+                key = f"{name}_ms"
+                if key in previous:
+                    delta = entry[key] - previous[key]
+                    self.stdout.write(f"  {name:<14} {previous[key]:8.1f} -> {entry[key]:8.1f} ms  ({delta:+.1f})")
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.run(
+                ["git", "describe", "--always", "--dirty"], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return "unknown"
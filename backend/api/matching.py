@@ -0,0 +1,96 @@
+"""
+Name normalization, phonetic keys and string similarity for record matching
+(duplicate reports in api/dedup.py, suspect resolution in api/persons.py).
+
+Plain functions over strings; no model or Django imports.
+"""
+
+import re
+import unicodedata
+
+_non_letters = re.compile(r"[^a-z ]+")
+_spaces = re.compile(r"\s+")
+_vowels = re.compile(r"[aeiou]")
+_repeats = re.compile(r"(.)\1+")
+
+# Spelling variants that sound alike in Filipino / Spanish / English names,
+# applied in order.
+PHONETIC_RULES = [
+    ("ph", "f"), ("sch", "sk"), ("ck", "k"), ("qu", "k"),
+    ("ce", "se"), ("ci", "si"), ("cy", "si"),
+    ("c", "k"), ("q", "k"), ("x", "ks"), ("z", "s"),
+    ("v", "b"), ("w", "u"), ("y", "i"), ("j", "h"), ("h", ""),
+]
+
+
+def normalize(text):
+    """Lowercase ASCII letters and single spaces: "  Ma. Peñafrancia " -> "ma penafrancia"."""
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode()
+    return _spaces.sub(" ", _non_letters.sub(" ", text.lower())).strip()
+
+
+def phonetic(text):
+    """
+    Short sound-alike key: "Dela Cruz", "Delacruz" and "De la Kruz" -> "DLKRS";
+    "Jhon" / "John" / "Jon" -> "AN". Empty for text without letters.
+    """
+    word = normalize(text).replace(" ", "")
+    for old, new in PHONETIC_RULES:
+        word = word.replace(old, new)
+    if not word:
+        return ""
+    head = "a" if word[0] in "aeiou" else word[0]
+    return _repeats.sub(r"\1", head + _vowels.sub("", word[1:]))[:8].upper()
+
+
+def ngrams(text, n=3):
+    """Character n-grams of the normalized text, padded so short words still get some."""
+    text = normalize(text)
+    if not text:
+        return set()
+    padded = f"  {text} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def jaro_winkler(a, b):
+    """Jaro-Winkler similarity (0..1) of two already-normalized strings."""
+    if a == b:
+        return 1.0 if a else 0.0
+    if not a or not b:
+        return 0.0
+    window = max(max(len(a), len(b)) // 2 - 1, 0)
+    a_hits = [False] * len(a)
+    b_hits = [False] * len(b)
+    matches = 0
+    for i, ch in enumerate(a):
+        for j in range(max(0, i - window), min(len(b), i + window + 1)):
+            if not b_hits[j] and b[j] == ch:
+                a_hits[i] = b_hits[j] = True
+                matches += 1
+                break
+    if not matches:
+        return 0.0
+    a_matched = [ch for ch, hit in zip(a, a_hits) if hit]
+    b_matched = [ch for ch, hit in zip(b, b_hits) if hit]
+    transpositions = sum(x != y for x, y in zip(a_matched, b_matched)) / 2
+    jaro = (matches / len(a) + matches / len(b) + (matches - transpositions) / matches) / 3
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def name_similarity(first_a, last_a, first_b, last_b):
+    """Best Jaro-Winkler of the full names, also trying first / last swapped."""
+    a = normalize(f"{first_a} {last_a}")
+    b = normalize(f"{first_b} {last_b}")
+    swapped = normalize(f"{last_b} {first_b}")
+    return max(jaro_winkler(a, b), jaro_winkler(a, swapped))
@@ -0,0 +1,205 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from . import compression, db_routers
+from .instrumentation import QueryRecorder, RequestStats, registry, response_size, route_label
+
+slow_logger = logging.getLogger("api.slow_requests")
+
+
+class MetricsMiddleware:
+    """
+    Records latency, DB query count/time, render time and response size for
+    every request, keyed by the resolved route name.
+
+    With API_SLOW_REQUEST_MS set, requests slower than that are logged to the
+    `api.slow_requests` logger together with their slowest SQL statements.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, "API_SLOW_REQUEST_MS", None)
+
+    def __call__(self, request):
+        recorder = QueryRecorder(capture_sql=self.slow_ms is not None)
+        stats = RequestStats(recorder)
+        request._metrics = stats
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            recorder.install(stack)
+            response = self.get_response(request)
+        stats.duration = time.perf_counter() - start
+        stats.response_bytes = response_size(response)
+
+        route = route_label(request)
+        registry.record(request.method, route, response.status_code, stats)
+
+        if self.slow_ms is not None and stats.duration * 1000 >= self.slow_ms:
+            self.log_slow_request(request, route, response, stats)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (serializer data -> JSON bytes) after the
+        # view returns; wrap render() so that time is attributed separately.
+        stats = getattr(request, "_metrics", None)
+        if stats is None:
+            return response
+        render = response.render
+
+        def timed_render():
+            start = time.perf_counter()
+            try:
+                return render()
+            finally:
+                stats.serialize_seconds += time.perf_counter() - start
+
+        response.render = timed_render
+        return response
+
+    def log_slow_request(self, request, route, response, stats):
+        statements = "\n".join(
+            f"  {seconds * 1000:8.2f} ms [{alias}] {sql}"
+            for seconds, alias, sql in stats.recorder.slowest()
+        )
+        slow_logger.warning(
+            "Slow request %s %s (%s) -> %s in %.1f ms, %d queries (%.1f ms), render %.1f ms, %d bytes\n%s",
+            request.method,
+            request.get_full_path(),
+            route,
+            response.status_code,
+            stats.duration * 1000,
+            stats.query_count,
+            stats.query_seconds * 1000,
+            stats.serialize_seconds * 1000,
+            stats.response_bytes,
+            statements,
+        )
+
+
+class CompressionMiddleware:
+    """
+    Brotli / gzip for API responses, negotiated from Accept-Encoding (see
+    api/compression.py). Bodies below API_COMPRESSION_MIN_BYTES, and bodies
+    that would not get smaller, are sent uncompressed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "API_COMPRESSION_ENABLED", True)
+        self.min_bytes = getattr(settings, "API_COMPRESSION_MIN_BYTES", compression.DEFAULT_MIN_BYTES)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.enabled or not compression.is_compressible(request, response):
+            return response
+        if not response.streaming and len(response.content) < self.min_bytes:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = compression.negotiate(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+        encoder = compression.get_encoder(encoding)
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.acompress_stream(encoder, response.streaming_content)
+            else:
+                response.streaming_content = compression.compress_stream(encoder, response.streaming_content)
+            # The compressed length isn't known until the stream ends.
+            del response.headers["Content-Length"]
+        else:
+            content = encoder.compress(response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers["Content-Length"] = str(len(content))
+
+        # A strong ETag promises byte-identical bodies, which no longer holds.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in cProfile run of a single request, for admins only.
+
+    Send `X-Profile: 1` or add `?_profile=1`. The profile id is returned in
+    the `X-Profile-Id` response header and can be fetched from
+    /api/profiles/<id>/. Everyone else (and every normal request) goes
+    straight through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "PROFILING_ENABLED", True)
+
+    def __call__(self, request):
+        if not self.enabled or not self.wants_profile(request):
+            return self.get_response(request)
+        # Imported here so plain requests (and cold starts) never load
+        # cProfile / DRF / simplejwt through this middleware.
+        import cProfile
+
+        from . import profiling
+        from .permissions import is_admin_user
+
+        user = self.authenticated_user(request)
+        if not is_admin_user(user):
+            return self.get_response(request)
+        request._profile_user = user
+
+        recorder = QueryRecorder(capture_sql=True, max_statements=1000)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            recorder.install(stack)
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - start
+
+        response["X-Profile-Id"] = profiling.save_profile(request, response, profiler, recorder, duration)
+        return response
+
+    @staticmethod
+    def wants_profile(request):
+        return request.headers.get("X-Profile") == "1" or request.GET.get("_profile") == "1"
+
+    @staticmethod
+    def authenticated_user(request):
+        # API clients use JWT, which DRF only resolves inside the view; check it here too.
+        from rest_framework.exceptions import AuthenticationFailed
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            result = None
+        if result is not None:
+            return result[0]
+        return getattr(request, "user", None)
+
+
+class ReplicaRoutingMiddleware:
+    """Gives each request fresh read-replica routing state (see api/db_routers.py)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = db_routers.begin_request()
+        try:
+            return self.get_response(request)
+        finally:
+            db_routers.end_request(token)
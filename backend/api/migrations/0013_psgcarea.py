@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_crimereport_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PsgcArea',
+            fields=[
+                ('code', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('level', models.CharField(choices=[('region', 'Region'), ('province', 'Province'), ('city_mun', 'City / Municipality'), ('barangay', 'Barangay')], max_length=10)),
+                ('name', models.CharField(max_length=120)),
+                ('kind', models.CharField(blank=True, default='', max_length=30)),
+            ],
+        ),
+    ]
@@ -0,0 +1,102 @@
+"""
+Collect the PSGC names currently duplicated on every CrimeReport / Suspect
+row into PsgcArea, keyed by code, before the name columns are dropped.
+The reverse copies the names back from PsgcArea.
+
+A name typed in without a code (the old columns allowed it) gets a
+synthetic `name:<hash of level and name>` key, which the row's code column
+is set to, so 0015 doesn't lose it.
+"""
+
+import hashlib
+
+from django.db import migrations
+
+BLOCKS = {
+    "crimereport": ["v_", "loc_"],
+    "suspect": ["s_", "loc_"],
+}
+
+NAME_KEY_PREFIX = "name:"
+
+# (level, name column suffix, code column suffix)
+PARTS = [
+    ("region", "region", "region_code"),
+    ("province", "province", "province_code"),
+    ("city_mun", "city_municipality", "city_mun_code"),
+    ("barangay", "barangay", "barangay_code"),
+]
+
+
+def block_columns(prefix):
+    cols = [prefix + "city_mun_kind"]
+    for _, name_col, code_col in PARTS:
+        cols += [prefix + name_col, prefix + code_col]
+    return cols
+
+
+def name_key(level, name):
+    """Synthetic PsgcArea code for a name with no code; fits the 20-character code columns."""
+    normalized = " ".join(name.split()).casefold()
+    return NAME_KEY_PREFIX + hashlib.sha1(f"{level}|{normalized}".encode()).hexdigest()[:15]
+
+
+def forwards(apps, schema_editor):
+    db = schema_editor.connection.alias
+    PsgcArea = apps.get_model("api", "PsgcArea")
+    found = {}
+    for model_name, prefixes in BLOCKS.items():
+        Model = apps.get_model("api", model_name)
+        for prefix in prefixes:
+            uncoded = {}   # (code column, code as stored, name column, name as stored) -> synthetic key
+            rows = Model.objects.using(db).values(*block_columns(prefix)).distinct()
+            for row in rows.iterator():
+                for level, name_col, code_col in PARTS:
+                    code = row[prefix + code_col].strip()
+                    name = row[prefix + name_col].strip()
+                    if not name:
+                        continue
+                    if not code:
+                        code = name_key(level, name)
+                        stored = (prefix + code_col, row[prefix + code_col], prefix + name_col, row[prefix + name_col])
+                        uncoded[stored] = code
+                    if code in found:
+                        continue
+                    kind = row[prefix + "city_mun_kind"].strip() if level == "city_mun" else ""
+                    found[code] = PsgcArea(code=code, level=level, name=name, kind=kind)
+            for (code_col, code, name_col, name), key in uncoded.items():
+                Model.objects.using(db).filter(**{code_col: code, name_col: name}).update(**{code_col: key})
+    PsgcArea.objects.using(db).bulk_create(found.values(), batch_size=500, ignore_conflicts=True)
+
+
+def backwards(apps, schema_editor):
+    db = schema_editor.connection.alias
+    PsgcArea = apps.get_model("api", "PsgcArea")
+    names = {a.code: (a.name, a.kind) for a in PsgcArea.objects.using(db)}
+    for model_name, prefixes in BLOCKS.items():
+        Model = apps.get_model("api", model_name)
+        changed = []
+        for obj in Model.objects.using(db).iterator():
+            for prefix in prefixes:
+                for level, name_col, code_col in PARTS:
+                    code = getattr(obj, prefix + code_col)
+                    name, kind = names.get(code, ("", ""))
+                    setattr(obj, prefix + name_col, name)
+                    if code.startswith(NAME_KEY_PREFIX):
+                        setattr(obj, prefix + code_col, "")
+                    if level == "city_mun":
+                        setattr(obj, prefix + "city_mun_kind", kind)
+            changed.append(obj)
+        fields = [c for prefix in prefixes for c in block_columns(prefix)]
+        Model.objects.using(db).bulk_update(changed, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_psgcarea'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_populate_psgcarea'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='crimereport',
+            name='loc_barangay',
+        ),
+        migrations.RemoveField(
+            model_name='crimereport',
+            name='loc_city_mun_kind',
+        ),
+        migrations.RemoveField(
+            model_name='crimereport',
+            name='loc_city_municipality',
+        ),
+        migrations.RemoveField(
+            model_name='crimereport',
+            name='loc_province',
+        ),
+        migrations.RemoveField(
+            model_name='crimereport',
+            name='loc_region',
+        ),
+        migrations.RemoveField(
+            model_name='crimereport',
+            name='v_barangay',
+        ),
+        migrations.RemoveField(
+            model_name='crimereport',
+            name='v_city_mun_kind',
+        ),
+        migrations.RemoveField(
+            model_name='crimereport',
+            name='v_city_municipality',
+        ),
+        migrations.RemoveField(
+            model_name='crimereport',
+            name='v_province',
+        ),
+        migrations.RemoveField(
+            model_name='crimereport',
+            name='v_region',
+        ),
+        migrations.RemoveField(
+            model_name='suspect',
+            name='loc_barangay',
+        ),
+        migrations.RemoveField(
+            model_name='suspect',
+            name='loc_city_mun_kind',
+        ),
+        migrations.RemoveField(
+            model_name='suspect',
+            name='loc_city_municipality',
+        ),
+        migrations.RemoveField(
+            model_name='suspect',
+            name='loc_province',
+        ),
+        migrations.RemoveField(
+            model_name='suspect',
+            name='loc_region',
+        ),
+        migrations.RemoveField(
+            model_name='suspect',
+            name='s_barangay',
+        ),
+        migrations.RemoveField(
+            model_name='suspect',
+            name='s_city_mun_kind',
+        ),
+        migrations.RemoveField(
+            model_name='suspect',
+            name='s_city_municipality',
+        ),
+        migrations.RemoveField(
+            model_name='suspect',
+            name='s_province',
+        ),
+        migrations.RemoveField(
+            model_name='suspect',
+            name='s_region',
+        ),
+        migrations.AlterField(
+            model_name='crimereport',
+            name='loc_province_code',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=20),
+        ),
+    ]
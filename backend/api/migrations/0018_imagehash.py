@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageHash',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('suspect', 'Suspect photo'), ('victim', 'Victim photo'), ('profile', 'Personnel profile image')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('dhash', models.BigIntegerField(db_index=True)),
+                ('file_name', models.CharField(max_length=255)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_image_hash_per_photo')],
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:46
+
+import api.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_imagehash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedCrimeReport',
+            fields=[
+                ('status', models.CharField(choices=[('Ongoing', 'Ongoing'), ('Solved', 'Solved'), ('Unsolved', 'Unsolved')], default='Ongoing', max_length=20)),
+                ('crime_type', models.CharField(blank=True, choices=[('Theft', 'Theft'), ('Robbery', 'Robbery'), ('Assault', 'Assault'), ('Homicide', 'Homicide'), ('Illegal Fishing', 'Illegal Fishing'), ('Smuggling', 'Smuggling'), ('Drugs', 'Drugs'), ('Vandalism', 'Vandalism'), ('Fraud', 'Fraud'), ('Others', 'Others')], default='', max_length=100)),
+                ('description', models.TextField(blank=True, default='')),
+                ('happened_at', models.DateField(blank=True, null=True)),
+                ('v_first_name', models.CharField(blank=True, default='', max_length=120)),
+                ('v_middle_name', models.CharField(blank=True, default='', max_length=120)),
+                ('v_last_name', models.CharField(blank=True, default='', max_length=120)),
+                ('v_age', models.CharField(blank=True, default='', max_length=10)),
+                ('v_address', models.CharField(blank=True, default='', max_length=255)),
+                ('v_region_code', models.CharField(blank=True, default='', max_length=20)),
+                ('v_province_code', models.CharField(blank=True, default='', max_length=20)),
+                ('v_city_mun_code', models.CharField(blank=True, default='', max_length=20)),
+                ('v_barangay_code', models.CharField(blank=True, default='', max_length=20)),
+                ('v_photo', models.ImageField(blank=True, null=True, upload_to=api.models.victim_upload_to)),
+                ('loc_address', models.CharField(blank=True, default='', max_length=255)),
+                ('loc_region_code', models.CharField(blank=True, default='', max_length=20)),
+                ('loc_province_code', models.CharField(blank=True, db_index=True, default='', max_length=20)),
+                ('loc_city_mun_code', models.CharField(blank=True, default='', max_length=20)),
+                ('loc_barangay_code', models.CharField(blank=True, default='', max_length=20)),
+                ('latitude', models.CharField(blank=True, default='', max_length=50)),
+                ('longitude', models.CharField(blank=True, default='', max_length=50)),
+                ('loc_kind', models.CharField(blank=True, default='', max_length=20)),
+                ('loc_waterbody', models.CharField(blank=True, default='', max_length=120)),
+                ('is_archived', models.BooleanField(default=False)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSuspect',
+            fields=[
+                ('s_first_name', models.CharField(blank=True, default='', max_length=120)),
+                ('s_middle_name', models.CharField(blank=True, default='', max_length=120)),
+                ('s_last_name', models.CharField(blank=True, default='', max_length=120)),
+                ('s_age', models.CharField(blank=True, default='', max_length=10)),
+                ('s_crime_type', models.CharField(blank=True, default='', max_length=100)),
+                ('s_address', models.CharField(blank=True, default='', max_length=255)),
+                ('s_region_code', models.CharField(blank=True, default='', max_length=20)),
+                ('s_province_code', models.CharField(blank=True, default='', max_length=20)),
+                ('s_city_mun_code', models.CharField(blank=True, default='', max_length=20)),
+                ('s_barangay_code', models.CharField(blank=True, default='', max_length=20)),
+                ('s_photo', models.ImageField(blank=True, null=True, upload_to=api.models.suspect_upload_to)),
+                ('loc_address', models.CharField(blank=True, default='', max_length=255)),
+                ('loc_region_code', models.CharField(blank=True, default='', max_length=20)),
+                ('loc_province_code', models.CharField(blank=True, default='', max_length=20)),
+                ('loc_city_mun_code', models.CharField(blank=True, default='', max_length=20)),
+                ('loc_barangay_code', models.CharField(blank=True, default='', max_length=20)),
+                ('latitude', models.CharField(blank=True, default='', max_length=50)),
+                ('longitude', models.CharField(blank=True, default='', max_length=50)),
+                ('loc_kind', models.CharField(blank=True, default='', max_length=20)),
+                ('loc_waterbody', models.CharField(blank=True, default='', max_length=120)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(db_index=True)),
+                ('crime_report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suspects', to='api.archivedcrimereport')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+    ]
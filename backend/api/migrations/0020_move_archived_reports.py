@@ -0,0 +1,71 @@
+"""
+Move reports already flagged is_archived (and their suspects) from the hot
+tables into the archive tables, keeping ids and timestamps. archived_at is
+not known for those, so it is set to the report's last update. The reverse
+moves every archived report back, flagged is_archived again.
+"""
+
+from django.db import migrations
+
+
+def copy(src, model, **overrides):
+    names = {f.attname for f in model._meta.concrete_fields}
+    values = {f.attname: getattr(src, f.attname) for f in src._meta.concrete_fields if f.attname in names}
+    values.update(overrides)
+    return model(**values)
+
+
+def forwards(apps, schema_editor):
+    db = schema_editor.connection.alias
+    CrimeReport = apps.get_model("api", "CrimeReport")
+    Suspect = apps.get_model("api", "Suspect")
+    ArchivedCrimeReport = apps.get_model("api", "ArchivedCrimeReport")
+    ArchivedSuspect = apps.get_model("api", "ArchivedSuspect")
+
+    reports = list(CrimeReport.objects.using(db).filter(is_archived=True))
+    if not reports:
+        return
+    stamps = {r.pk: r.updated_at for r in reports}
+    ArchivedCrimeReport.objects.using(db).bulk_create(
+        [copy(r, ArchivedCrimeReport, archived_at=r.updated_at) for r in reports], batch_size=500
+    )
+    suspects = Suspect.objects.using(db).filter(crime_report_id__in=stamps)
+    ArchivedSuspect.objects.using(db).bulk_create(
+        [copy(s, ArchivedSuspect, archived_at=stamps[s.crime_report_id]) for s in suspects.iterator()],
+        batch_size=500,
+    )
+    suspects.delete()
+    CrimeReport.objects.using(db).filter(pk__in=stamps).delete()
+
+
+def backwards(apps, schema_editor):
+    db = schema_editor.connection.alias
+    CrimeReport = apps.get_model("api", "CrimeReport")
+    Suspect = apps.get_model("api", "Suspect")
+    ArchivedCrimeReport = apps.get_model("api", "ArchivedCrimeReport")
+    ArchivedSuspect = apps.get_model("api", "ArchivedSuspect")
+
+    for archived_model, model, extra in (
+        (ArchivedCrimeReport, CrimeReport, {"is_archived": True}),
+        (ArchivedSuspect, Suspect, {}),
+    ):
+        originals = list(archived_model.objects.using(db))
+        rows = model.objects.using(db).bulk_create(
+            [copy(o, model, **extra) for o in originals], batch_size=500
+        )
+        # auto_now / auto_now_add stamped the inserts; put the originals back.
+        for row, original in zip(rows, originals):
+            row.created_at, row.updated_at = original.created_at, original.updated_at
+        model.objects.using(db).bulk_update(rows, ["created_at", "updated_at"], batch_size=500)
+    ArchivedCrimeReport.objects.using(db).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_archive_tables'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
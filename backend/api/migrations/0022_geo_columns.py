@@ -0,0 +1,69 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_geocodecache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcrimereport',
+            name='geo_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedcrimereport',
+            name='geo_lng',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedsuspect',
+            name='geo_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedsuspect',
+            name='geo_lng',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='crimereport',
+            name='geo_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='crimereport',
+            name='geo_lng',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='suspect',
+            name='geo_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='suspect',
+            name='geo_lng',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcrimereport',
+            index=models.Index(fields=['geo_lat', 'geo_lng'], name='api_archivedcrimereport_geo'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedsuspect',
+            index=models.Index(fields=['geo_lat', 'geo_lng'], name='api_archivedsuspect_geo'),
+        ),
+        migrations.AddIndex(
+            model_name='crimereport',
+            index=models.Index(fields=['geo_lat', 'geo_lng'], name='api_crimereport_geo'),
+        ),
+        migrations.AddIndex(
+            model_name='suspect',
+            index=models.Index(fields=['geo_lat', 'geo_lng'], name='api_suspect_geo'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+"""
+Fill geo_lat / geo_lng from the existing text latitude / longitude. Values
+that are blank, not numbers or out of range stay NULL (those rows simply
+never match a radius query).
+"""
+
+from django.db import migrations
+
+MODELS = ["crimereport", "suspect", "archivedcrimereport", "archivedsuspect"]
+
+
+def parse(value, limit):
+    try:
+        number = float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return number if -limit <= number <= limit else None
+
+
+def forwards(apps, schema_editor):
+    db = schema_editor.connection.alias
+    for model_name in MODELS:
+        Model = apps.get_model("api", model_name)
+        changed = []
+        for obj in Model.objects.using(db).only("pk", "latitude", "longitude").iterator():
+            obj.geo_lat = parse(obj.latitude, 90)
+            obj.geo_lng = parse(obj.longitude, 180)
+            if obj.geo_lat is not None or obj.geo_lng is not None:
+                changed.append(obj)
+        Model.objects.using(db).bulk_update(changed, ["geo_lat", "geo_lng"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_geo_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_populate_geo_columns'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='personnelprofile',
+            name='is_archived',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddIndex(
+            model_name='crimereport',
+            index=models.Index(fields=['status', 'crime_type'], name='api_crime_status_type'),
+        ),
+        migrations.AddIndex(
+            model_name='crimereport',
+            index=models.Index(fields=['loc_region_code'], name='api_crime_loc_region'),
+        ),
+        migrations.AddIndex(
+            model_name='crimereport',
+            index=models.Index(fields=['v_region_code'], name='api_crime_v_region'),
+        ),
+        migrations.AddIndex(
+            model_name='crimereport',
+            index=models.Index(fields=['created_at'], name='api_crime_created'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcrimereport',
+            name='v_age_years',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedsuspect',
+            name='s_age_years',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='crimereport',
+            name='v_age_years',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='personnelprofile',
+            name='height_cm',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='personnelprofile',
+            name='weight_kg',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='suspect',
+            name='s_age_years',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='crimereport',
+            index=models.Index(fields=['crime_type', 'v_age_years'], name='api_crime_type_age'),
+        ),
+        migrations.AddIndex(
+            model_name='crimereport',
+            index=models.Index(fields=['v_province_code', 'v_age_years'], name='api_crime_prov_age'),
+        ),
+        migrations.AddIndex(
+            model_name='crimereport',
+            index=models.Index(fields=['loc_province_code', 'v_age_years'], name='api_crime_loc_prov_age'),
+        ),
+        migrations.AddIndex(
+            model_name='suspect',
+            index=models.Index(fields=['s_crime_type', 's_age_years'], name='api_suspect_type_age'),
+        ),
+        migrations.AddIndex(
+            model_name='suspect',
+            index=models.Index(fields=['s_province_code', 's_age_years'], name='api_suspect_prov_age'),
+        ),
+        migrations.AddIndex(
+            model_name='suspect',
+            index=models.Index(fields=['loc_province_code', 's_age_years'], name='api_suspect_loc_prov_age'),
+        ),
+    ]
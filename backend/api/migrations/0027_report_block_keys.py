@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_populate_typed_demographics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportBlockKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, max_length=40)),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='block_keys', to='api.crimereport')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('report', 'key'), name='unique_block_key_per_report')],
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+"""
+File the existing crime reports under their duplicate-detection blocking
+keys. New and edited reports are indexed on save (api/signals.py).
+"""
+
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations
+
+# The keys of api/dedup.py (and the name helpers of api/matching.py) as
+# they were when the table was added, so later changes there don't change
+# what this migration does.
+_non_letters = re.compile(r"[^a-z ]+")
+_spaces = re.compile(r"\s+")
+_vowels = re.compile(r"[aeiou]")
+_repeats = re.compile(r"(.)\1+")
+
+# Spelling variants that sound alike in Filipino / Spanish / English names,
+# applied in order.
+PHONETIC_RULES = [
+    ("ph", "f"), ("sch", "sk"), ("ck", "k"), ("qu", "k"),
+    ("ce", "se"), ("ci", "si"), ("cy", "si"),
+    ("c", "k"), ("q", "k"), ("x", "ks"), ("z", "s"),
+    ("v", "b"), ("w", "u"), ("y", "i"), ("j", "h"), ("h", ""),
+]
+
+
+def normalize(text):
+    """Lowercase ASCII letters and single spaces: "  Ma. Peñafrancia " -> "ma penafrancia"."""
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode()
+    return _spaces.sub(" ", _non_letters.sub(" ", text.lower())).strip()
+
+
+def phonetic(text):
+    """
+    Short sound-alike key: "Dela Cruz", "Delacruz" and "De la Kruz" -> "DLKRS";
+    "Jhon" / "John" / "Jon" -> "AN". Empty for text without letters.
+    """
+    word = normalize(text).replace(" ", "")
+    for old, new in PHONETIC_RULES:
+        word = word.replace(old, new)
+    if not word:
+        return ""
+    head = "a" if word[0] in "aeiou" else word[0]
+    return _repeats.sub(r"\1", head + _vowels.sub("", word[1:]))[:8].upper()
+
+
+FIELDS = ["id", "v_first_name", "v_last_name", "happened_at", "crime_type", "loc_barangay_code"]
+
+
+def raw_keys(row):
+    """Blocking keys of a report as readable strings (see api/dedup.py)."""
+    name = "".join(filter(None, [phonetic(row["v_last_name"]), phonetic(row["v_first_name"])]))
+    date = row["happened_at"].isoformat() if row["happened_at"] else ""
+    barangay = (row["loc_barangay_code"] or "").strip()
+    crime_type = normalize(row["crime_type"])
+    keys = set()
+    if name and date and barangay:
+        keys.add(f"nd-b:{name}|{date}|{barangay}")
+    if name and date and crime_type:
+        keys.add(f"nd-t:{name}|{date}|{crime_type}")
+    if date and barangay and crime_type:
+        keys.add(f"d-bt:{date}|{barangay}|{crime_type}")
+    if name and barangay:
+        keys.add(f"n-b:{name}|{barangay}")
+    return keys
+
+
+def hashed(key):
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def block_keys(row):
+    return {hashed(key) for key in raw_keys(row)}
+
+
+def forwards(apps, schema_editor):
+    db = schema_editor.connection.alias
+    CrimeReport = apps.get_model("api", "CrimeReport")
+    ReportBlockKey = apps.get_model("api", "ReportBlockKey")
+    keys = []
+    for row in CrimeReport.objects.using(db).values(*FIELDS).iterator():
+        keys.extend(ReportBlockKey(report_id=row["id"], key=key) for key in block_keys(row))
+    ReportBlockKey.objects.using(db).bulk_create(keys, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_report_block_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
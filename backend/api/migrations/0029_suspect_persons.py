@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_populate_report_block_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Person',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PersonLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=1.0)),
+                ('person', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='links', to='api.person')),
+                ('suspect', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='person_link', to='api.suspect')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SuspectBlockKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, max_length=24)),
+                ('suspect', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='block_keys', to='api.suspect')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('suspect', 'key'), name='unique_block_key_per_suspect')],
+            },
+        ),
+    ]
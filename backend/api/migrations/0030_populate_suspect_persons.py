@@ -0,0 +1,226 @@
+"""
+Cluster the existing suspects into persons and file them under their
+blocking keys. New and edited suspects are resolved on save (api/signals.py).
+"""
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+# The clustering of api/persons.py (and the name helpers of
+# api/matching.py) as it was when persons were added, so later changes
+# there don't change what this migration does. PERSONS_MIN_SCORE /
+# PERSONS_MAX_BLOCK are fixed at their defaults of the time.
+_non_letters = re.compile(r"[^a-z ]+")
+_spaces = re.compile(r"\s+")
+_vowels = re.compile(r"[aeiou]")
+_repeats = re.compile(r"(.)\1+")
+
+# Spelling variants that sound alike in Filipino / Spanish / English names,
+# applied in order.
+PHONETIC_RULES = [
+    ("ph", "f"), ("sch", "sk"), ("ck", "k"), ("qu", "k"),
+    ("ce", "se"), ("ci", "si"), ("cy", "si"),
+    ("c", "k"), ("q", "k"), ("x", "ks"), ("z", "s"),
+    ("v", "b"), ("w", "u"), ("y", "i"), ("j", "h"), ("h", ""),
+]
+
+
+def normalize(text):
+    """Lowercase ASCII letters and single spaces: "  Ma. Peñafrancia " -> "ma penafrancia"."""
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode()
+    return _spaces.sub(" ", _non_letters.sub(" ", text.lower())).strip()
+
+
+def phonetic(text):
+    """
+    Short sound-alike key: "Dela Cruz", "Delacruz" and "De la Kruz" -> "DLKRS";
+    "Jhon" / "John" / "Jon" -> "AN". Empty for text without letters.
+    """
+    word = normalize(text).replace(" ", "")
+    for old, new in PHONETIC_RULES:
+        word = word.replace(old, new)
+    if not word:
+        return ""
+    head = "a" if word[0] in "aeiou" else word[0]
+    return _repeats.sub(r"\1", head + _vowels.sub("", word[1:]))[:8].upper()
+
+
+def jaro_winkler(a, b):
+    """Jaro-Winkler similarity (0..1) of two already-normalized strings."""
+    if a == b:
+        return 1.0 if a else 0.0
+    if not a or not b:
+        return 0.0
+    window = max(max(len(a), len(b)) // 2 - 1, 0)
+    a_hits = [False] * len(a)
+    b_hits = [False] * len(b)
+    matches = 0
+    for i, ch in enumerate(a):
+        for j in range(max(0, i - window), min(len(b), i + window + 1)):
+            if not b_hits[j] and b[j] == ch:
+                a_hits[i] = b_hits[j] = True
+                matches += 1
+                break
+    if not matches:
+        return 0.0
+    a_matched = [ch for ch, hit in zip(a, a_hits) if hit]
+    b_matched = [ch for ch, hit in zip(b, b_hits) if hit]
+    transpositions = sum(x != y for x, y in zip(a_matched, b_matched)) / 2
+    jaro = (matches / len(a) + matches / len(b) + (matches - transpositions) / matches) / 3
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def name_similarity(first_a, last_a, first_b, last_b):
+    """Best Jaro-Winkler of the full names, also trying first / last swapped."""
+    a = normalize(f"{first_a} {last_a}")
+    b = normalize(f"{first_b} {last_b}")
+    swapped = normalize(f"{last_b} {first_b}")
+    return max(jaro_winkler(a, b), jaro_winkler(a, swapped))
+
+
+FIELDS = [
+    "id", "crime_report_id", "s_first_name", "s_last_name", "s_age_years",
+    "s_barangay_code", "s_city_mun_code",
+]
+
+WEIGHTS = {"name": 0.6, "age": 0.2, "place": 0.2}
+MIN_SCORE = 0.8
+MAX_BLOCK = 100
+
+
+def block_keys(row):
+    """Blocking keys of a suspect row (see api/persons.py)."""
+    first, last = phonetic(row["s_first_name"]), phonetic(row["s_last_name"])
+    keys = set()
+    if first and last:
+        keys.add("n:" + "|".join(sorted([last, first])))
+    surname = normalize(row["s_last_name"]).replace(" ", "")
+    if first and len(surname) >= 3:
+        keys.update(f"g:{surname[i:i + 3]}|{first[0]}" for i in range(len(surname) - 2))
+    return keys
+
+
+def score(a, b):
+    """(similarity 0..1, per-part scores) of two suspect rows. Unknown ages count half."""
+    parts = {
+        "name": name_similarity(a["s_first_name"], a["s_last_name"], b["s_first_name"], b["s_last_name"]),
+        "age": 0.5,
+        "place": 0.0,
+    }
+    if a["s_age_years"] is not None and b["s_age_years"] is not None:
+        years = abs(a["s_age_years"] - b["s_age_years"])
+        parts["age"] = 1.0 if years <= 2 else 0.5 if years <= 5 else 0.0
+    if a["s_barangay_code"] and a["s_barangay_code"] == b["s_barangay_code"]:
+        parts["place"] = 1.0
+    elif a["s_city_mun_code"] and a["s_city_mun_code"] == b["s_city_mun_code"]:
+        parts["place"] = 0.5
+    total = sum(WEIGHTS[part] * value for part, value in parts.items())
+    return round(total, 3), {part: round(value, 3) for part, value in parts.items()}
+
+
+def cluster(rows, threshold=None, limit=None):
+    """
+    Group suspect rows into persons in one pass: rows are bucketed by
+    blocking key, pairs within a bucket are scored, and matching pairs are
+    joined (union-find). Returns [{suspect id: score}], one dict per person;
+    the score is the suspect's best match (1.0 when it stands alone).
+    """
+    threshold = MIN_SCORE if threshold is None else threshold
+    limit = MAX_BLOCK if limit is None else limit
+    by_id = {}
+    blocks = {}
+    for row in rows:
+        by_id[row["id"]] = row
+        for key in block_keys(row):
+            blocks.setdefault(key, []).append(row["id"])
+
+    parent = {pk: pk for pk in by_id}
+    reports = {pk: {row["crime_report_id"]} for pk, row in by_id.items()}   # per root
+    best = {}
+
+    def root(pk):
+        while parent[pk] != pk:
+            parent[pk] = parent[parent[pk]]
+            pk = parent[pk]
+        return pk
+
+    seen = set()
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > limit:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                pair = (a, b) if a < b else (b, a)
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                root_a, root_b = root(a), root(b)
+                # already one person, or joining would put one person twice in a report
+                if root_a == root_b or reports[root_a] & reports[root_b]:
+                    continue
+                similarity, _ = score(by_id[a], by_id[b])
+                if similarity >= threshold:
+                    for pk in pair:
+                        best[pk] = max(similarity, best.get(pk, 0.0))
+                    parent[root_a] = root_b
+                    reports[root_b] |= reports.pop(root_a)
+
+    groups = {}
+    for pk in by_id:
+        groups.setdefault(root(pk), {})[pk] = best.get(pk, 1.0)
+    return sorted(groups.values(), key=min)
+
+
+def store(groups, keys, Person, PersonLink, SuspectBlockKey, using="default"):
+    """Replace every person, link and blocking key with `cluster()` output (models passed in for migrations)."""
+    PersonLink.objects.using(using).all().delete()
+    Person.objects.using(using).all().delete()
+    SuspectBlockKey.objects.using(using).all().delete()
+    persons = Person.objects.using(using).bulk_create([Person() for _ in groups], batch_size=500)
+    PersonLink.objects.using(using).bulk_create(
+        [
+            PersonLink(person_id=person.pk, suspect_id=suspect_id, score=similarity)
+            for person, group in zip(persons, groups)
+            for suspect_id, similarity in group.items()
+        ],
+        batch_size=500,
+    )
+    SuspectBlockKey.objects.using(using).bulk_create(
+        [SuspectBlockKey(suspect_id=suspect_id, key=key) for suspect_id, suspect_keys in keys.items() for key in suspect_keys],
+        batch_size=500,
+    )
+
+
+def rebuild(Suspect, Person, PersonLink, SuspectBlockKey, using="default"):
+    rows = list(Suspect.objects.using(using).order_by().values(*FIELDS).iterator())
+    groups = cluster(rows)
+    store(groups, {row["id"]: block_keys(row) for row in rows}, Person, PersonLink, SuspectBlockKey, using)
+    return len(rows), len(groups)
+
+
+def forwards(apps, schema_editor):
+    rebuild(
+        apps.get_model("api", "Suspect"),
+        apps.get_model("api", "Person"),
+        apps.get_model("api", "PersonLink"),
+        apps.get_model("api", "SuspectBlockKey"),
+        using=schema_editor.connection.alias,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0029_suspect_persons'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+"""
+Re-read ages stored as 0. The first parser took any mention of months /
+weeks / days for an infant, so "1 yr 6 mos" was filed as 0 instead of 1.
+
+The parser is copied here as it stands now, so later changes to
+api/demographics.py don't change what this migration does.
+"""
+
+import re
+
+from django.db import migrations
+
+MAX_AGE = 120
+_number = r"(\d+(?:[.,]\d+)?)"
+_range_re = re.compile(_number + r"\s*(?:-|–|to)\s*" + _number)
+_number_re = re.compile(_number)
+_years_re = re.compile(_number + r"\s*(?:years?|yrs?|y)(?![a-z])")
+_months_re = re.compile(r"(?<![a-z])(mos?|months?|weeks?|wks?|days?)\b")
+
+
+def _float(text):
+    return float(text.replace(",", "."))
+
+
+def _number_in(text):
+    match = _range_re.search(text)
+    if match:
+        return (_float(match.group(1)) + _float(match.group(2))) / 2
+    match = _number_re.search(text)
+    return _float(match.group(1)) if match else None
+
+
+def parse_age(value):
+    text = str(value or "").strip().lower()
+    number = _number_in(text)
+    if number is None:
+        return None
+    if _months_re.search(text):
+        years = _years_re.search(text)
+        if years is None:
+            return 0
+        number = _float(years.group(1))
+    age = int(number)
+    return age if 0 <= age <= MAX_AGE else None
+
+
+COPIES = {
+    "crimereport": ("v_age_years", "v_age"),
+    "archivedcrimereport": ("v_age_years", "v_age"),
+    "suspect": ("s_age_years", "s_age"),
+    "archivedsuspect": ("s_age_years", "s_age"),
+}
+
+
+def forwards(apps, schema_editor):
+    db = schema_editor.connection.alias
+    for model_name, (target, source) in COPIES.items():
+        Model = apps.get_model("api", model_name)
+        changed = []
+        for obj in Model.objects.using(db).filter(**{target: 0}).only("pk", source).iterator():
+            value = parse_age(getattr(obj, source))
+            if value != 0:
+                setattr(obj, target, value)
+                changed.append(obj)
+        Model.objects.using(db).bulk_update(changed, [target], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0032_background_tasks'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
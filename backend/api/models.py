@@ -1,5 +1,11 @@
+import uuid
+
 from django.contrib.auth.models import AbstractUser,Permission, Group
 from django.db import models
+from django.utils import timezone
+
+from .demographics import parse_age, parse_height_cm, parse_weight_kg
+from .psgc import LEVEL_CHOICES, psgc_name_property, remember_names
 
 class Personnel(AbstractUser):
     badge_number = models.CharField(max_length=6, unique=True, null=True, blank=True)
@@ -48,6 +54,9 @@ class PersonnelProfile(models.Model):
     gender = models.CharField(max_length=50, blank=True)
     height = models.CharField(max_length=50, blank=True)
     weight = models.CharField(max_length=50, blank=True)
+    # parsed copies of height / weight for the histograms, kept in sync on save
+    height_cm = models.FloatField(null=True, blank=True, editable=False, db_index=True)
+    weight_kg = models.FloatField(null=True, blank=True, editable=False, db_index=True)
     birth_date = models.DateField(null=True, blank=True)
     birth_place = models.CharField(max_length=255, blank=True)
     officer_type = models.CharField(max_length=100, blank=True)
@@ -101,9 +110,15 @@ class PersonnelProfile(models.Model):
     mother_barangay = models.CharField(max_length=100, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)   # changes feed
 
-    is_archived = models.BooleanField(default=False)  # ⬅ for archive status
+    is_archived = models.BooleanField(default=False, db_index=True)  # ⬅ for archive status (dashboard counts)
+
+    TYPED_COPIES = {"height_cm": ("height", parse_height_cm), "weight_kg": ("weight", parse_weight_kg)}
+
+    def save(self, *args, **kwargs):
+        sync_typed(self, kwargs)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.officer_id} - {self.first_name} {self.last_name}"
@@ -117,6 +132,17 @@ class Region(models.Model):
         return self.name
     
 
+class PsgcArea(models.Model):
+    """One PSGC area (region, province, city/municipality or barangay), keyed by its code."""
+    code  = models.CharField(max_length=20, primary_key=True)
+    level = models.CharField(max_length=10, choices=LEVEL_CHOICES)
+    name  = models.CharField(max_length=120)
+    kind  = models.CharField(max_length=30, blank=True, default="")   # City|Municipality for city_mun
+
+    def __str__(self):
+        return f"{self.name} ({self.code})"
+
+
  ### ###  #####crime report model##########
 
 CRIME_TYPE_CHOICES = [
@@ -134,8 +160,35 @@ def suspect_upload_to(instance, filename):
     return f"suspects/{instance.pk or 'new'}/{filename}"
 
 
-class CrimeReport(models.Model):
+def parse_coordinate(value, limit):
+    """Float for a latitude / longitude string, or None when blank, not a number or out of range."""
+    try:
+        number = float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return number if -limit <= number <= limit else None   # also drops NaN
+
+
+def sync_geo(instance, save_kwargs):
+    """save() hook: copy the text coordinates into the indexed geo_lat / geo_lng (see api/spatial.py)."""
+    instance.geo_lat = parse_coordinate(instance.latitude, 90)
+    instance.geo_lng = parse_coordinate(instance.longitude, 180)
+    update_fields = save_kwargs.get("update_fields")
+    if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+        save_kwargs["update_fields"] = set(update_fields) | {"geo_lat", "geo_lng"}
+
 
+def sync_typed(instance, save_kwargs):
+    """save() hook: parse the free-text columns in TYPED_COPIES into their numeric copies (see api/demographics.py)."""
+    update_fields = save_kwargs.get("update_fields")
+    for target, (source, parse) in instance.TYPED_COPIES.items():
+        setattr(instance, target, parse(getattr(instance, source)))
+        if update_fields is not None and source in update_fields:
+            save_kwargs["update_fields"] = update_fields = set(update_fields) | {target}
+
+
+class CrimeReportFields(models.Model):
+    """Columns shared by the hot CrimeReport table and ArchivedCrimeReport."""
 
     STATUS_CHOICES = [
         ("Ongoing", "Ongoing"),
@@ -157,44 +210,61 @@ class CrimeReport(models.Model):
     v_middle_name = models.CharField(max_length=120, blank=True, default="")
     v_last_name   = models.CharField(max_length=120, blank=True, default="")
     v_age         = models.CharField(max_length=10,  blank=True, default="")
+    v_age_years   = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)   # parsed v_age
 
     v_address            = models.CharField(max_length=255, blank=True, default="")
-    v_region             = models.CharField(max_length=120, blank=True, default="")
-    v_province           = models.CharField(max_length=120, blank=True, default="")
-    v_city_municipality  = models.CharField(max_length=120, blank=True, default="")
-    v_city_mun_kind      = models.CharField(max_length=30,  blank=True, default="")
-    v_barangay           = models.CharField(max_length=120, blank=True, default="")
     v_region_code        = models.CharField(max_length=20,  blank=True, default="")
     v_province_code      = models.CharField(max_length=20,  blank=True, default="")
     v_city_mun_code      = models.CharField(max_length=20,  blank=True, default="")
     v_barangay_code      = models.CharField(max_length=20,  blank=True, default="")
+    # names resolved from PsgcArea by code (see api/psgc.py)
+    v_region             = psgc_name_property("v_region_code")
+    v_province           = psgc_name_property("v_province_code")
+    v_city_municipality  = psgc_name_property("v_city_mun_code")
+    v_city_mun_kind      = psgc_name_property("v_city_mun_code", "kind")
+    v_barangay           = psgc_name_property("v_barangay_code")
 
     v_photo = models.ImageField(upload_to=victim_upload_to, null=True, blank=True)
 
     # Incident location (for the case)
     loc_address           = models.CharField(max_length=255, blank=True, default="")
-    loc_region            = models.CharField(max_length=120, blank=True, default="")
-    loc_province          = models.CharField(max_length=120, blank=True, default="")
-    loc_city_municipality = models.CharField(max_length=120, blank=True, default="")
-    loc_city_mun_kind     = models.CharField(max_length=30,  blank=True, default="")
-    loc_barangay          = models.CharField(max_length=120, blank=True, default="")
     loc_region_code       = models.CharField(max_length=20,  blank=True, default="")
-    loc_province_code     = models.CharField(max_length=20,  blank=True, default="")
+    loc_province_code     = models.CharField(max_length=20,  blank=True, default="", db_index=True)
     loc_city_mun_code     = models.CharField(max_length=20,  blank=True, default="")
     loc_barangay_code     = models.CharField(max_length=20,  blank=True, default="")
+    # names resolved from PsgcArea by code (see api/psgc.py)
+    loc_region            = psgc_name_property("loc_region_code")
+    loc_province          = psgc_name_property("loc_province_code")
+    loc_city_municipality = psgc_name_property("loc_city_mun_code")
+    loc_city_mun_kind     = psgc_name_property("loc_city_mun_code", "kind")
+    loc_barangay          = psgc_name_property("loc_barangay_code")
 
     latitude   = models.CharField(max_length=50, blank=True, default="")
     longitude  = models.CharField(max_length=50, blank=True, default="")
     loc_kind   = models.CharField(max_length=20,  blank=True, default="")     # marine|coastal|inland|unknown
     loc_waterbody = models.CharField(max_length=120, blank=True, default="")
+    # numeric copies of latitude/longitude for radius queries, kept in sync on save
+    geo_lat    = models.FloatField(null=True, blank=True, editable=False)
+    geo_lng    = models.FloatField(null=True, blank=True, editable=False)
 
     # Admin meta
     is_archived = models.BooleanField(default=False)
     created_at  = models.DateTimeField(auto_now_add=True)
-    updated_at  = models.DateTimeField(auto_now=True)
+    updated_at  = models.DateTimeField(auto_now=True, db_index=True)   # changes feed
+
+    PSGC_PREFIXES = ("v_", "loc_")
+    TYPED_COPIES = {"v_age_years": ("v_age", parse_age)}
 
     class Meta:
+        abstract = True
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["geo_lat", "geo_lng"], name="%(app_label)s_%(class)s_geo")]
+
+    def save(self, *args, **kwargs):
+        sync_geo(self, kwargs)
+        sync_typed(self, kwargs)
+        super().save(*args, **kwargs)
+        remember_names(self)
 
     @property
     def victim_full_name(self):
@@ -204,57 +274,276 @@ class CrimeReport(models.Model):
         return f"{self.crime_type or 'Incident'} - {self.victim_full_name or 'Unknown victim'}"
 
 
-class Suspect(models.Model):
-    """Separate CRUD: many suspects per crime report."""
-    crime_report = models.ForeignKey(CrimeReport, on_delete=models.CASCADE, related_name="suspects")
+class CrimeReport(CrimeReportFields):
+    """Active cases. Archived ones are moved to ArchivedCrimeReport (see api/archive.py)."""
+
+    class Meta(CrimeReportFields.Meta):
+        # Dashboard counts (api/dashboard.py) and the newest-first list.
+        indexes = CrimeReportFields.Meta.indexes + [
+            models.Index(fields=["status", "crime_type"], name="api_crime_status_type"),
+            models.Index(fields=["loc_region_code"], name="api_crime_loc_region"),
+            models.Index(fields=["v_region_code"], name="api_crime_v_region"),
+            models.Index(fields=["created_at"], name="api_crime_created"),
+            # age histograms (api/histograms.py)
+            models.Index(fields=["crime_type", "v_age_years"], name="api_crime_type_age"),
+            models.Index(fields=["v_province_code", "v_age_years"], name="api_crime_prov_age"),
+            models.Index(fields=["loc_province_code", "v_age_years"], name="api_crime_loc_prov_age"),
+        ]
+
+
+class SuspectFields(models.Model):
+    """Columns shared by Suspect and ArchivedSuspect (each adds its own crime_report FK)."""
 
     # Suspect identity
     s_first_name  = models.CharField(max_length=120, blank=True, default="")
     s_middle_name = models.CharField(max_length=120, blank=True, default="")
     s_last_name   = models.CharField(max_length=120, blank=True, default="")
     s_age         = models.CharField(max_length=10,  blank=True, default="")
+    s_age_years   = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)   # parsed s_age
     s_crime_type  = models.CharField(max_length=100, blank=True, default="")
 
     # Suspect address
     s_address            = models.CharField(max_length=255, blank=True, default="")
-    s_region             = models.CharField(max_length=120, blank=True, default="")
-    s_province           = models.CharField(max_length=120, blank=True, default="")
-    s_city_municipality  = models.CharField(max_length=120, blank=True, default="")
-    s_city_mun_kind      = models.CharField(max_length=30,  blank=True, default="")
-    s_barangay           = models.CharField(max_length=120, blank=True, default="")
     s_region_code        = models.CharField(max_length=20,  blank=True, default="")
     s_province_code      = models.CharField(max_length=20,  blank=True, default="")
     s_city_mun_code      = models.CharField(max_length=20,  blank=True, default="")
     s_barangay_code      = models.CharField(max_length=20,  blank=True, default="")
+    # names resolved from PsgcArea by code (see api/psgc.py)
+    s_region             = psgc_name_property("s_region_code")
+    s_province           = psgc_name_property("s_province_code")
+    s_city_municipality  = psgc_name_property("s_city_mun_code")
+    s_city_mun_kind      = psgc_name_property("s_city_mun_code", "kind")
+    s_barangay           = psgc_name_property("s_barangay_code")
 
     s_photo = models.ImageField(upload_to=suspect_upload_to, null=True, blank=True)
 
     # Crime Location (needed by your Suspect form)
     loc_address           = models.CharField(max_length=255, blank=True, default="")
-    loc_region            = models.CharField(max_length=120, blank=True, default="")
-    loc_province          = models.CharField(max_length=120, blank=True, default="")
-    loc_city_municipality = models.CharField(max_length=120, blank=True, default="")
-    loc_city_mun_kind     = models.CharField(max_length=30,  blank=True, default="")
-    loc_barangay          = models.CharField(max_length=120, blank=True, default="")
     loc_region_code       = models.CharField(max_length=20,  blank=True, default="")
     loc_province_code     = models.CharField(max_length=20,  blank=True, default="")
     loc_city_mun_code     = models.CharField(max_length=20,  blank=True, default="")
     loc_barangay_code     = models.CharField(max_length=20,  blank=True, default="")
+    # names resolved from PsgcArea by code (see api/psgc.py)
+    loc_region            = psgc_name_property("loc_region_code")
+    loc_province          = psgc_name_property("loc_province_code")
+    loc_city_municipality = psgc_name_property("loc_city_mun_code")
+    loc_city_mun_kind     = psgc_name_property("loc_city_mun_code", "kind")
+    loc_barangay          = psgc_name_property("loc_barangay_code")
 
     latitude   = models.CharField(max_length=50, blank=True, default="")
     longitude  = models.CharField(max_length=50, blank=True, default="")
     loc_kind   = models.CharField(max_length=20,  blank=True, default="")     # marine|coastal|inland|unknown
     loc_waterbody = models.CharField(max_length=120, blank=True, default="")
+    # numeric copies of latitude/longitude for radius queries, kept in sync on save
+    geo_lat    = models.FloatField(null=True, blank=True, editable=False)
+    geo_lng    = models.FloatField(null=True, blank=True, editable=False)
 
     created_at  = models.DateTimeField(auto_now_add=True)
-    updated_at  = models.DateTimeField(auto_now=True)
+    updated_at  = models.DateTimeField(auto_now=True, db_index=True)   # changes feed
+
+    PSGC_PREFIXES = ("s_", "loc_")
+    TYPED_COPIES = {"s_age_years": ("s_age", parse_age)}
 
     class Meta:
+        abstract = True
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["geo_lat", "geo_lng"], name="%(app_label)s_%(class)s_geo")]
+
+    def save(self, *args, **kwargs):
+        sync_geo(self, kwargs)
+        sync_typed(self, kwargs)
+        super().save(*args, **kwargs)
+        remember_names(self)
 
     @property
     def suspect_full_name(self):
         return " ".join(filter(None, [self.s_first_name, self.s_middle_name, self.s_last_name]))
 
     def __str__(self):
-        return f"{self.suspect_full_name or 'Suspect'} in case #{self.crime_report_id}"
\ No newline at end of file
+        return f"{self.suspect_full_name or 'Suspect'} in case #{self.crime_report_id}"
+
+
+class Suspect(SuspectFields):
+    """Separate CRUD: many suspects per crime report."""
+    crime_report = models.ForeignKey(CrimeReport, on_delete=models.CASCADE, related_name="suspects")
+
+    class Meta(SuspectFields.Meta):
+        # age histograms (api/histograms.py)
+        indexes = SuspectFields.Meta.indexes + [
+            models.Index(fields=["s_crime_type", "s_age_years"], name="api_suspect_type_age"),
+            models.Index(fields=["s_province_code", "s_age_years"], name="api_suspect_prov_age"),
+            models.Index(fields=["loc_province_code", "s_age_years"], name="api_suspect_loc_prov_age"),
+        ]
+
+
+# Archive tables: same columns, original ids and timestamps kept as-is so a
+# restore puts the case back exactly where it was.
+class ArchivedCrimeReport(CrimeReportFields):
+    id          = models.BigIntegerField(primary_key=True)
+    created_at  = models.DateTimeField()
+    updated_at  = models.DateTimeField()
+    archived_at = models.DateTimeField(db_index=True)
+
+
+class ArchivedSuspect(SuspectFields):
+    id           = models.BigIntegerField(primary_key=True)
+    crime_report = models.ForeignKey(ArchivedCrimeReport, on_delete=models.CASCADE, related_name="suspects")
+    created_at   = models.DateTimeField()
+    updated_at   = models.DateTimeField()
+    archived_at  = models.DateTimeField(db_index=True)
+
+
+class Tombstone(models.Model):
+    """Marks a deleted row so changes feeds can tell clients to drop it."""
+    model      = models.CharField(max_length=50)      # app_label.model_name
+    object_id  = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["model", "deleted_at"])]
+
+    def __str__(self):
+        return f"{self.model}#{self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class Upload(models.Model):
+    """A resumable chunked upload in progress (see api/uploads.py)."""
+    id        = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename  = models.CharField(max_length=255)
+    size      = models.PositiveBigIntegerField()
+    sha256    = models.CharField(max_length=64)
+    received  = models.PositiveBigIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+
+class ImageHash(models.Model):
+    """Perceptual hash (dHash) of a stored photo, for duplicate detection (see api/imagehash.py)."""
+    KIND_CHOICES = [
+        ("suspect", "Suspect photo"),
+        ("victim", "Victim photo"),
+        ("profile", "Personnel profile image"),
+    ]
+
+    kind       = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id  = models.BigIntegerField()
+    dhash      = models.BigIntegerField(db_index=True)    # 64 bits, stored signed
+    file_name  = models.CharField(max_length=255)         # hashed file, to skip unchanged photos
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="unique_image_hash_per_photo"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}#{self.object_id} {self.dhash & (2**64 - 1):016x}"
+
+
+class GeocodeCache(models.Model):
+    """External geocoder answers, misses included, so an address is only looked up once (see api/geocoding.py)."""
+    key        = models.CharField(max_length=40, unique=True)   # sha1 of the normalized query
+    query      = models.CharField(max_length=500)
+    latitude   = models.FloatField(null=True, blank=True)       # null = geocoder found nothing
+    longitude  = models.FloatField(null=True, blank=True)
+    source     = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+    used_at    = models.DateTimeField(db_index=True)             # least recently used rows are pruned first
+
+    def __str__(self):
+        return self.query
+
+
+class ReportBlockKey(models.Model):
+    """A blocking key a crime report is filed under, for duplicate detection (see api/dedup.py)."""
+    key    = models.CharField(max_length=40, db_index=True)   # sha1 of the readable key
+    report = models.ForeignKey(CrimeReport, on_delete=models.CASCADE, related_name="block_keys")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["report", "key"], name="unique_block_key_per_report"),
+        ]
+
+    def __str__(self):
+        return f"{self.key[:12]} -> report #{self.report_id}"
+
+
+class Person(models.Model):
+    """One real individual behind one or more Suspect records (see api/persons.py)."""
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Person #{self.pk}"
+
+
+class PersonLink(models.Model):
+    """Which person a suspect record is; one link per suspect."""
+    suspect = models.OneToOneField(Suspect, on_delete=models.CASCADE, related_name="person_link")
+    person  = models.ForeignKey(Person, on_delete=models.CASCADE, related_name="links")
+    score   = models.FloatField(default=1.0)   # best match that linked it; 1.0 = founded the person
+
+    def __str__(self):
+        return f"suspect #{self.suspect_id} -> person #{self.person_id}"
+
+
+class SuspectBlockKey(models.Model):
+    """A blocking key a suspect is filed under for person matching (see api/persons.py)."""
+    key     = models.CharField(max_length=24, db_index=True)
+    suspect = models.ForeignKey(Suspect, on_delete=models.CASCADE, related_name="block_keys")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["suspect", "key"], name="unique_block_key_per_suspect"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} -> suspect #{self.suspect_id}"
+
+
+class IdempotencyKey(models.Model):
+    """A batch item already applied, so a retried submission is answered instead of applied twice (see api/batch.py)."""
+    key          = models.CharField(max_length=100, unique=True)   # chosen by the client device
+    request_hash = models.CharField(max_length=64)                 # sha256 of the item without its key
+    op           = models.CharField(max_length=10)
+    resource     = models.CharField(max_length=20)
+    object_id    = models.BigIntegerField()
+    status       = models.PositiveSmallIntegerField()
+    created_at   = models.DateTimeField(auto_now_add=True, db_index=True)   # pruned after IDEMPOTENCY_KEY_DAYS
+
+    def __str__(self):
+        return f"{self.key} -> {self.resource}#{self.object_id}"
+
+
+class Task(models.Model):
+    """A background job, run by `manage.py run_tasks` (see api/tasks.py)."""
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("succeeded", "Succeeded"),
+        ("failed", "Failed"),
+    ]
+
+    name         = models.CharField(max_length=100)                 # key in tasks.registry
+    args         = models.JSONField(default=dict, blank=True)       # keyword arguments
+    status       = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    attempts     = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    timeout      = models.PositiveIntegerField(default=600)         # seconds per attempt
+    run_after    = models.DateTimeField(default=timezone.now)       # pushed back between retries
+    locked_by    = models.CharField(max_length=100, blank=True, default="")   # worker running it
+    locked_until = models.DateTimeField(null=True, blank=True)      # past this, the worker is presumed dead
+    result       = models.JSONField(null=True, blank=True)
+    error        = models.TextField(blank=True, default="")         # last failure
+    created_at   = models.DateTimeField(auto_now_add=True)
+    started_at   = models.DateTimeField(null=True, blank=True)
+    finished_at  = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_after"], name="api_task_due")]
+
+    def __str__(self):
+        return f"{self.name}#{self.pk} ({self.status})"
@@ -0,0 +1,17 @@
+from rest_framework import permissions
+
+
+def is_admin_user(user):
+    """Admin accounts are flagged either by our `is_admin` or Django's `is_staff`."""
+    return bool(
+        user
+        and user.is_authenticated
+        and (getattr(user, "is_admin", False) or user.is_staff)
+    )
+
+
+class IsAdminPersonnel(permissions.BasePermission):
+    message = "Only admin accounts can access this."
+
+    def has_permission(self, request, view):
+        return is_admin_user(request.user)
@@ -0,0 +1,303 @@
+"""
+Suspect entity resolution: which Suspect rows are the same person.
+
+Suspects are recorded per report, so a repeat offender shows up as
+unrelated rows across cases, often spelled differently each time. Every
+suspect is linked to a Person (PersonLink, one per suspect); suspects that
+match share one.
+
+Matching is blocked on keys kept in SuspectBlockKey:
+
+    n:<phonetic last>|<phonetic first>   sorted, so swapped names block together
+    g:<last-name trigram>|<first initial>   catches misspellings the phonetic key misses
+
+Only suspects sharing a key are scored (name similarity, age proximity,
+same barangay / city), skipping keys shared by more than PERSONS_MAX_BLOCK
+suspects. A person never covers two suspects of the same report. A
+suspect scoring at least PERSONS_MIN_SCORE against members of several
+persons merges them.
+
+Resolution is incremental: resolve() runs when a suspect is saved
+(post_save, and explicitly after the bulk inserts in intake / restore).
+Edits can merge persons but never split them; `manage.py resolve_suspects
+--rebuild` reclusters everything from scratch. Archiving a case drops its
+suspects' links; restoring it resolves them again.
+
+    GET /api/persons/<id>/            the person's suspect records and cases
+    GET /api/suspects/<id>/person/    the same, for the person behind a suspect
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+
+from .matching import name_similarity, normalize, phonetic
+
+FIELDS = [
+    "id", "crime_report_id", "s_first_name", "s_last_name", "s_age_years",
+    "s_barangay_code", "s_city_mun_code",
+]
+# saving a suspect without touching these leaves its person as is
+MATCH_FIELDS = {"s_first_name", "s_last_name", "s_age", "s_barangay_code", "s_city_mun_code"}
+
+WEIGHTS = {"name": 0.6, "age": 0.2, "place": 0.2}
+
+
+def min_score():
+    return getattr(settings, "PERSONS_MIN_SCORE", 0.8)
+
+
+def max_block():
+    return getattr(settings, "PERSONS_MAX_BLOCK", 100)
+
+
+def row_for(suspect):
+    return {field: getattr(suspect, field) for field in FIELDS}
+
+
+def block_keys(row):
+    """Blocking keys of a suspect row (see the module docstring)."""
+    first, last = phonetic(row["s_first_name"]), phonetic(row["s_last_name"])
+    keys = set()
+    if first and last:
+        keys.add("n:" + "|".join(sorted([last, first])))
+    surname = normalize(row["s_last_name"]).replace(" ", "")
+    if first and len(surname) >= 3:
+        keys.update(f"g:{surname[i:i + 3]}|{first[0]}" for i in range(len(surname) - 2))
+    return keys
+
+
+def score(a, b):
+    """(similarity 0..1, per-part scores) of two suspect rows. Unknown ages count half."""
+    parts = {
+        "name": name_similarity(a["s_first_name"], a["s_last_name"], b["s_first_name"], b["s_last_name"]),
+        "age": 0.5,
+        "place": 0.0,
+    }
+    if a["s_age_years"] is not None and b["s_age_years"] is not None:
+        years = abs(a["s_age_years"] - b["s_age_years"])
+        parts["age"] = 1.0 if years <= 2 else 0.5 if years <= 5 else 0.0
+    if a["s_barangay_code"] and a["s_barangay_code"] == b["s_barangay_code"]:
+        parts["place"] = 1.0
+    elif a["s_city_mun_code"] and a["s_city_mun_code"] == b["s_city_mun_code"]:
+        parts["place"] = 0.5
+    total = sum(WEIGHTS[part] * value for part, value in parts.items())
+    return round(total, 3), {part: round(value, 3) for part, value in parts.items()}
+
+
+# -----------------------------
+# Incremental
+# -----------------------------
+def index_suspect(suspect, row):
+    from .models import SuspectBlockKey
+
+    wanted = block_keys(row)
+    current = set(SuspectBlockKey.objects.filter(suspect_id=suspect.pk).values_list("key", flat=True))
+    if wanted != current:
+        SuspectBlockKey.objects.filter(suspect_id=suspect.pk, key__in=current - wanted).delete()
+        SuspectBlockKey.objects.bulk_create(
+            [SuspectBlockKey(suspect_id=suspect.pk, key=key) for key in wanted - current],
+            ignore_conflicts=True,
+        )
+    return wanted
+
+
+def matches(row, keys, threshold=None):
+    """{person id: best score} of the persons `row` matches and can join together."""
+    from .models import PersonLink, Suspect, SuspectBlockKey
+
+    if not keys:
+        return {}
+    limit = max_block()
+    usable = (
+        SuspectBlockKey.objects.filter(key__in=keys).order_by()
+        .values("key").annotate(n=Count("pk")).filter(n__lte=limit + 1)   # +1: the suspect itself
+        .values_list("key", flat=True)
+    )
+    ids = SuspectBlockKey.objects.filter(key__in=list(usable)).exclude(suspect_id=row["id"]).values("suspect_id")
+    others = (
+        Suspect.objects.filter(pk__in=ids).exclude(crime_report_id=row["crime_report_id"])
+        .values(*FIELDS, person_id=F("person_link__person_id"))
+    )
+    threshold = min_score() if threshold is None else threshold
+    found = {}
+    for other in others:
+        similarity, _ = score(row, other)
+        if similarity >= threshold and other["person_id"] is not None:
+            found[other["person_id"]] = max(similarity, found.get(other["person_id"], 0.0))
+    if not found:
+        return found
+
+    # Best first, keep the persons that can be joined without one person
+    # appearing twice in a report (this one included).
+    reports = {}
+    links = PersonLink.objects.filter(person_id__in=found).exclude(suspect_id=row["id"])
+    for person_id, report_id in links.values_list("person_id", "suspect__crime_report_id"):
+        reports.setdefault(person_id, set()).add(report_id)
+    taken = {row["crime_report_id"]}
+    kept = {}
+    for person_id, similarity in sorted(found.items(), key=lambda item: (-item[1], item[0])):
+        if not reports.get(person_id, set()) & taken:
+            kept[person_id] = similarity
+            taken |= reports.get(person_id, set())
+    return kept
+
+
+@transaction.atomic
+def resolve(suspect):
+    """Link the suspect to the person it matches, merging persons it bridges, or to a new one."""
+    from .models import Person, PersonLink
+
+    row = row_for(suspect)
+    found = matches(row, index_suspect(suspect, row))
+    link = PersonLink.objects.filter(suspect_id=suspect.pk).first()
+    old = link.person_id if link else None
+
+    if found:
+        person_id = min(found)   # the oldest person absorbs the others
+        merged = set(found) - {person_id}
+        if merged:
+            PersonLink.objects.filter(person_id__in=merged).update(person_id=person_id)
+            Person.objects.filter(pk__in=merged).delete()
+        similarity = max(found.values())
+    else:
+        alone = old is not None and not PersonLink.objects.filter(person_id=old).exclude(suspect_id=suspect.pk).exists()
+        person_id = old if alone else Person.objects.create().pk
+        similarity = 1.0
+
+    PersonLink.objects.update_or_create(suspect_id=suspect.pk, defaults={"person_id": person_id, "score": similarity})
+    if old is not None and old != person_id and not PersonLink.objects.filter(person_id=old).exists():
+        Person.objects.filter(pk=old).delete()
+    return person_id
+
+
+def forget(person_id):
+    """Drop a person whose last suspect was deleted or archived."""
+    from .models import Person
+
+    Person.objects.filter(pk=person_id, links__isnull=True).delete()
+
+
+# -----------------------------
+# Batch
+# -----------------------------
+def cluster(rows, threshold=None, limit=None):
+    """
+    Group suspect rows into persons in one pass: rows are bucketed by
+    blocking key, pairs within a bucket are scored, and matching pairs are
+    joined (union-find). Returns [{suspect id: score}], one dict per person;
+    the score is the suspect's best match (1.0 when it stands alone).
+    """
+    threshold = min_score() if threshold is None else threshold
+    limit = max_block() if limit is None else limit
+    by_id = {}
+    blocks = {}
+    for row in rows:
+        by_id[row["id"]] = row
+        for key in block_keys(row):
+            blocks.setdefault(key, []).append(row["id"])
+
+    parent = {pk: pk for pk in by_id}
+    reports = {pk: {row["crime_report_id"]} for pk, row in by_id.items()}   # per root
+    best = {}
+
+    def root(pk):
+        while parent[pk] != pk:
+            parent[pk] = parent[parent[pk]]
+            pk = parent[pk]
+        return pk
+
+    seen = set()
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > limit:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                pair = (a, b) if a < b else (b, a)
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                root_a, root_b = root(a), root(b)
+                # already one person, or joining would put one person twice in a report
+                if root_a == root_b or reports[root_a] & reports[root_b]:
+                    continue
+                similarity, _ = score(by_id[a], by_id[b])
+                if similarity >= threshold:
+                    for pk in pair:
+                        best[pk] = max(similarity, best.get(pk, 0.0))
+                    parent[root_a] = root_b
+                    reports[root_b] |= reports.pop(root_a)
+
+    groups = {}
+    for pk in by_id:
+        groups.setdefault(root(pk), {})[pk] = best.get(pk, 1.0)
+    return sorted(groups.values(), key=min)
+
+
+def store(groups, keys, Person, PersonLink, SuspectBlockKey, using="default"):
+    """Replace every person, link and blocking key with `cluster()` output (models passed in for migrations)."""
+    PersonLink.objects.using(using).all().delete()
+    Person.objects.using(using).all().delete()
+    SuspectBlockKey.objects.using(using).all().delete()
+    persons = Person.objects.using(using).bulk_create([Person() for _ in groups], batch_size=500)
+    PersonLink.objects.using(using).bulk_create(
+        [
+            PersonLink(person_id=person.pk, suspect_id=suspect_id, score=similarity)
+            for person, group in zip(persons, groups)
+            for suspect_id, similarity in group.items()
+        ],
+        batch_size=500,
+    )
+    SuspectBlockKey.objects.using(using).bulk_create(
+        [SuspectBlockKey(suspect_id=suspect_id, key=key) for suspect_id, suspect_keys in keys.items() for key in suspect_keys],
+        batch_size=500,
+    )
+
+
+def rebuild(Suspect, Person, PersonLink, SuspectBlockKey, using="default"):
+    rows = list(Suspect.objects.using(using).order_by().values(*FIELDS).iterator())
+    groups = cluster(rows)
+    store(groups, {row["id"]: block_keys(row) for row in rows}, Person, PersonLink, SuspectBlockKey, using)
+    return len(rows), len(groups)
+
+
+# -----------------------------
+# Read side
+# -----------------------------
+def person_detail(person_id):
+    """The person's suspect records and the active cases they appear in, newest first."""
+    from .models import CrimeReport, PersonLink
+    from .psgc import areas
+
+    links = (
+        PersonLink.objects.filter(person_id=person_id).select_related("suspect")
+        .order_by("-suspect__created_at")
+    )
+    suspects = []
+    for link in links:
+        s = link.suspect
+        suspects.append({
+            "id": s.id,
+            "crime_report": s.crime_report_id,
+            "name": s.suspect_full_name,
+            "age": s.s_age,
+            "barangay": areas.name(s.s_barangay_code),
+            "city_municipality": areas.name(s.s_city_mun_code),
+            "score": link.score,
+        })
+    report_ids = {s["crime_report"] for s in suspects}
+    cases = []
+    for report in CrimeReport.objects.filter(pk__in=report_ids).order_by("-happened_at", "-created_at").values(
+        "id", "crime_type", "status", "happened_at", "v_first_name", "v_last_name",
+        "loc_barangay_code", "loc_city_mun_code",
+    ):
+        cases.append({
+            "id": report["id"],
+            "crime_type": report["crime_type"],
+            "status": report["status"],
+            "happened_at": report["happened_at"].isoformat() if report["happened_at"] else None,
+            "victim": " ".join(filter(None, [report["v_first_name"], report["v_last_name"]])),
+            "barangay": areas.name(report["loc_barangay_code"]),
+            "city_municipality": areas.name(report["loc_city_mun_code"]),
+        })
+    return {"id": person_id, "suspects": suspects, "cases": cases}
@@ -0,0 +1,135 @@
+"""
+On-demand request profiles.
+
+Admins can ask for a single request to be run under cProfile (see
+ProfilingMiddleware). The raw profile and a JSON summary (top functions and
+SQL timings) are written to PROFILE_DIR, which is kept as a ring buffer of
+the newest PROFILE_MAX_ENTRIES profiles.
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+PROFILE_ID_RE = re.compile(r"^\d{13}-[0-9a-f]{8}$")
+
+_lock = threading.Lock()
+
+
+def profile_dir():
+    path = Path(getattr(settings, "PROFILE_DIR", settings.BASE_DIR / "profiles"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def max_entries():
+    return getattr(settings, "PROFILE_MAX_ENTRIES", 20)
+
+
+def _paths(profile_id):
+    if not PROFILE_ID_RE.match(profile_id or ""):
+        return None, None
+    base = profile_dir()
+    return base / f"{profile_id}.json", base / f"{profile_id}.prof"
+
+
+def top_functions(profiler, limit=25):
+    import pstats
+
+    stats = pstats.Stats(profiler).sort_stats("cumulative")
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        cc, nc, tt, ct, _callers = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            "function": f"{filename}:{line}({name})",
+            "calls": nc,
+            "primitive_calls": cc,
+            "total_ms": round(tt * 1000, 3),
+            "cumulative_ms": round(ct * 1000, 3),
+        })
+    return rows
+
+
+def sql_summary(recorder, limit=25):
+    """Totals plus statements grouped by SQL text (repeated groups = N+1 suspects)."""
+    grouped = defaultdict(lambda: {"count": 0, "total_ms": 0.0})
+    for seconds, alias, sql in recorder.statements:
+        entry = grouped[(alias, sql)]
+        entry["count"] += 1
+        entry["total_ms"] += seconds * 1000
+    statements = [
+        {"database": alias, "sql": sql, "count": v["count"], "total_ms": round(v["total_ms"], 3)}
+        for (alias, sql), v in grouped.items()
+    ]
+    statements.sort(key=lambda s: s["total_ms"], reverse=True)
+    return {
+        "query_count": recorder.count,
+        "query_ms": round(recorder.seconds * 1000, 3),
+        "captured": len(recorder.statements),
+        "statements": statements[:limit],
+    }
+
+
+def save_profile(request, response, profiler, recorder, duration):
+    profile_id = f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}"
+    summary_path, prof_path = _paths(profile_id)
+    user = getattr(request, "_profile_user", None)
+    summary = {
+        "id": profile_id,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "method": request.method,
+        "path": request.get_full_path(),
+        "status": response.status_code,
+        "user": user.get_username() if user else "",
+        "duration_ms": round(duration * 1000, 3),
+        "sql": sql_summary(recorder),
+        "functions": top_functions(profiler),
+    }
+    with _lock:
+        profiler.dump_stats(str(prof_path))
+        summary_path.write_text(json.dumps(summary, indent=2))
+        _evict()
+    return profile_id
+
+
+def _evict():
+    summaries = sorted(profile_dir().glob("*.json"))
+    for old in summaries[: max(0, len(summaries) - max_entries())]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def list_profiles():
+    """Newest first, without the bulky function/SQL detail."""
+    items = []
+    for path in sorted(profile_dir().glob("*.json"), reverse=True):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue   # evicted or half-written by another worker
+        items.append({
+            key: data.get(key)
+            for key in ("id", "created_at", "method", "path", "status", "user", "duration_ms")
+        } | {"query_count": data.get("sql", {}).get("query_count")})
+    return items
+
+
+def load_summary(profile_id):
+    summary_path, _ = _paths(profile_id)
+    if summary_path is None or not summary_path.exists():
+        return None
+    return json.loads(summary_path.read_text())
+
+
+def profile_file(profile_id):
+    _, prof_path = _paths(profile_id)
+    if prof_path is None or not prof_path.exists():
+        return None
+    return prof_path
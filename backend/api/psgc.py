@@ -0,0 +1,162 @@
+"""
+PSGC (Philippine Standard Geographic Code) address helpers.
+
+Crime reports and suspects only store the PSGC *codes* of an address
+(region / province / city-municipality / barangay). Names live once in the
+PsgcArea table and are resolved through a per-process cache, so list
+endpoints never join or compare strings.
+
+`psgc_name_property()` keeps the old `v_region`, `loc_province`, ... names
+readable *and* writable on the models, which is what keeps the API format
+unchanged: assigning a name stashes it on the instance and `remember_names()`
+upserts it into PsgcArea when the row is saved.
+
+Names that were stored without a code before the move are kept under a
+synthetic `name:...` code (see migration 0014); it resolves like any other.
+"""
+
+import threading
+import time
+
+from django.apps import apps
+
+REGION, PROVINCE, CITY_MUN, BARANGAY = "region", "province", "city_mun", "barangay"
+
+LEVEL_CHOICES = [
+    (REGION, "Region"),
+    (PROVINCE, "Province"),
+    (CITY_MUN, "City / Municipality"),
+    (BARANGAY, "Barangay"),
+]
+
+# (level, old name column suffix, code column suffix) for one address block.
+ADDRESS_PARTS = [
+    (REGION, "region", "region_code"),
+    (PROVINCE, "province", "province_code"),
+    (CITY_MUN, "city_municipality", "city_mun_code"),
+    (BARANGAY, "barangay", "barangay_code"),
+]
+
+CACHE_SECONDS = 300
+
+
+class AreaCache:
+    """
+    code -> (name, kind) for every PsgcArea row, loaded lazily and reloaded
+    every CACHE_SECONDS so names added by other workers show up. Unknown
+    codes are remembered as misses until the next reload.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._areas = None
+        self._loaded_at = 0.0
+
+    def _model(self):
+        return apps.get_model("api", "PsgcArea")
+
+    def _table(self):
+        areas = self._areas
+        if areas is None or time.monotonic() - self._loaded_at > CACHE_SECONDS:
+            with self._lock:
+                if self._areas is None or time.monotonic() - self._loaded_at > CACHE_SECONDS:
+                    self._areas = {
+                        code: (name, kind)
+                        for code, name, kind in self._model().objects.values_list("code", "name", "kind")
+                    }
+                    self._loaded_at = time.monotonic()
+                areas = self._areas
+        return areas
+
+    def get(self, code):
+        if not code:
+            return None
+        areas = self._table()
+        if code not in areas:
+            areas[code] = self._model().objects.filter(code=code).values_list("name", "kind").first()
+        return areas[code]
+
+    def name(self, code):
+        hit = self.get(code)
+        return hit[0] if hit else ""
+
+    def kind(self, code):
+        hit = self.get(code)
+        return hit[1] if hit else ""
+
+    def update(self, rows):
+        areas = self._table()
+        for code, name, kind in rows:
+            areas[code] = (name, kind)
+
+    def clear(self):
+        with self._lock:
+            self._areas = None
+
+
+areas = AreaCache()
+
+
+# -----------------------------
+# Model side
+# -----------------------------
+def psgc_name_property(code_field, attr="name"):
+    """
+    Model property standing in for a dropped name column. Reads resolve
+    `code_field` through the cache; writes are kept on the instance until
+    save (see remember_names).
+    """
+
+    def fget(self):
+        pending = self.__dict__.get("_psgc_pending", {}).get(code_field, {})
+        if attr in pending:
+            return pending[attr]
+        return getattr(areas, attr)(getattr(self, code_field))
+
+    def fset(self, value):
+        pending = self.__dict__.setdefault("_psgc_pending", {})
+        pending.setdefault(code_field, {})[attr] = (value or "").strip()
+
+    return property(fget, fset)
+
+
+def name_fields(model):
+    """{property name: (code field, "name" | "kind")} for a model's psgc_name_property()s."""
+    fields = {}
+    for prefix in getattr(model, "PSGC_PREFIXES", ()):
+        for _, name_suffix, code_suffix in ADDRESS_PARTS:
+            fields[f"{prefix}{name_suffix}"] = (f"{prefix}{code_suffix}", "name")
+        fields[f"{prefix}city_mun_kind"] = (f"{prefix}city_mun_code", "kind")
+    return fields
+
+
+def remember_names(instance):
+    """Upsert names assigned through psgc_name_property() for the instance's codes."""
+    pending = instance.__dict__.pop("_psgc_pending", None)
+    if not pending:
+        return
+    levels = {
+        f"{prefix}{code_suffix}": level
+        for prefix in instance.PSGC_PREFIXES
+        for level, _, code_suffix in ADDRESS_PARTS
+    }
+    PsgcArea = apps.get_model("api", "PsgcArea")
+    rows = {}
+    for code_field, values in pending.items():
+        code = (getattr(instance, code_field) or "").strip()
+        if not code:
+            continue   # a name without a code can't be normalized
+        current = areas.get(code) or ("", "")
+        name = values.get("name") or current[0]
+        kind = values.get("kind", current[1])
+        if not name or (name, kind) == current:
+            continue
+        rows[code] = PsgcArea(code=code, level=levels[code_field], name=name, kind=kind)
+    if rows:
+        PsgcArea.objects.bulk_create(
+            rows.values(),
+            update_conflicts=True,
+            unique_fields=["code"],
+            update_fields=["name", "kind"],
+        )
+        areas.update((a.code, a.name, a.kind) for a in rows.values())
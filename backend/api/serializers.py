@@ -1,21 +1,99 @@
+import json
+
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from . import intake, uploads
 from .models import (
     Personnel,
     PersonnelProfile,
     Region,
     CrimeReport,
     Suspect,
+    ArchivedCrimeReport,
+    ArchivedSuspect,
+    Upload,
 )
 
+
+# -----------------------------
+# Chunked uploads
+# -----------------------------
+class UploadSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source="received", read_only=True)
+
+    class Meta:
+        model = Upload
+        fields = ["id", "filename", "size", "sha256", "offset", "completed"]
+        read_only_fields = ["id", "completed"]
+
+    def validate_size(self, value):
+        if value <= 0 or value > uploads.max_upload_bytes():
+            raise serializers.ValidationError(f"Size must be between 1 and {uploads.max_upload_bytes()} bytes.")
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if len(value) != 64 or any(c not in "0123456789abcdef" for c in value):
+            raise serializers.ValidationError("Expected a hex SHA-256 digest.")
+        return value
+
+
+class UploadIdField(serializers.UUIDField):
+    """Id of a completed chunked upload; validates to the Upload row."""
+
+    def to_internal_value(self, data):
+        pk = super().to_internal_value(data)
+        upload = Upload.objects.filter(pk=pk, completed=True).first()
+        if upload is None:
+            raise serializers.ValidationError("Unknown or incomplete upload.")
+        return upload
+
+
+class UploadReferenceMixin:
+    """
+    Lets `<image>_upload` fields name a completed chunked upload that is
+    stored into the `<image>` ImageField, as if the file had been posted.
+    """
+    upload_fields = {}   # upload id field -> image field
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        # kept across calls: a many=True child validates every item on one instance
+        self._used_uploads = getattr(self, "_used_uploads", [])
+        for upload_field, image_field in self.upload_fields.items():
+            upload = attrs.pop(upload_field, None)
+            if upload is None:
+                continue
+            try:
+                uploads.verify_image(upload)
+            except uploads.UploadError as exc:
+                raise serializers.ValidationError({upload_field: str(exc)})
+            attrs[image_field] = uploads.open_file(upload)
+            self._used_uploads.append((upload, attrs[image_field]))
+        return attrs
+
+    def save(self, **kwargs):
+        used = getattr(self, "_used_uploads", [])
+        try:
+            instance = super().save(**kwargs)
+        finally:
+            for _, fh in used:
+                fh.close()
+        for upload, _ in used:
+            uploads.discard(upload)
+        return instance
+
 # -----------------------------
 # Auth / Users
 # -----------------------------
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(UploadReferenceMixin, serializers.ModelSerializer):
+    id_image_upload = UploadIdField(write_only=True, required=False)
+    upload_fields = {"id_image_upload": "id_image"}
+
     class Meta:
         model = Personnel
-        fields = ["username", "email", "password", "badge_number", "id_image"]
+        fields = ["username", "email", "password", "badge_number", "id_image", "id_image_upload"]
         extra_kwargs = {"password": {"write_only": True}}
 
     def validate_username(self, value):
@@ -72,7 +150,11 @@ class AdminTokenObtainPairSerializer(TokenObtainPairSerializer):
 # -----------------------------
 # Profiles / Reference
 # -----------------------------
-class PersonnelProfileSerializer(serializers.ModelSerializer):
+class PersonnelProfileSerializer(UploadReferenceMixin, serializers.ModelSerializer):
+    id_image_upload = UploadIdField(write_only=True, required=False)
+    profile_image_upload = UploadIdField(write_only=True, required=False)
+    upload_fields = {"id_image_upload": "id_image", "profile_image_upload": "profile_image"}
+
     class Meta:
         model = PersonnelProfile
         fields = "__all__"
@@ -95,6 +177,14 @@ class RegionSerializer(serializers.ModelSerializer):
 # -----------------------------
 # Crime Report (Victim-kept)
 # -----------------------------
+def psgc_name_field(max_length=120):
+    """
+    Address names are model properties backed by PsgcArea (see api/psgc.py),
+    so they have to be declared explicitly to stay readable and writable.
+    """
+    return serializers.CharField(required=False, allow_blank=True, max_length=max_length)
+
+
 class CrimeReportMiniSerializer(serializers.ModelSerializer):
     victim_full_name = serializers.CharField(read_only=True)
 
@@ -103,8 +193,21 @@ class CrimeReportMiniSerializer(serializers.ModelSerializer):
         fields = ["id", "crime_type", "happened_at", "victim_full_name"]
 
 
-class CrimeReportSerializer(serializers.ModelSerializer):
+class CrimeReportSerializer(UploadReferenceMixin, serializers.ModelSerializer):
     v_photo_url = serializers.SerializerMethodField()
+    v_photo_upload = UploadIdField(write_only=True, required=False)
+    upload_fields = {"v_photo_upload": "v_photo"}
+    # PSGC names (stored as codes only)
+    v_region              = psgc_name_field()
+    v_province            = psgc_name_field()
+    v_city_municipality   = psgc_name_field()
+    v_city_mun_kind       = psgc_name_field(max_length=30)
+    v_barangay            = psgc_name_field()
+    loc_region            = psgc_name_field()
+    loc_province          = psgc_name_field()
+    loc_city_municipality = psgc_name_field()
+    loc_city_mun_kind     = psgc_name_field(max_length=30)
+    loc_barangay          = psgc_name_field()
     # Optional: summary of suspects (read-only)
     suspects = serializers.SerializerMethodField()
 
@@ -145,8 +248,21 @@ class CrimeReportSerializer(serializers.ModelSerializer):
 # -----------------------------
 # Suspects (separate CRUD)
 # -----------------------------
-class SuspectSerializer(serializers.ModelSerializer):
+class SuspectSerializer(UploadReferenceMixin, serializers.ModelSerializer):
     s_photo_url = serializers.SerializerMethodField(read_only=True)
+    s_photo_upload = UploadIdField(write_only=True, required=False)
+    upload_fields = {"s_photo_upload": "s_photo"}
+    # PSGC names (stored as codes only)
+    s_region              = psgc_name_field()
+    s_province            = psgc_name_field()
+    s_city_municipality   = psgc_name_field()
+    s_city_mun_kind       = psgc_name_field(max_length=30)
+    s_barangay            = psgc_name_field()
+    loc_region            = psgc_name_field()
+    loc_province          = psgc_name_field()
+    loc_city_municipality = psgc_name_field()
+    loc_city_mun_kind     = psgc_name_field(max_length=30)
+    loc_barangay          = psgc_name_field()
 
     class Meta:
         model = Suspect
@@ -173,6 +289,7 @@ class SuspectSerializer(serializers.ModelSerializer):
             # photo
             "s_photo",
             "s_photo_url",
+            "s_photo_upload",
             # crime location for suspect form
             "loc_address",
             "loc_region",
@@ -203,3 +320,78 @@ class SuspectSerializer(serializers.ModelSerializer):
                 else obj.s_photo.url
             )
         return ""
+
+
+# -----------------------------
+# Archive (read-only, same shape as the active rows)
+# -----------------------------
+class ArchivedCrimeReportSerializer(CrimeReportSerializer):
+    class Meta(CrimeReportSerializer.Meta):
+        model = ArchivedCrimeReport
+        read_only_fields = CrimeReportSerializer.Meta.read_only_fields + ["archived_at"]
+
+
+class ArchivedSuspectSerializer(SuspectSerializer):
+    class Meta(SuspectSerializer.Meta):
+        model = ArchivedSuspect
+        fields = SuspectSerializer.Meta.fields + ["archived_at"]
+        read_only_fields = SuspectSerializer.Meta.read_only_fields + ["archived_at"]
+
+
+# -----------------------------
+# Case intake (report + suspects in one request)
+# -----------------------------
+class IntakeSuspectSerializer(SuspectSerializer):
+    """A suspect posted together with its report; the report is created first."""
+    class Meta(SuspectSerializer.Meta):
+        read_only_fields = SuspectSerializer.Meta.read_only_fields + ["crime_report"]
+
+
+class CaseIntakeSerializer(serializers.Serializer):
+    """
+    JSON:      {"report": {...}, "suspects": [{...}, ...]}  (photos as *_upload ids)
+    multipart: `report` and `suspects` as JSON strings, files as `v_photo`
+               and `s_photo_<index>`
+    """
+    report = CrimeReportSerializer()
+    suspects = IntakeSuspectSerializer(many=True, required=False, max_length=intake.MAX_SUSPECTS)
+
+    def to_internal_value(self, data):
+        if hasattr(data, "getlist"):   # QueryDict from a form / multipart body
+            data = self.unpack_form(data)
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def unpack_form(data):
+        try:
+            report = json.loads(data.get("report") or "{}")
+            suspects = json.loads(data.get("suspects") or "[]")
+        except ValueError:
+            raise serializers.ValidationError({"detail": "`report` and `suspects` must be JSON."})
+        if not isinstance(report, dict) or not isinstance(suspects, list):
+            raise serializers.ValidationError({"detail": "`report` must be an object and `suspects` a list."})
+        if data.get("v_photo"):
+            report["v_photo"] = data["v_photo"]
+        for i, suspect in enumerate(suspects):
+            if isinstance(suspect, dict) and data.get(f"s_photo_{i}"):
+                suspect["s_photo"] = data[f"s_photo_{i}"]
+        return {"report": report, "suspects": suspects}
+
+    def used_uploads(self):
+        return (getattr(self.fields["report"], "_used_uploads", [])
+                + getattr(self.fields["suspects"].child, "_used_uploads", []))
+
+    def create(self, validated_data):
+        report, suspects = intake.create_case(validated_data["report"], validated_data.get("suspects", []))
+        return {"report": report, "suspects": suspects}
+
+    def save(self, **kwargs):
+        used = self.used_uploads()
+        try:
+            instance = super().save(**kwargs)
+        finally:
+            for _, fh in used:
+                fh.close()
+        for upload, _ in used:
+            uploads.discard(upload)
+        return instance
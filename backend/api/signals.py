@@ -0,0 +1,175 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import dedup, events, imagehash, persons, typeahead
+from .models import CrimeReport, PersonLink, PersonnelProfile, Suspect
+
+# This module is loaded from ApiConfig.ready() on every start, so it only
+# imports light modules at the top. `archive` and `sync` pull in DRF and are
+# imported inside the handlers instead (`heatmap` for NumPy / Pillow).
+
+
+def _moving():
+    from .archive import moving
+
+    return moving()
+
+
+@receiver(post_delete, sender=CrimeReport)
+@receiver(post_delete, sender=Suspect)
+@receiver(post_delete, sender=PersonnelProfile)
+def leave_tombstone(sender, instance, **kwargs):
+    if _moving():
+        return
+    from .sync import record_deletion
+
+    record_deletion(instance)
+
+
+# -----------------------------
+# Live dashboard events
+# -----------------------------
+@receiver(post_save, sender=CrimeReport)
+def crime_saved(sender, instance, created, **kwargs):
+    event = events.crime_event(instance, created=created)
+    transaction.on_commit(lambda: events.publish(event))
+
+
+@receiver(post_delete, sender=CrimeReport)
+def crime_deleted(sender, instance, **kwargs):
+    if _moving():
+        return
+    event = events.crime_event(instance, deleted=True)
+    transaction.on_commit(lambda: events.publish(event))
+
+
+@receiver(post_save, sender=Suspect)
+def suspect_saved(sender, instance, created, **kwargs):
+    event = events.suspect_event(instance, created=created)
+    transaction.on_commit(lambda: events.publish(event))
+
+
+@receiver(post_delete, sender=Suspect)
+def suspect_deleted(sender, instance, **kwargs):
+    if _moving():
+        return
+    event = events.suspect_event(instance, deleted=True)
+    transaction.on_commit(lambda: events.publish(event))
+
+
+# -----------------------------
+# Duplicate photo index
+# -----------------------------
+@receiver(post_save, sender=CrimeReport)
+@receiver(post_save, sender=Suspect)
+@receiver(post_save, sender=PersonnelProfile)
+def hash_photo(sender, instance, **kwargs):
+    imagehash.update_hash(instance)
+
+
+@receiver(post_delete, sender=CrimeReport)
+@receiver(post_delete, sender=Suspect)
+@receiver(post_delete, sender=PersonnelProfile)
+def forget_photo_hash(sender, instance, **kwargs):
+    if _moving():
+        return
+    kind, _ = imagehash.kind_for(instance)
+    imagehash.forget(kind, instance.pk)
+
+
+# -----------------------------
+# Duplicate report index
+# -----------------------------
+@receiver(post_save, sender=CrimeReport)
+def index_report(sender, instance, **kwargs):
+    dedup.index_report(instance)
+
+
+# -----------------------------
+# Suspect persons
+# -----------------------------
+@receiver(post_save, sender=Suspect)
+def resolve_person(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not persons.MATCH_FIELDS & set(update_fields):
+        return
+    persons.resolve(instance)
+
+
+@receiver(post_delete, sender=PersonLink)
+def forget_person(sender, instance, **kwargs):
+    # suspect deleted or archived; drop the person once nobody is left
+    persons.forget(instance.person_id)
+
+
+# -----------------------------
+# Heatmap tiles
+# -----------------------------
+@receiver(pre_save, sender=CrimeReport)
+def remember_heat_point(sender, instance, **kwargs):
+    from .heatmap import COLUMNS
+
+    if instance.pk is None:
+        return
+    instance._heat_point = CrimeReport.objects.filter(pk=instance.pk).values_list(*COLUMNS).first()
+
+
+@receiver(post_save, sender=CrimeReport)
+def refresh_heatmap(sender, instance, created, **kwargs):
+    from .heatmap import COLUMNS, invalidate
+
+    old = None if created else getattr(instance, "_heat_point", None)
+    if old is not None and old == tuple(getattr(instance, column) for column in COLUMNS):
+        return   # a description / status / name edit: the tiles still hold
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_delete, sender=CrimeReport)
+def drop_from_heatmap(sender, instance, **kwargs):
+    # archived reports leave the map too, so moves count
+    from .heatmap import invalidate
+
+    transaction.on_commit(invalidate)
+
+
+# -----------------------------
+# Personnel typeahead
+# -----------------------------
+@receiver(post_save, sender=PersonnelProfile)
+def index_personnel(sender, instance, **kwargs):
+    typeahead.index.put(instance)
+
+
+@receiver(post_delete, sender=PersonnelProfile)
+def unindex_personnel(sender, instance, **kwargs):
+    typeahead.index.remove(instance.pk)
+
+
+# -----------------------------
+# Analytics count cube
+# -----------------------------
+@receiver(pre_save, sender=CrimeReport)
+def remember_cube_cell(sender, instance, **kwargs):
+    from .cube import COLUMNS, cube
+
+    if cube.counts is None or instance.pk is None:
+        return
+    instance._cube_key = CrimeReport.objects.filter(pk=instance.pk).values_list(*COLUMNS).first()
+
+
+@receiver(post_save, sender=CrimeReport)
+def count_in_cube(sender, instance, created, **kwargs):
+    from .cube import cube, key_for
+
+    old = None if created else getattr(instance, "_cube_key", None)
+    new = key_for(instance)
+    transaction.on_commit(lambda: cube.move(old, new))
+
+
+@receiver(post_delete, sender=CrimeReport)
+def uncount_in_cube(sender, instance, **kwargs):
+    # archived reports leave the active counts too
+    from .cube import cube, key_for
+
+    old = key_for(instance)
+    transaction.on_commit(lambda: cube.move(old, None))
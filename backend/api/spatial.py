@@ -0,0 +1,140 @@
+"""
+Radius and nearest-incident queries.
+
+Coordinates are stored as text (`latitude` / `longitude`, as the map form
+sends them), which the database can neither index nor compare, so every
+save also copies them into the indexed float columns `geo_lat` / `geo_lng`
+(see parse_coordinate in models.py).
+
+    GET /api/<crimes|suspects>/nearby/?lat=14.2&lng=121.1&radius_km=2
+    GET /api/<crimes|suspects>/nearby/?suspect=12&radius_km=2     (center on a record)
+    GET /api/<crimes|suspects>/nearby/?lat=..&lng=..&nearest=20
+
+A bounding box around the center narrows the rows through the
+(geo_lat, geo_lng) index. The exact haversine distance is then computed,
+filtered and sorted by the database itself. Results are paginated and
+carry `distance_km`.
+"""
+
+import math
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+from django.shortcuts import get_object_or_404
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+MAX_RADIUS_KM = 200
+DEFAULT_NEAREST_RADIUS_KM = 50   # how far `nearest` looks
+MAX_NEAREST = 500
+
+
+def bounding_box(lat, lng, radius_km):
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(lat))
+    dlng = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+
+def haversine_km(lat, lng):
+    """Expression: great-circle distance in km from (lat, lng) to the row's geo_lat / geo_lng."""
+    lat1 = math.radians(lat)
+    lat2 = Radians(F("geo_lat"))
+    dlat = (lat2 - Value(lat1)) / 2
+    dlng = (Radians(F("geo_lng")) - Value(math.radians(lng))) / 2
+    a = Power(Sin(dlat), 2) + Value(math.cos(lat1)) * Cos(lat2) * Power(Sin(dlng), 2)
+    # Least() keeps rounding noise from pushing asin out of its domain.
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(Least(a, Value(1.0))), output_field=FloatField())
+
+
+def within(queryset, lat, lng, radius_km):
+    """Rows within `radius_km`, annotated with `distance_km` and sorted nearest first."""
+    lat_min, lat_max, lng_min, lng_max = bounding_box(lat, lng, radius_km)
+    return (
+        queryset
+        .filter(geo_lat__range=(lat_min, lat_max), geo_lng__range=(lng_min, lng_max))
+        .annotate(distance_km=haversine_km(lat, lng))
+        .filter(distance_km__lte=radius_km)
+        .order_by("distance_km", "pk")
+    )
+
+
+class NearbyPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+def _float_param(params, name, low, high, default=None):
+    raw = params.get(name)
+    if raw in (None, ""):
+        if default is None:
+            raise ValidationError({name: "This parameter is required."})
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        raise ValidationError({name: "Must be a number."})
+    if not low <= value <= high or math.isnan(value):
+        raise ValidationError({name: f"Must be between {low} and {high}."})
+    return value
+
+
+class NearbyMixin:
+    """
+    Adds the `nearby` list action to a ModelViewSet whose model has
+    geo_lat / geo_lng. `?crime=<id>` / `?suspect=<id>` centers the search on
+    that record's coordinates.
+    """
+
+    nearby_centers = {}   # query param -> model whose row can be the center
+
+    def nearby_center(self, params):
+        for param, model in self.nearby_centers.items():
+            if params.get(param):
+                try:
+                    pk = int(params[param])
+                except ValueError:
+                    raise ValidationError({param: "Must be an integer id."})
+                row = get_object_or_404(model, pk=pk)
+                if row.geo_lat is None or row.geo_lng is None:
+                    raise ValidationError({param: "That record has no coordinates."})
+                return row.geo_lat, row.geo_lng, (model, row.pk)
+        return _float_param(params, "lat", -90, 90), _float_param(params, "lng", -180, 180), None
+
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        params = request.query_params
+        lat, lng, center = self.nearby_center(params)
+        queryset = self.filter_queryset(self.get_queryset())
+        if center is not None and center[0] is queryset.model:
+            queryset = queryset.exclude(pk=center[1])
+
+        if params.get("nearest"):
+            count = int(_float_param(params, "nearest", 1, MAX_NEAREST))
+            radius = _float_param(params, "radius_km", 0, MAX_RADIUS_KM, DEFAULT_NEAREST_RADIUS_KM)
+            rows = list(within(queryset, lat, lng, radius)[:count])
+            return self.nearby_response(rows, lat, lng, radius)
+
+        radius = _float_param(params, "radius_km", 0, MAX_RADIUS_KM)
+        paginator = NearbyPagination()
+        rows = paginator.paginate_queryset(within(queryset, lat, lng, radius), request, view=self)
+        return paginator.get_paginated_response(self.nearby_rows(rows))
+
+    def nearby_rows(self, rows):
+        data = self.get_serializer(rows, many=True).data
+        for item, row in zip(data, rows):
+            item["distance_km"] = round(row.distance_km, 3)
+        return data
+
+    def nearby_response(self, rows, lat, lng, radius):
+        return Response({
+            "center": {"lat": lat, "lng": lng},
+            "radius_km": radius,
+            "count": len(rows),
+            "results": self.nearby_rows(rows),
+        })
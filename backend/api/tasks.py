@@ -0,0 +1,255 @@
+"""
+Background tasks, queued in the database.
+
+    POST /api/tasks/        {"name": "scan_duplicates", "args": {"min_score": 0.8}}  -> 202, the task
+    GET  /api/tasks/        recent tasks (?status=, ?name=)
+    GET  /api/tasks/<id>/   status, attempts, result or last error
+
+Jobs that take minutes (duplicate scans, reclustering suspects) don't
+belong in a request. A Task row records what to run;
+`manage.py run_tasks` polls for due rows and runs each attempt in a child
+process, so it can be killed at its timeout and a crash takes only that
+task down. No broker: the row is claimed with SELECT ... FOR UPDATE SKIP
+LOCKED where the database has it (Postgres), and a compare-and-set on the
+status in any case (SQLite), so several workers can share the queue.
+
+A failed or timed-out attempt is retried after TASKS_RETRY_BASE_SECONDS,
+doubling each time up to TASKS_RETRY_MAX_SECONDS, until max_attempts is
+spent. While running, a task is leased to its worker for its timeout plus
+LEASE_GRACE; a task whose lease ran out (worker killed, machine gone) is
+taken back as a failed attempt. Finished tasks are kept TASKS_KEEP_DAYS.
+
+A job is a function taking keyword arguments (the task's JSON `args`) and
+returning something JSON can hold, registered with @register. Only jobs
+that need nothing but the database are registered: the worker runs
+apart from the web service and doesn't see its MEDIA_ROOT, so photo
+jobs (hashing, thumbnails) wait until media is on shared storage.
+
+No worker is deployed by default (render.yaml explains how to add one);
+until one runs, queued tasks stay queued.
+"""
+
+import inspect
+import os
+import signal
+import socket
+import traceback
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+LEASE_GRACE = timedelta(seconds=60)
+MAX_ERROR_LENGTH = 10000
+
+registry = {}   # name -> (function, default options)
+
+
+def register(name=None, *, timeout=None, max_attempts=None):
+    """Make a function runnable as a task, with its own default timeout / attempts."""
+    def decorate(function):
+        registry[name or function.__name__] = (function, {"timeout": timeout, "max_attempts": max_attempts})
+        return function
+    return decorate
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def backoff(attempts):
+    """Delay before the next attempt, after `attempts` failed ones."""
+    base = setting("TASKS_RETRY_BASE_SECONDS", 30)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), setting("TASKS_RETRY_MAX_SECONDS", 3600)))
+
+
+# -----------------------------
+# Queue
+# -----------------------------
+def check(name, args):
+    """ValidationError unless `name` is a registered job that accepts `args`."""
+    if not isinstance(name, str) or name not in registry:
+        raise ValidationError({"name": f"Must be one of: {', '.join(sorted(registry))}."})
+    if not isinstance(args, dict):
+        raise ValidationError({"args": "Must be an object."})
+    try:
+        inspect.signature(registry[name][0]).bind(**args)
+    except TypeError as exc:
+        raise ValidationError({"args": str(exc)})
+
+
+def enqueue(name, args=None, *, delay=0, timeout=None, max_attempts=None):
+    """Queue a registered task; ValidationError for an unknown one or arguments it doesn't take."""
+    Task = apps.get_model("api", "Task")
+    args = {} if args is None else args
+    check(name, args)
+    defaults = registry[name][1]
+    return Task.objects.create(
+        name=name,
+        args=args,
+        timeout=timeout or defaults["timeout"] or setting("TASKS_DEFAULT_TIMEOUT", 600),
+        max_attempts=max_attempts or defaults["max_attempts"] or setting("TASKS_MAX_ATTEMPTS", 3),
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def claim(worker):
+    """Lease the next due task to `worker`; None when nothing is due."""
+    Task = apps.get_model("api", "Task")
+    now = timezone.now()
+    locking = connection.features.has_select_for_update_skip_locked
+    while True:
+        # SQLite has no row locks, and a read-then-write transaction there fails
+        # instead of waiting while a task writes; the update alone is enough.
+        with transaction.atomic() if locking else nullcontext():
+            queued = Task.objects.filter(status="queued", run_after__lte=now).order_by("run_after", "pk")
+            task = (queued.select_for_update(skip_locked=True) if locking else queued).first()
+            if task is None:
+                return None
+            claimed = Task.objects.filter(pk=task.pk, status="queued").update(
+                status="running", attempts=task.attempts + 1, locked_by=worker,
+                locked_until=now + timedelta(seconds=task.timeout) + LEASE_GRACE,
+                started_at=now, error="",
+            )
+        if claimed:   # else another worker got it between the two statements (no row locks on SQLite)
+            task.refresh_from_db()
+            return task
+
+
+def finish(task_id, worker, result):
+    Task = apps.get_model("api", "Task")
+    return Task.objects.filter(pk=task_id, status="running", locked_by=worker).update(
+        status="succeeded", result=result, locked_by="", locked_until=None, finished_at=timezone.now(),
+    )
+
+
+def fail(task_id, worker, error):
+    """Record a failed attempt: queue a retry after the backoff, or give up once attempts are spent."""
+    Task = apps.get_model("api", "Task")
+    task = Task.objects.filter(pk=task_id, status="running", locked_by=worker).first()
+    if task is None:
+        return 0
+    now = timezone.now()
+    changes = {"error": error[-MAX_ERROR_LENGTH:], "locked_by": "", "locked_until": None}
+    if task.attempts < task.max_attempts:
+        changes.update(status="queued", run_after=now + backoff(task.attempts))
+    else:
+        changes.update(status="failed", finished_at=now)
+    return Task.objects.filter(pk=task_id, status="running", locked_by=worker).update(**changes)
+
+
+def recover():
+    """Take back tasks whose worker let the lease run out, as failed attempts."""
+    Task = apps.get_model("api", "Task")
+    lost = Task.objects.filter(status="running", locked_until__lt=timezone.now()).values_list("pk", "locked_by")
+    return sum(fail(pk, worker, f"Worker {worker} stopped responding.") for pk, worker in lost)
+
+
+def prune():
+    Task = apps.get_model("api", "Task")
+    cutoff = timezone.now() - timedelta(days=setting("TASKS_KEEP_DAYS", 14))
+    return Task.objects.filter(status__in=["succeeded", "failed"], finished_at__lt=cutoff).delete()[0]
+
+
+# -----------------------------
+# Running
+# -----------------------------
+def execute(task_id, worker):
+    """
+    Run one claimed attempt and record how it went; the body of the child
+    process `run_tasks` starts per attempt.
+    """
+    if not apps.ready:   # spawned rather than forked
+        import django
+
+        django.setup()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)   # the worker decides when to stop
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    close_old_connections()
+
+    Task = apps.get_model("api", "Task")
+    task = Task.objects.get(pk=task_id)
+    try:
+        function = registry[task.name][0]
+    except KeyError:
+        fail(task_id, worker, f"Unknown task: {task.name}")
+        return
+    try:
+        result = function(**task.args)
+    except Exception:
+        fail(task_id, worker, traceback.format_exc())
+    else:
+        try:
+            finish(task_id, worker, result)
+        except (TypeError, ValueError):
+            fail(task_id, worker, traceback.format_exc())   # result JSON can't hold
+    finally:
+        connection.close()
+
+
+def describe(task):
+    return {
+        "id": task.pk,
+        "name": task.name,
+        "args": task.args,
+        "status": task.status,
+        "attempts": task.attempts,
+        "max_attempts": task.max_attempts,
+        "timeout": task.timeout,
+        "run_after": task.run_after,
+        "created_at": task.created_at,
+        "started_at": task.started_at,
+        "finished_at": task.finished_at,
+        "result": task.result,
+        "error": task.error,
+    }
+
+
+# -----------------------------
+# Jobs
+# -----------------------------
+@register(timeout=1800)
+def reindex_duplicates():
+    """Rebuild the duplicate-report blocking keys (api/dedup.py)."""
+    from . import dedup
+    from .models import CrimeReport
+
+    rows = list(CrimeReport.objects.order_by().values(*dedup.FIELDS).iterator())
+    return {"reports": len(rows), "keys": dedup.reindex(rows)}
+
+
+@register(timeout=1800)
+def scan_duplicates(min_score=None, limit=200):
+    """The best-scoring pairs of reports that look like the same incident."""
+    from . import dedup
+    from .models import CrimeReport
+
+    rows = list(CrimeReport.objects.order_by().values(*dedup.FIELDS).iterator())
+    pairs = sorted(dedup.scan(rows, min_score), key=lambda pair: (-pair[0], pair[1]["id"], pair[2]["id"]))
+    return {
+        "reports": len(rows),
+        "total": len(pairs),
+        "pairs": [
+            {"score": similarity, "a": a["id"], "b": b["id"], "parts": parts}
+            for similarity, a, b, parts in pairs[:limit]
+        ],
+    }
+
+
+@register(timeout=3600, max_attempts=1)
+def rebuild_persons():
+    """Recluster every suspect into persons from scratch (api/persons.py)."""
+    from . import persons
+    from .models import Person, PersonLink, Suspect, SuspectBlockKey
+
+    with transaction.atomic():
+        suspects, groups = persons.rebuild(Suspect, Person, PersonLink, SuspectBlockKey)
+    return {"suspects": suspects, "persons": groups}
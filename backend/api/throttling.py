@@ -0,0 +1,160 @@
+"""
+Token-bucket request throttling.
+
+Every API request is charged one token from a bucket keyed by
+(scope, user or client IP). A bucket holds up to N tokens and refills at
+N per period, per API_THROTTLE_RATES (e.g. "login": "10/min"), so short
+bursts pass while a runaway client settles at the configured rate and
+gets 429 with Retry-After.
+
+Scopes separate budgets for the expensive endpoints:
+
+    login     token / login views (password hashing)
+    register  account registration
+    list      list-style actions (list, changes, nearby) and the plain
+              full-table lists (/api/api/crimes/, /api/api/suspects/)
+    read      other GET / HEAD / OPTIONS
+    write     other POST / PUT / PATCH / DELETE
+
+A view can pin its scope with `throttle_scope`. A scope missing from
+API_THROTTLE_RATES (or set to None) is not throttled.
+
+Buckets live in per-process memory by default. Set API_THROTTLE_STORE to
+"api.throttling.CacheBucketStore" to share them between workers through
+the Django cache (CACHES / API_THROTTLE_CACHE).
+"""
+
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+LIST_ACTIONS = {"list", "changes", "nearby"}
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """"10/min" -> (capacity 10, refill tokens per second)."""
+    count, _, period = rate.partition("/")
+    seconds = PERIODS[period.strip()[0].lower()]
+    return int(count), int(count) / seconds
+
+
+class LocalBucketStore:
+    """
+    Buckets as immutable (tokens, stamp, full_at) tuples in a plain dict.
+
+    No lock: reading and replacing one dict entry is atomic under the GIL,
+    so threads never corrupt a bucket. Two threads racing on the same key
+    can both spend the last token; for a rate limit that is an acceptable
+    price for never serializing requests.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+
+    def take(self, key, capacity, refill):
+        """(allowed, seconds until the next token) after charging one token."""
+        now = time.monotonic()
+        tokens, stamp, _ = self._buckets.get(key, (capacity, now, now))
+        tokens = min(capacity, tokens + (now - stamp) * refill)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) / refill)
+        if len(self._buckets) > getattr(settings, "API_THROTTLE_MAX_KEYS", 10000):
+            self.prune(now)
+        return allowed, 0.0 if allowed else (1 - tokens) / refill
+
+    def prune(self, now=None):
+        # A bucket that has refilled completely is the same as a missing one.
+        now = time.monotonic() if now is None else now
+        live = []
+        for key, (_, stamp, full_at) in list(self._buckets.items()):
+            if full_at <= now:
+                self._buckets.pop(key, None)
+            else:
+                live.append((stamp, key))
+        # Still too many live buckets (lots of distinct clients): forget the
+        # half used least recently, so pruning stays amortized O(1) per
+        # request. (Dict order is first use, not last, so sort by stamp.)
+        limit = getattr(settings, "API_THROTTLE_MAX_KEYS", 10000)
+        if len(live) > limit:
+            live.sort()
+            for _, key in live[: len(live) - limit // 2]:
+                self._buckets.pop(key, None)
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets in the Django cache, shared by every worker that uses the same
+    cache backend. Read-modify-write without a lock, so concurrent requests
+    can overspend by a token or two.
+    """
+
+    def __init__(self):
+        from django.core.cache import caches
+
+        self.cache = caches[getattr(settings, "API_THROTTLE_CACHE", "default")]
+
+    def take(self, key, capacity, refill):
+        now = time.time()
+        cache_key = f"throttle:{key}"
+        tokens, stamp = self.cache.get(cache_key, (capacity, now))
+        tokens = min(capacity, tokens + (now - stamp) * refill)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.cache.set(cache_key, (tokens, now), timeout=math.ceil((capacity - tokens) / refill) + 1)
+        return allowed, 0.0 if allowed else (1 - tokens) / refill
+
+    def clear(self):
+        self.cache.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = getattr(settings, "API_THROTTLE_STORE", "") or "api.throttling.LocalBucketStore"
+                _store = import_string(backend)()
+    return _store
+
+
+def scope_for(request, view):
+    scope = getattr(view, "throttle_scope", None)
+    if scope:
+        return scope
+    if getattr(view, "action", None) in LIST_ACTIONS:
+        return "list"
+    return "read" if request.method in SAFE_METHODS else "write"
+
+
+class BucketThrottle(BaseThrottle):
+    """DRF throttle class; see the module docstring."""
+
+    def allow_request(self, request, view):
+        scope = scope_for(request, view)
+        rate = getattr(settings, "API_THROTTLE_RATES", {}).get(scope)
+        if not rate:
+            return True
+        capacity, refill = parse_rate(rate)
+        user = getattr(request, "user", None)
+        ident = f"user:{user.pk}" if user is not None and user.is_authenticated else f"ip:{self.get_ident(request)}"
+        allowed, self._wait = get_store().take(f"{scope}:{ident}", capacity, refill)
+        return allowed
+
+    def wait(self):
+        return self._wait
@@ -0,0 +1,143 @@
+"""
+Personnel typeahead.
+
+    GET /api/personnel/typeahead/?q=dela cr&limit=10[&include_archived=true]
+
+Answers prefix queries on badge number (officer_id), first / last name and
+department from a per-process sorted token list: every word of those
+fields is stored once as (token, profile id), so a prefix is one bisect
+plus a short scan, and the database is not touched per keystroke. Every
+word of the query must be the prefix of some token of a profile ("jo cr"
+finds Jose Cruz); badge numbers also match with punctuation left out
+("pnp12" finds PNP-1234).
+
+Saves and deletes patch this process's index through signals; the whole
+index is reloaded every CACHE_SECONDS to pick up other workers' writes.
+Only the few fields the picker shows are returned.
+"""
+
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+
+from django.apps import apps
+
+CACHE_SECONDS = 60
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+FIELDS = ["id", "officer_id", "first_name", "last_name", "department", "is_archived"]
+
+_word = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+
+
+def fold(text):
+    """Lowercase ASCII: "Peñafrancia" -> "penafrancia"."""
+    return unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode().lower()
+
+
+def tokens(row):
+    found = set()
+    for field in ("first_name", "last_name", "department"):
+        found.update(_word.findall(fold(row[field])))
+    badge = fold(row["officer_id"]).strip()
+    if badge:
+        found.add(badge)
+        found.add(re.sub(r"[^a-z0-9]", "", badge))
+    found.discard("")
+    return found
+
+
+def display_row(row):
+    """The row as kept in the index, with its sort keys folded once."""
+    return {
+        **row,
+        "_badge": fold(row["officer_id"]),
+        "_name": (fold(row["last_name"]), fold(row["first_name"]), row["id"]),
+    }
+
+
+def query_words(q):
+    return [word for word in fold(q).split() if word]
+
+
+class PrefixIndex:
+    """Sorted (token, id) pairs plus the display row of each profile."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pairs = None
+        self._rows = {}
+        self._loaded_at = 0.0
+
+    def _ensure(self):
+        if self._pairs is not None and time.monotonic() - self._loaded_at <= CACHE_SECONDS:
+            return
+        with self._lock:
+            if self._pairs is not None and time.monotonic() - self._loaded_at <= CACHE_SECONDS:
+                return
+            PersonnelProfile = apps.get_model("api", "PersonnelProfile")
+            rows = {row["id"]: display_row(row) for row in PersonnelProfile.objects.values(*FIELDS).iterator()}
+            pairs = sorted((token, pk) for pk, row in rows.items() for token in tokens(row))
+            self._pairs, self._rows, self._loaded_at = pairs, rows, time.monotonic()
+
+    def _drop(self, pk):
+        row = self._rows.pop(pk, None)
+        if row is None:
+            return
+        for token in tokens(row):
+            i = bisect.bisect_left(self._pairs, (token, pk))
+            if i < len(self._pairs) and self._pairs[i] == (token, pk):
+                del self._pairs[i]
+
+    # put/remove only patch an already loaded index; otherwise the next
+    # load reads the change from the table anyway.
+    def put(self, profile):
+        row = display_row({field: getattr(profile, field) for field in FIELDS})
+        with self._lock:
+            if self._pairs is None:
+                return
+            self._drop(row["id"])
+            self._rows[row["id"]] = row
+            for token in tokens(row):
+                bisect.insort(self._pairs, (token, row["id"]))
+
+    def remove(self, pk):
+        with self._lock:
+            if self._pairs is not None:
+                self._drop(pk)
+
+    def _prefixed(self, prefix):
+        start = bisect.bisect_left(self._pairs, (prefix,))
+        end = bisect.bisect_left(self._pairs, (prefix + "\x7f",), start)   # past every ASCII continuation
+        return {pk for _, pk in self._pairs[start:end]}
+
+    def search(self, q, limit=DEFAULT_LIMIT, include_archived=False):
+        words = query_words(q)
+        if not words:
+            return []
+        self._ensure()
+        with self._lock:
+            # rarest word first keeps the intersections small
+            matches = sorted((self._prefixed(word) for word in words), key=len)
+            ids = set.intersection(*matches) if matches else set()
+            rows = [self._rows[pk] for pk in ids if include_archived or not self._rows[pk]["is_archived"]]
+
+        badge = words[0]
+        best = heapq.nsmallest(limit, rows, key=lambda row: (
+            (0, row["_badge"]) if row["_badge"].startswith(badge) else (1, row["_name"])   # badge hits first
+        ))
+        return [
+            {
+                "id": row["id"],
+                "officer_id": row["officer_id"],
+                "name": " ".join(filter(None, [row["first_name"], row["last_name"]])),
+                "department": row["department"],
+            }
+            for row in best
+        ]
+
+
+index = PrefixIndex()
@@ -0,0 +1,142 @@
+"""
+Resumable chunked uploads.
+
+    POST  /api/uploads/                 {filename, size, sha256} -> {id, offset: 0}
+    GET   /api/uploads/<id>/            -> {id, offset, size, completed}
+    PATCH /api/uploads/<id>/            raw bytes, `Upload-Offset: <offset>` header
+    POST  /api/uploads/<id>/complete/   verifies size + sha256
+
+Chunks are streamed straight to a temp file under UPLOAD_TEMP_DIR, so a
+lost connection only costs the current chunk: ask for the offset and carry
+on from there. A completed upload is then referenced by id from the
+create/update endpoints (`v_photo_upload`, `s_photo_upload`, ...) instead of
+sending the image in the form again.
+"""
+
+import hashlib
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+READ_BLOCK = 64 * 1024
+
+
+class UploadError(Exception):
+    pass
+
+
+class OffsetMismatch(UploadError):
+    def __init__(self, expected):
+        super().__init__(f"Upload offset is {expected}.")
+        self.expected = expected
+
+
+def temp_dir():
+    # Not under MEDIA_ROOT: half-finished uploads must never be served.
+    path = Path(getattr(settings, "UPLOAD_TEMP_DIR", settings.BASE_DIR / "upload_tmp"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def temp_path(upload):
+    return temp_dir() / upload.pk.hex
+
+
+def max_upload_bytes():
+    return getattr(settings, "UPLOAD_MAX_BYTES", 20 * 1024 * 1024)
+
+
+def max_chunk_bytes():
+    return getattr(settings, "UPLOAD_CHUNK_MAX_BYTES", 5 * 1024 * 1024)
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Append `length` bytes from `stream` at `offset`. Returns the new offset.
+    Only the chunk at the current offset is accepted, which keeps retries
+    and duplicate sends harmless.
+    """
+    from .models import Upload
+
+    if upload.completed:
+        raise UploadError("Upload is already complete.")
+    if offset != upload.received:
+        raise OffsetMismatch(upload.received)
+    if length > max_chunk_bytes():
+        raise UploadError(f"Chunks may be at most {max_chunk_bytes()} bytes.")
+    if offset + length > upload.size:
+        raise UploadError("Chunk goes past the declared upload size.")
+
+    path = temp_path(upload)
+    written = 0
+    with open(path, "r+b" if path.exists() else "wb") as fh:
+        fh.seek(offset)
+        while written < length:
+            block = stream.read(min(READ_BLOCK, length - written))
+            if not block:
+                break
+            fh.write(block)
+            written += len(block)
+        fh.truncate()
+
+    new_offset = offset + written
+    # Compare-and-set so two racing requests can't both advance the offset.
+    updated = Upload.objects.filter(pk=upload.pk, received=offset).update(
+        received=new_offset, updated_at=timezone.now()
+    )
+    if not updated:
+        upload.refresh_from_db(fields=["received"])
+        raise OffsetMismatch(upload.received)
+    upload.received = new_offset
+    if written < length:
+        raise UploadError(f"Chunk was cut short; resume from offset {new_offset}.")
+    return new_offset
+
+
+def complete(upload):
+    if upload.completed:
+        return upload
+    if upload.received != upload.size:
+        raise UploadError(f"Only {upload.received} of {upload.size} bytes received.")
+    digest = hashlib.sha256()
+    with open(temp_path(upload), "rb") as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(block)
+    if digest.hexdigest() != upload.sha256.lower():
+        discard(upload)
+        raise UploadError("Checksum mismatch; upload discarded, start again.")
+    upload.completed = True
+    upload.save(update_fields=["completed", "updated_at"])
+    return upload
+
+
+def verify_image(upload):
+    from PIL import Image
+
+    try:
+        with Image.open(temp_path(upload)) as img:
+            img.verify()
+    except Exception:
+        raise UploadError("Upload is not a valid image.")
+
+
+def open_file(upload):
+    """Django File for a completed upload, ready to assign to an ImageField."""
+    return File(open(temp_path(upload), "rb"), name=upload.filename)
+
+
+def discard(upload):
+    temp_path(upload).unlink(missing_ok=True)
+    if upload.pk:
+        upload.delete()
+
+
+def prune_expired():
+    from .models import Upload
+
+    cutoff = timezone.now() - timedelta(hours=getattr(settings, "UPLOAD_EXPIRY_HOURS", 24))
+    for upload in Upload.objects.filter(updated_at__lt=cutoff):
+        discard(upload)
@@ -15,7 +15,8 @@ from rest_framework.routers import DefaultRouter
 from .views import PersonnelProfileViewSet
 from .views import RegionListAPIView
 
-from .views import CrimeReportViewSet,SuspectViewSet
+from .views import CrimeReportViewSet,SuspectViewSet,UploadViewSet
+from .views import ProfileListView, ProfileDetailView, ProfileDownloadView
 
 urlpatterns = [
     path('login/', CustomTokenObtainPairView.as_view(), name='custom_login'),
@@ -34,12 +35,50 @@ urlpatterns = [
 
     path("api/crimes/", CrimeReportListCreateView.as_view(), name="crime-list"),
     path("api/suspects/", SuspectListCreateView.as_view(), name="suspect-list"),
+
+    # near-duplicate photo lookup
+    path("photos/similar/", views.SimilarPhotosView.as_view(), name="photos-similar"),
+
+    # suspect records resolved into persons, with their cases
+    path("persons/<int:pk>/", views.PersonView.as_view(), name="person-detail"),
+
+    # queued report / suspect writes from offline devices, deduped by idempotency key
+    path("batch/", views.BatchView.as_view(), name="batch"),
+
+    # background tasks run by `manage.py run_tasks` (admin only)
+    path("tasks/", views.TaskListView.as_view(), name="task-list"),
+    path("tasks/<int:pk>/", views.TaskDetailView.as_view(), name="task-detail"),
+
+    # cross-filtered report counts from an in-memory cube
+    path("stats/cube/", views.CubeCountsView.as_view(), name="stats-cube"),
+
+    # incident heatmap as map tiles (PNG, cached on disk)
+    path("heatmap/<int:z>/<int:x>/<int:y>.png", views.HeatmapTileView.as_view(), name="heatmap-tile"),
+
+    # PSGC address -> map coordinates
+    path("geocode/", views.GeocodeView.as_view(), name="geocode"),
+
+    # dashboard KPIs (counts only, cached briefly)
+    path("dashboard/summary/", views.DashboardSummaryView.as_view(), name="dashboard-summary"),
+
+    # demographic histograms (counted in the database)
+    path("stats/ages/", views.AgeHistogramView.as_view(), name="stats-ages"),
+    path("stats/personnel/", views.PersonnelHistogramView.as_view(), name="stats-personnel"),
+
+    # live dashboard events (server-sent events)
+    path("events/", views.event_stream, name="events"),
+
+    # on-demand request profiles (admin only)
+    path("profiles/", ProfileListView.as_view(), name="profile-list"),
+    path("profiles/<str:profile_id>/", ProfileDetailView.as_view(), name="profile-detail"),
+    path("profiles/<str:profile_id>/download/", ProfileDownloadView.as_view(), name="profile-download"),
 ]
 
 router = DefaultRouter()
 router.register(r"personnel", PersonnelProfileViewSet, basename="personnel")
 router.register(r"crimes",   CrimeReportViewSet, basename="crime")
 router.register(r"suspects", SuspectViewSet,     basename="suspect")
+router.register(r"uploads",  UploadViewSet,      basename="upload")
 
 # Idagdag ang router.urls sa urlpatterns para hindi mawala yung ibang paths
 urlpatterns += router.urls
@@ -1,5 +1,6 @@
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -8,13 +9,6 @@ from django.contrib.auth import get_user_model,authenticate
 from .serializers import UserRegistrationSerializer  # You’ll create this
 from rest_framework.parsers import MultiPartParser, FormParser
 
-from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.tokens import RefreshToken
-from .serializers import CustomTokenObtainPairSerializer
-
-from rest_framework_simplejwt.views import TokenObtainPairView
-from .serializers import UserTokenObtainPairSerializer, AdminTokenObtainPairSerializer
-
 
 from rest_framework import generics
 from .models import Region
@@ -23,11 +17,10 @@ from .serializers import RegionSerializer
 
 ####profile information#############
 from rest_framework.decorators import action
-from rest_framework import viewsets,status
+from rest_framework import viewsets
 from .models import PersonnelProfile
 from .serializers import PersonnelProfileSerializer
-
-from rest_framework.filters import OrderingFilter
+from . import typeahead
 
 
 from django.http import JsonResponse, Http404
@@ -40,15 +33,62 @@ from rest_framework import viewsets, permissions, filters
 from rest_framework.parsers import MultiPartParser, FormParser
 from .models import CrimeReport, Suspect
 from .serializers import CrimeReportSerializer, CrimeReportMiniSerializer, SuspectSerializer
+from .filters import PsgcSearchFilter
+from .sync import ChangesFeedMixin
+from .db_routers import ReplicaReadMixin
+from .archive import IncludeArchivedMixin, archive_report, restore_report
+from .spatial import NearbyMixin
+from .fastlist import FastListMixin, photo_url, suspect_summaries
+from .models import ArchivedCrimeReport, ArchivedSuspect
+from .serializers import ArchivedCrimeReportSerializer, ArchivedSuspectSerializer, CaseIntakeSerializer
+
+###########chunked uploads#############
+from rest_framework.parsers import JSONParser
+from . import uploads
+from .models import Upload
+from .serializers import UploadSerializer
+
+###########duplicate photos#############
+from . import imagehash
+
+###########duplicate reports#############
+from . import dedup
+
+###########suspect persons#############
+from . import persons
+from .models import Person
+
+###########batch submission#############
+from . import batch
+
+###########background tasks#############
+from . import tasks
+from .models import Task
+
+###########heatmap tiles#############
+from django.conf import settings
+from django.http import HttpResponse
+
+###########dashboard#############
+from . import dashboard
+
+###########statistics#############
+from . import histograms
+
+###########live events#############
+from django.http import StreamingHttpResponse
+from . import events
+
+###########geocoding#############
+from . import geocoding
+from .psgc import ADDRESS_PARTS
+
+###########profiling#############
+from django.http import FileResponse
+from . import profiling
+from .permissions import IsAdminPersonnel
 User = get_user_model()
 
-class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
-    @classmethod
-    def get_token(cls, user):
-        token = super().get_token(user)
-        token['username'] = user.username  # Optional extra info
-        return token
-
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
@@ -65,12 +105,14 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
 
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
+    throttle_scope = "login"
 
 
 
 
 class RegisterView(APIView):
-    parser_classes = (MultiPartParser, FormParser)
+    throttle_scope = "register"
+    parser_classes = (MultiPartParser, FormParser, JSONParser)  # JSON when id_image_upload is used
 
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
@@ -103,9 +145,12 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 # Custom View
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_scope = "login"
 
 
 class LoginView(APIView):
+    throttle_scope = "login"
+
     def post(self, request):
         username = request.data.get('username')
         password = request.data.get('password')
@@ -124,6 +169,8 @@ class LoginView(APIView):
         
 
 class UserLoginView(TokenObtainPairView):
+    throttle_scope = "login"
+
     def post(self, request, *args, **kwargs):
         username = request.data.get('username')
         password = request.data.get('password')
@@ -145,6 +192,8 @@ class UserLoginView(TokenObtainPairView):
 
 
 class AdminLoginView(TokenObtainPairView):
+    throttle_scope = "login"
+
     def post(self, request, *args, **kwargs):
         username = request.data.get("username")
         password = request.data.get("password")
@@ -165,7 +214,7 @@ class AdminLoginView(TokenObtainPairView):
 
 #############profile information#############
 
-class PersonnelProfileViewSet(viewsets.ModelViewSet):
+class PersonnelProfileViewSet(ChangesFeedMixin, viewsets.ModelViewSet):
     queryset = PersonnelProfile.objects.all()
     serializer_class = PersonnelProfileSerializer
     filterset_fields = ["is_archived"] 
@@ -177,9 +226,20 @@ class PersonnelProfileViewSet(viewsets.ModelViewSet):
     def archive(self, request, pk=None):
         obj = self.get_object()
         obj.is_archived = True
-        obj.save(update_fields=["is_archived"])
+        obj.save(update_fields=["is_archived", "updated_at"])  # updated_at drives the changes feed
         return Response({"status": "archived", "id": obj.id, "is_archived": True})
 
+    @action(detail=False, methods=["get"])
+    def typeahead(self, request):
+        """Prefix search on badge number, names and department for pickers (see api/typeahead.py)."""
+        params = request.query_params
+        try:
+            limit = min(max(int(params.get("limit", typeahead.DEFAULT_LIMIT)), 1), typeahead.MAX_LIMIT)
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=400)
+        include_archived = params.get("include_archived", "").lower() in ("1", "true", "yes")
+        return Response(typeahead.index.search(params.get("q", ""), limit, include_archived))
+
         
     
 
@@ -204,35 +264,426 @@ def archive_personnel(request, pk):
 
 ###################crime report####################
 
-class CrimeReportViewSet(viewsets.ModelViewSet):  # ⬅️ from ReadOnlyModelViewSet -> ModelViewSet
-    queryset = CrimeReport.objects.filter(is_archived=False).order_by("-created_at")
+class CrimeReportViewSet(ReplicaReadMixin, ChangesFeedMixin, IncludeArchivedMixin, FastListMixin, NearbyMixin, viewsets.ModelViewSet):  # ⬅️ from ReadOnlyModelViewSet -> ModelViewSet
+    """
+    Active reports only; archived ones live in ArchivedCrimeReport
+    (?include_archived=true|only to see them, POST <id>/restore/ to bring one back).
+    """
+    queryset = CrimeReport.objects.all().order_by("-created_at")
     serializer_class = CrimeReportSerializer            # ⬅️ full serializer (may v_photo)
     permission_classes = [permissions.AllowAny]         # adjust as you need
-    parser_classes = [MultiPartParser, FormParser]      # ⬅️ para tumanggap ng file uploads
+    parser_classes = [MultiPartParser, FormParser, JSONParser]  # ⬅️ JSON works with v_photo_upload
     filter_backends = [filters.OrderingFilter, filters.SearchFilter]
     ordering_fields = ["created_at", "happened_at"]
     search_fields = ["crime_type", "v_first_name", "v_last_name"]
+    archive_model = ArchivedCrimeReport   # archived reports leave the list, report them in /changes/
+    archive_serializer_class = ArchivedCrimeReportSerializer
+    nearby_centers = {"crime": CrimeReport, "suspect": Suspect}   # nearby/?suspect=<id>&radius_km=2
+    # not `changes`: its next token comes from the clock, and a replica lagging
+    # past the overlap would drop writes from the feed for good
+    replica_actions = ["list", "retrieve", "nearby"]
+    fast_fields = {"v_photo_url": photo_url("v_photo"), "suspects": suspect_summaries}   # list via values()
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        # saved (and indexed by the post_save signal); look for the same incident filed before
+        self.possible_duplicates = dedup.candidates(serializer.instance)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.data["possible_duplicates"] = self.possible_duplicates
+        return response
+
+    def update(self, request, *args, **kwargs):
+        # The tables PATCH {is_archived: true}; treat that as the archive action
+        # (is_archived is read-only, so that body edits nothing else).
+        if str(request.data.get("is_archived", "")).lower() in ("true", "1"):
+            archived = archive_report(self.get_object())
+            return Response(self.get_archive_serializer(archived).data)
+        return super().update(request, *args, **kwargs)
 
+    @action(detail=True, methods=["post"])
+    def archive(self, request, pk=None):
+        archived = archive_report(self.get_object())
+        return Response({"status": "archived", "id": archived.id, "is_archived": True})
 
-class SuspectViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=["post"])
+    def restore(self, request, pk=None):
+        report = restore_report(get_object_or_404(ArchivedCrimeReport, pk=pk))
+        return Response(self.get_serializer(report).data)
+
+    @action(detail=False, methods=["post"])
+    def intake(self, request):
+        """Report + suspects (with photos) in one request and one transaction; see api/intake.py."""
+        serializer = CaseIntakeSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        data = serializer.data
+        data["possible_duplicates"] = dedup.candidates(serializer.instance["report"])
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get"])
+    def duplicates(self, request, pk=None):
+        """Earlier / later reports that look like the same incident (see api/dedup.py)."""
+        try:
+            threshold = float(request.query_params.get("min_score", dedup.min_score()))
+        except ValueError:
+            return Response({"detail": "min_score must be a number."}, status=400)
+        report = self.get_object()
+        return Response({"id": report.id, "min_score": threshold, "matches": dedup.candidates(report, threshold)})
+
+
+class SuspectViewSet(ReplicaReadMixin, ChangesFeedMixin, IncludeArchivedMixin, FastListMixin, NearbyMixin, viewsets.ModelViewSet):
     """
     Full CRUD for suspects (separate from CrimeReport).
     """
     queryset = Suspect.objects.select_related("crime_report").all().order_by("-created_at")
     serializer_class = SuspectSerializer
     permission_classes = [permissions.AllowAny]  # adjust as needed
-    parser_classes = [MultiPartParser, FormParser]  # to accept image + form data
-    filter_backends = [filters.OrderingFilter, filters.SearchFilter]
+    parser_classes = [MultiPartParser, FormParser, JSONParser]  # to accept image + form data (or s_photo_upload)
+    filter_backends = [filters.OrderingFilter, PsgcSearchFilter]
     ordering_fields = ["created_at"]
-    search_fields = [
-        "s_first_name", "s_middle_name", "s_last_name",
-        "s_barangay", "s_city_municipality", "s_province",
-        "loc_barangay", "loc_city_municipality", "loc_province",
+    search_fields = ["s_first_name", "s_middle_name", "s_last_name"]
+    # barangay / city / province names are matched through PsgcArea
+    psgc_search_fields = [
+        "s_barangay_code", "s_city_mun_code", "s_province_code",
+        "loc_barangay_code", "loc_city_mun_code", "loc_province_code",
     ]
+    archive_model = ArchivedSuspect   # moved out together with their report
+    archive_serializer_class = ArchivedSuspectSerializer
+    nearby_centers = {"crime": CrimeReport, "suspect": Suspect}
+    # not `changes`: its next token comes from the clock, and a replica lagging
+    # past the overlap would drop writes from the feed for good
+    replica_actions = ["list", "retrieve", "nearby"]
+    fast_fields = {"s_photo_url": photo_url("s_photo")}
+
+    @action(detail=True, methods=["get"])
+    def person(self, request, pk=None):
+        """The person this suspect was matched to, with their other records and cases."""
+        suspect = self.get_object()
+        link = getattr(suspect, "person_link", None)
+        if link is None:
+            raise Http404("Suspect has not been matched to a person yet.")
+        return Response(persons.person_detail(link.person_id))
 class CrimeReportListCreateView(generics.ListCreateAPIView):
     queryset = CrimeReport.objects.all()
     serializer_class = CrimeReportSerializer
+    throttle_scope = "list"   # unpaginated, the whole table
 
 class SuspectListCreateView(generics.ListCreateAPIView):
     queryset = Suspect.objects.all()
-    serializer_class = SuspectSerializer
\ No newline at end of file
+    serializer_class = SuspectSerializer
+    throttle_scope = "list"   # unpaginated, the whole table
+
+
+###################chunked uploads####################
+
+class UploadViewSet(viewsets.GenericViewSet):
+    """
+    Resumable uploads for evidence / ID photos (protocol in api/uploads.py).
+    PATCH bodies are streamed to disk as they are read, never parsed.
+    """
+    queryset = Upload.objects.all()
+    serializer_class = UploadSerializer
+    permission_classes = [permissions.AllowAny]   # registration uploads its ID before login
+    parser_classes = [JSONParser, FormParser]
+
+    def _state(self, upload, status_code=status.HTTP_200_OK):
+        response = Response(UploadSerializer(upload).data, status=status_code)
+        response["Upload-Offset"] = str(upload.received)
+        return response
+
+    def create(self, request):
+        uploads.prune_expired()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return self._state(serializer.save(), status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return self._state(self.get_object())
+
+    def partial_update(self, request, pk=None):
+        upload = self.get_object()
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return Response({"detail": "Upload-Offset header is required."}, status=400)
+        if length <= 0:
+            return Response({"detail": "Empty chunk."}, status=400)
+        try:
+            uploads.write_chunk(upload, offset, request.stream, length)
+        except uploads.OffsetMismatch as exc:
+            return Response({"detail": str(exc), "offset": exc.expected}, status=status.HTTP_409_CONFLICT)
+        except uploads.UploadError as exc:
+            return Response({"detail": str(exc), "offset": upload.received}, status=400)
+        return self._state(upload)
+
+    @action(detail=True, methods=["post"])
+    def complete(self, request, pk=None):
+        upload = self.get_object()
+        try:
+            uploads.complete(upload)
+        except uploads.UploadError as exc:
+            return Response({"detail": str(exc)}, status=400)
+        return self._state(upload)
+
+
+###################duplicate photos####################
+
+class SimilarPhotosView(APIView):
+    """
+    Near-duplicate photos across suspects, victims and personnel profiles.
+
+    GET /api/photos/similar/?kind=suspect&id=12[&max_distance=8]
+    GET /api/photos/similar/?hash=<16 hex digits>
+
+    `max_distance` is the Hamming distance between 64-bit dHashes
+    (0 = same picture; up to ~10 = re-encoded / resized copies).
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        try:
+            radius = min(int(request.query_params.get("max_distance", imagehash.DEFAULT_DISTANCE)), imagehash.MAX_DISTANCE)
+        except ValueError:
+            return Response({"detail": "max_distance must be an integer."}, status=400)
+
+        exclude = None
+        if "hash" in request.query_params:
+            try:
+                value = int(request.query_params["hash"], 16) & (2**64 - 1)
+            except ValueError:
+                return Response({"detail": "hash must be hexadecimal."}, status=400)
+        else:
+            kind = request.query_params.get("kind")
+            if kind not in imagehash.PHOTO_FIELDS:
+                return Response({"detail": f"kind must be one of {', '.join(imagehash.PHOTO_FIELDS)}."}, status=400)
+            try:
+                exclude = (kind, int(request.query_params.get("id", "")))
+            except ValueError:
+                return Response({"detail": "id must be an integer."}, status=400)
+            value = imagehash.index.get(*exclude)
+            if value is None:
+                raise Http404("No photo hash for that record.")
+
+        return Response({
+            "hash": f"{value:016x}",
+            "max_distance": radius,
+            "matches": imagehash.index.similar(value, radius, exclude=exclude),
+        })
+
+
+###################suspect persons####################
+
+class PersonView(APIView):
+    """
+    A person resolved from suspect records across reports (see api/persons.py).
+
+    GET /api/persons/<id>/ -> {id, suspects: [...], cases: [...]}
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, pk):
+        person = get_object_or_404(Person, pk=pk)
+        return Response(persons.person_detail(person.pk))
+
+
+###################geocoding####################
+
+class GeocodeView(APIView):
+    """
+    Map coordinates for a PSGC address selection.
+
+    GET /api/geocode/?region_code=..&province_code=..&city_mun_code=..&barangay_code=..
+    (names such as `barangay=` may be sent too, for areas the server has not seen yet)
+
+    Answers from the most specific level it can resolve; `level` says which
+    one, so the pin can be placed as "approximate" when it is not a barangay.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        params = request.query_params
+        codes = {level: params.get(code_suffix, "") for level, _, code_suffix in ADDRESS_PARTS}
+        names = {level: params.get(name_suffix, "").strip() for level, name_suffix, _ in ADDRESS_PARTS}
+        if not any(codes.values()) and not any(names.values()):
+            return Response({"detail": "Pass at least one of region_code, province_code, city_mun_code, barangay_code."}, status=400)
+        result = geocoding.geocode(codes, names)
+        if result is None:
+            raise Http404("No coordinates for that address.")
+        return Response(result)
+
+
+###################batch submission####################
+
+class BatchView(APIView):
+    """
+    Queued creates / updates of reports and suspects from offline devices,
+    each with an idempotency key, applied in one transaction (see api/batch.py).
+    """
+    permission_classes = [permissions.AllowAny]
+    parser_classes = [JSONParser]
+
+    def post(self, request):
+        items = request.data.get("items") if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({"items": "A non-empty list is required."}, status=400)
+        if len(items) > batch.MAX_ITEMS:
+            return Response({"items": f"At most {batch.MAX_ITEMS} items per batch."}, status=400)
+        return Response({"results": batch.process(items, {"request": request})})
+
+
+###################background tasks####################
+
+class TaskListView(APIView):
+    """
+    Queue a background task, or list recent ones (admin only, see api/tasks.py).
+
+    POST /api/tasks/ {"name", "args"} -> 202 with the task; poll its Location.
+    """
+    permission_classes = [IsAdminPersonnel]
+    parser_classes = [JSONParser]
+
+    def get(self, request):
+        queryset = Task.objects.order_by("-created_at")
+        for name in ("status", "name"):
+            if request.query_params.get(name):
+                queryset = queryset.filter(**{name: request.query_params[name]})
+        return Response([tasks.describe(task) for task in queryset[:50]])
+
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response({"detail": "Expected an object with `name` and `args`."}, status=400)
+        task = tasks.enqueue(request.data.get("name"), request.data.get("args"))   # 400 on bad name / args
+        response = Response(tasks.describe(task), status=status.HTTP_202_ACCEPTED)
+        response["Location"] = request.build_absolute_uri(f"{task.pk}/")
+        return response
+
+
+class TaskDetailView(APIView):
+    """Status of one background task: attempts, result once done, last error."""
+    permission_classes = [IsAdminPersonnel]
+
+    def get(self, request, pk):
+        return Response(tasks.describe(get_object_or_404(Task, pk=pk)))
+
+
+###################count cube####################
+
+class CubeCountsView(ReplicaReadMixin, APIView):
+    """
+    Report counts for any combination of date range, province, crime type,
+    status and location kind, grouped by one of them, from an in-memory
+    count cube (see api/cube.py).
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        from . import cube   # NumPy is only loaded once the analytics page asks
+
+        return Response(cube.counts(request.query_params))
+
+
+###################heatmap tiles####################
+
+class HeatmapTileView(ReplicaReadMixin, APIView):
+    """
+    Incident density as 256 px map tiles, for a Leaflet TileLayer
+    (see api/heatmap.py). Same filters as the analytics page:
+    crime_type, province (code), date_from, date_to, region_4a=1.
+    """
+    permission_classes = [permissions.AllowAny]
+    throttle_scope = "tiles"
+
+    def get(self, request, z, x, y):
+        from . import heatmap   # NumPy is only loaded once a map asks for tiles
+
+        try:
+            data = heatmap.tile(request.query_params, z, x, y)
+        except ValueError:
+            raise Http404("No such tile.")
+        response = HttpResponse(data, content_type="image/png")
+        response["Cache-Control"] = f"public, max-age={getattr(settings, 'HEATMAP_BROWSER_MAX_AGE', 60)}"
+        return response
+
+
+###################dashboard####################
+
+class DashboardSummaryView(ReplicaReadMixin, APIView):
+    """
+    Everything the dashboard's KPI cards need in one cached response: officer
+    counts, crime counts by status and type, Region IV-A subtotals and the
+    newest reports (see api/dashboard.py).
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return Response(dashboard.summary())
+
+
+###################statistics####################
+
+class AgeHistogramView(ReplicaReadMixin, APIView):
+    """Victim / suspect age bands per crime type or province (see api/histograms.py)."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return Response(histograms.age_histogram(request.query_params))
+
+
+class PersonnelHistogramView(ReplicaReadMixin, APIView):
+    """Officer height / weight distribution, optionally split by sex."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return Response(histograms.personnel_histogram(request.query_params))
+
+
+###################live events####################
+
+async def event_stream(request):
+    """
+    Server-sent events for dashboards: crime.* and suspect.* create /
+    update / archive / delete notifications. `?topics=crime` narrows it.
+    Needs the ASGI server (see render.yaml) to stream without tying up a thread.
+    """
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    topics = [t for t in request.GET.get("topics", "").split(",") if t]
+    response = StreamingHttpResponse(events.sse_stream(topics), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+###################profiling####################
+
+class ProfileListView(APIView):
+    """Stored request profiles, newest first (admin only)."""
+    permission_classes = [IsAdminPersonnel]
+
+    def get(self, request):
+        return Response(profiling.list_profiles())
+
+
+class ProfileDetailView(APIView):
+    """Summary of one profile: top functions by cumulative time + SQL timings."""
+    permission_classes = [IsAdminPersonnel]
+
+    def get(self, request, profile_id):
+        summary = profiling.load_summary(profile_id)
+        if summary is None:
+            raise Http404("Profile not found")
+        return Response(summary)
+
+
+class ProfileDownloadView(APIView):
+    """Raw cProfile dump, for snakeviz / `python -m pstats`."""
+    permission_classes = [IsAdminPersonnel]
+
+    def get(self, request, profile_id):
+        path = profiling.profile_file(profile_id)
+        if path is None:
+            raise Http404("Profile not found")
+        return FileResponse(open(path, "rb"), as_attachment=True, filename=path.name)
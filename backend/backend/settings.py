@@ -34,6 +34,9 @@ INSTALLED_APPS = [
 
 # --- Middleware (order matters) ---
 MIDDLEWARE = [
+    "api.middleware.MetricsMiddleware",             # outermost so it times everything below
+    "api.middleware.CompressionMiddleware",         # br / gzip; above anything that reads the body
+    "api.middleware.ReplicaRoutingMiddleware",      # per-request read-replica state
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",   # immediately after SecurityMiddleware
     "corsheaders.middleware.CorsMiddleware",        # before CommonMiddleware
@@ -41,6 +44,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "api.middleware.ProfilingMiddleware",           # needs request.user
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -50,9 +54,99 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    "DEFAULT_THROTTLE_CLASSES": ["api.throttling.BucketThrottle"],
+    # Render puts one proxy in front of the app; take the client IP from X-Forwarded-For.
+    "NUM_PROXIES": 1 if RENDER_EXTERNAL_HOSTNAME else None,
 }
 AUTH_USER_MODEL = "api.Personnel"
 
+# --- Throttling (token buckets per scope and user / IP, see api/throttling.py) ---
+# "<n>/<second|minute|hour|day>": bursts of up to n, refilled at n per period.
+# Remove a scope (or set it to None) to leave it unthrottled.
+API_THROTTLE_RATES = {
+    "login": "10/min",
+    "register": "5/hour",
+    "list": "60/min",
+    "read": "300/min",
+    "write": "120/min",
+    "tiles": "1200/min",   # a map view fetches a dozen or more heatmap tiles at once
+}
+# "" = per-process memory; "api.throttling.CacheBucketStore" shares buckets through CACHES.
+API_THROTTLE_STORE = os.environ.get("API_THROTTLE_STORE", "")
+API_THROTTLE_CACHE = "default"
+API_THROTTLE_MAX_KEYS = 10000
+
+# --- Response compression (br / gzip for /api/, see api/compression.py) ---
+API_COMPRESSION_ENABLED = os.environ.get("API_COMPRESSION_ENABLED", "1") == "1"
+API_COMPRESSION_MIN_BYTES = 1024        # smaller bodies go out as is
+API_COMPRESSION_BROTLI_QUALITY = 4      # 0-11; `manage.py bench_compression` shows the trade-off
+API_COMPRESSION_GZIP_LEVEL = 5          # 1-9
+API_COMPRESSION_PATH_PREFIXES = ("/api/",)
+
+# --- Fast list path (crime / suspect lists via values() + orjson, see api/fastlist.py) ---
+API_FAST_LIST = os.environ.get("API_FAST_LIST", "1") == "1"   # ?fast=0 skips it per request
+
+# --- Changes feeds (/api/<resource>/changes/) ---
+SYNC_OVERLAP_SECONDS = 2       # new tokens are backdated by this much
+SYNC_TOMBSTONE_DAYS = 30       # deletions are remembered this long; older tokens must reload
+
+# --- Dashboard summary (/api/dashboard/summary/, see api/dashboard.py) ---
+DASHBOARD_CACHE = "default"
+DASHBOARD_CACHE_SECONDS = 30   # counts may lag this much behind new reports
+DASHBOARD_RECENT_REPORTS = 10
+
+# --- Duplicate reports (blocking keys + scoring, see api/dedup.py) ---
+DEDUP_MIN_SCORE = 0.7          # 0..1; candidates below this aren't reported
+DEDUP_MAX_BLOCK = 50           # keys shared by more reports than this are too common to compare
+
+# --- Suspect persons (entity resolution across reports, see api/persons.py) ---
+PERSONS_MIN_SCORE = 0.8        # 0..1; suspects matching at least this are the same person
+PERSONS_MAX_BLOCK = 100        # keys shared by more suspects than this are skipped
+
+# --- Batch submission (/api/batch/, see api/batch.py) ---
+IDEMPOTENCY_KEY_DAYS = 30      # retries later than this would create a second copy
+
+# --- Background tasks (manage.py run_tasks, see api/tasks.py) ---
+TASKS_CONCURRENCY = int(os.environ.get("TASKS_CONCURRENCY", 2))   # attempts run at once per worker
+TASKS_POLL_SECONDS = 2
+TASKS_DEFAULT_TIMEOUT = 600     # seconds per attempt, unless the task registers its own
+TASKS_MAX_ATTEMPTS = 3
+TASKS_RETRY_BASE_SECONDS = 30   # doubled after each failed attempt ...
+TASKS_RETRY_MAX_SECONDS = 3600  # ... up to this
+TASKS_KEEP_DAYS = 14            # finished tasks are pruned after this
+
+# --- Count cube (/api/stats/cube/, see api/cube.py) ---
+CUBE_MAX_BYTES = 32 * 1024 * 1024   # past this, days are grouped into weeks / months / years
+CUBE_REFRESH_SECONDS = 300          # rebuilt this often to pick up other workers' writes
+
+# --- Heatmap tiles (/api/heatmap/<z>/<x>/<y>.png, see api/heatmap.py) ---
+HEATMAP_TILE_DIR = Path(os.environ.get("HEATMAP_TILE_DIR", BASE_DIR / "tiles"))   # emptied when mapped reports change (api/heatmap.py COLUMNS)
+HEATMAP_MAX_ZOOM = 18
+HEATMAP_RADIUS_PX = 16          # reach of one incident's heat, in screen pixels
+HEATMAP_POINT_OPACITY = 0.3     # heat of one incident at its center; ~5 overlapping saturate
+HEATMAP_MIN_OPACITY = 0.05
+HEATMAP_BROWSER_MAX_AGE = 60    # seconds browsers may reuse a tile before asking again
+
+# --- Live events (/api/events/, server-sent events) ---
+# LocalBroadcaster is per process; use PostgresBroadcaster with several uvicorn workers.
+EVENTS_BACKEND = os.environ.get("EVENTS_BACKEND", "api.events.LocalBroadcaster")
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_QUEUE_SIZE = 100        # per open stream; slower clients get a `resync` event
+
+# --- Instrumentation ---
+# Prometheus scrape endpoint at /metrics, for admin accounts and scrapers sending
+# `Authorization: Bearer <METRICS_TOKEN>`. METRICS_PUBLIC=1 opens it to anyone.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_PUBLIC = os.environ.get("METRICS_PUBLIC", "0") == "1"
+# Requests slower than this many ms are logged with their slowest SQL (unset = off).
+API_SLOW_REQUEST_MS = (
+    float(os.environ["API_SLOW_REQUEST_MS"]) if os.environ.get("API_SLOW_REQUEST_MS") else None
+)
+# Admin-only on-demand profiling (X-Profile: 1 / ?_profile=1), kept as a ring buffer on disk.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "1") == "1"
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", BASE_DIR / "profiles"))
+PROFILE_MAX_ENTRIES = int(os.environ.get("PROFILE_MAX_ENTRIES", "20"))
+
 # --- CORS / CSRF ---
 # Keep localhost for dev, add FRONTEND_ORIGIN when deployed.
 FRONTEND_ORIGIN = os.environ.get("FRONTEND_ORIGIN")
@@ -92,6 +186,18 @@ DATABASES = {
     )
 }
 
+# Optional read replicas, comma-separated URLs (e.g. two local SQLite files:
+# REPLICA_DATABASE_URLS=sqlite:///replica.sqlite3 after copying db.sqlite3).
+# Safe list/retrieve reads on crimes, suspects and analytics go there; see api/db_routers.py.
+REPLICA_DATABASES = []
+for i, url in enumerate(u.strip() for u in os.environ.get("REPLICA_DATABASE_URLS", "").split(",") if u.strip()):
+    alias = f"replica{i + 1}"
+    DATABASES[alias] = dj_database_url.parse(url, conn_max_age=600)
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    REPLICA_DATABASES.append(alias)
+REPLICA_LAG_SECONDS = 10   # expected worst replica lag; heatmap tiles aren't stored for this long after a change
+DATABASE_ROUTERS = ["api.db_routers.ReplicaRouter"]
+
 # --- Password validators ---
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -115,4 +221,21 @@ if not DEBUG:
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# --- Chunked uploads (/api/uploads/) ---
+UPLOAD_TEMP_DIR = BASE_DIR / "upload_tmp"     # outside MEDIA_ROOT on purpose
+UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+UPLOAD_CHUNK_MAX_BYTES = 5 * 1024 * 1024
+UPLOAD_EXPIRY_HOURS = 24
+
+# --- Geocoding (/api/geocode/) ---
+# Centroids come from api/data/psgc_centroids.csv unless a fuller PSGC
+# export (code,latitude,longitude columns) is named here.
+PSGC_CENTROIDS_FILE = os.environ.get("PSGC_CENTROIDS_FILE", "")
+# External fallback for areas without a centroid, e.g. api.geocoding.NominatimGeocoder.
+# Empty = offline only.
+GEOCODER_BACKEND = os.environ.get("GEOCODER_BACKEND", "")
+GEOCODER_TIMEOUT = 5
+GEOCODER_USER_AGENT = "crms-api (crime records management)"
+GEOCODE_CACHE_MAX_ENTRIES = 5000
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
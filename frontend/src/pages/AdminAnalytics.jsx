@@ -1,5 +1,5 @@
 // src/pages/AdminMaps.jsx
-import React, { useEffect, useMemo, useRef, useState } from "react";
+import React, { useEffect, useMemo, useState } from "react";
 import "../assets/css/dashboard.css";
 import { FontAwesomeIcon } from "@fortawesome/react-fontawesome";
 import {
@@ -137,55 +137,6 @@ function groupVictimsByProvince(rows) {
   };
 }
 
-/* ================== HEAT LAYER WRAPPER ================== */
-function HeatLayer({ points, options }) {
-  const map = useMap();
-  const layerRef = useRef(null);
-
-  useEffect(() => {
-    let isMounted = true;
-
-    import("leaflet.heat")
-      .then(() => {
-        if (!isMounted) return;
-
-        if (layerRef.current) {
-          map.removeLayer(layerRef.current);
-          layerRef.current = null;
-        }
-
-        if (!points || points.length === 0) return;
-
-        layerRef.current = L.heatLayer(points, {
-          radius: 22,
-          blur: 18,
-          maxZoom: 5,
-          ...options,
-        }).addTo(map);
-
-        // Fit to points
-        try {
-          const ll = points.map((p) => [p[0], p[1]]);
-          const bounds = L.latLngBounds(ll);
-          if (bounds.isValid()) map.fitBounds(bounds.pad(0.2));
-        } catch {}
-      })
-      .catch((e) => {
-        console.error("Heat plugin not available:", e);
-      });
-
-    return () => {
-      isMounted = false;
-      if (layerRef.current) {
-        map.removeLayer(layerRef.current);
-        layerRef.current = null;
-      }
-    };
-  }, [map, points, options]);
-
-  return null;
-}
-
 /* Clamp view to PH by default */
 function MapGuards() {
   const map = useMap();
@@ -300,19 +251,17 @@ const AdminAnalytics = () => {
     });
   }, [rows, crimeType, dateFrom, dateTo]);
 
-  /* ======== Heat points from filteredRows ======== */
-  const points = useMemo(() => {
-    return filteredRows
-      .map((r) => {
-        const lat = parseFloat(r.latitude);
-        const lng = parseFloat(r.longitude);
-        if (!Number.isFinite(lat) || !Number.isFinite(lng)) return null;
-        let weight = 1;
-        if (getCrimeType(r).toLowerCase() === "homicide") weight = 2;
-        return [lat, lng, weight];
-      })
-      .filter(Boolean);
-  }, [filteredRows]);
+  /* ======== Heat tiles (drawn by the server for the same filters) ======== */
+  const heatTilesUrl = useMemo(() => {
+    const params = new URLSearchParams();
+    if (crimeType) params.set("crime_type", crimeType);
+    if (dateFrom) params.set("date_from", dateFrom);
+    if (dateTo) params.set("date_to", dateTo);
+    const prov = psgcProvinces.find((p) => p.name === province);
+    if (prov) params.set("province", prov.code);
+    const qs = params.toString();
+    return `${API_BASE}/api/heatmap/{z}/{x}/{y}.png${qs ? `?${qs}` : ""}`;
+  }, [crimeType, dateFrom, dateTo, province, psgcProvinces]);
 
   /* ======== Charts ======== */
   // Line (daily incidents) – place-aware
@@ -684,7 +633,7 @@ const AdminAnalytics = () => {
                     attribution="&copy; OpenStreetMap contributors"
                     url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
                   />
-                  <HeatLayer points={points} />
+                  <TileLayer key={heatTilesUrl} url={heatTilesUrl} noWrap opacity={0.8} />
                 </MapContainer>
               </div>
               <small style={{ color: "#0d1b36ff", display: "block", marginTop: 8 }}>
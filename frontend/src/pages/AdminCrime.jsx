@@ -32,17 +32,17 @@ L.Marker.prototype.options.icon = DefaultIcon;
 
 /* ================= CONFIG ================= */
 const API_BASE = "http://localhost:8000";
-const NOMINATIM_BASE = "https://nominatim.openstreetmap.org";
 
 /* Philippines bounding box */
 const PH_BOUNDS = L.latLngBounds(L.latLng(4.5, 116.0), L.latLng(21.5, 127.0));
 const PH_CENTER = L.latLng(14.5995, 120.9842); // Manila
 
-/* Nominatim needs: minLon,minLat,maxLon,maxLat */
-const toViewbox = (bounds) => {
-  const sw = bounds.getSouthWest();
-  const ne = bounds.getNorthEast();
-  return `${sw.lng},${sw.lat},${ne.lng},${ne.lat}`;
+/* Levels /api/geocode/ answers with */
+const GEO_LEVEL_LABELS = {
+  barangay: "barangay",
+  city_mun: "city / municipality",
+  province: "province",
+  region: "region",
 };
 
 const crimeTypes = [
@@ -439,106 +439,54 @@ const AdminCrime = () => {
   const geoTimer = useRef(null);
   const latestGeoRun = useRef(0);
 
-  const queryNominatim = async (paramsObj) => {
-    const params = new URLSearchParams({
-      format: "jsonv2",
-      addressdetails: "1",
-      limit: "1",
-      countrycodes: "ph",
-      bounded: "1",
-      viewbox: toViewbox(PH_BOUNDS),
-      ...paramsObj,
-    });
-    const url = `${NOMINATIM_BASE}/search?${params.toString()}`;
-    try {
-      const res = await fetch(url, { headers: { "Accept-Language": "en" } });
-      if (!res.ok) return [];
-      const data = await res.json();
-      return Array.isArray(data) ? data : [];
-    } catch (e) {
-      console.error("nominatim fetch error", e);
-      return [];
-    }
-  };
-
   const geocodeLocation = async () => {
     const run = ++latestGeoRun.current;
 
-    const { addressLine, barangayName, cityMunName, provinceName, regionName } =
-      form.loc_addr;
-
-    const hasSome = addressLine || barangayName || cityMunName || provinceName || regionName;
-    if (!hasSome) return;
+    const {
+      regionCode, provinceCode, cityMunCode, barangayCode,
+      regionName, provinceName, cityMunName, barangayName,
+    } = form.loc_addr || {};
+    if (!(regionCode || provinceCode || cityMunCode || barangayCode)) return;
 
     setGeoMsg("Finding coordinates…");
 
     try {
-      let hit = null;
-
-      // 1) Structured: full (street + barangay + city + province + region + country)
-      if (!hit) {
-        const data = await queryNominatim({
-          street: addressLine || "",
-          city: [barangayName, cityMunName].filter(Boolean).join(", "),
-          county: provinceName || "",
-          state: regionName || "",
-          country: "Philippines",
-        });
-        hit = data[0];
-      }
+      // PSGC centroids on our own server (api/geocoding.py); it falls back
+      // from the barangay to its city, province and region by itself.
+      const res = await axios.get(`${API_BASE}/api/geocode/`, {
+        params: {
+          region_code: regionCode || "",
+          province_code: provinceCode || "",
+          city_mun_code: cityMunCode || "",
+          barangay_code: barangayCode || "",
+          region: regionName || "",
+          province: provinceName || "",
+          city_municipality: cityMunName || "",
+          barangay: barangayName || "",
+        },
+      });
 
-      // 2) Structured: no street (just barangay + city + province + region)
-      if (!hit) {
-        const data = await queryNominatim({
-          city: [barangayName, cityMunName].filter(Boolean).join(", "),
-          county: provinceName || "",
-          state: regionName || "",
-          country: "Philippines",
-        });
-        hit = data[0];
-      }
-
-      // 3) Free-form: full string
-      if (!hit) {
-        const q = [addressLine, barangayName, cityMunName, provinceName, regionName, "Philippines"]
-          .filter(Boolean).join(", ");
-        const data = await queryNominatim({ q });
-        hit = data[0];
-      }
-
-      // 4) Free-form: city + province (+ region)
-      if (!hit) {
-        const q = [barangayName ? `${barangayName}` : "", cityMunName, provinceName, regionName, "Philippines"]
-          .filter(Boolean).join(", ");
-        const data = await queryNominatim({ q });
-        hit = data[0];
-      }
-
-      // 5) Free-form: province + region
-      if (!hit) {
-        const q = [provinceName, regionName, "Philippines"].filter(Boolean).join(", ");
-        const data = await queryNominatim({ q });
-        hit = data[0];
-      }
-
-      // apply if found & still latest run
       if (run !== latestGeoRun.current) return;
 
-      if (hit && hit.lat && hit.lon) {
-        const lat = parseFloat(hit.lat);
-        const lon = parseFloat(hit.lon);
-        if (Number.isFinite(lat) && Number.isFinite(lon) && PH_BOUNDS.contains([lat, lon])) {
-          setForm((p) => ({ ...p, latitude: lat, longitude: lon }));
-          setGeoMsg("Coordinates set (PH-bounded). You can fine-tune by dragging the marker.");
-        } else {
-          setGeoMsg("Found coords outside PH bounds—ignored. Please drag the marker or adjust address.");
-        }
+      const { latitude: lat, longitude: lon, level } = res.data || {};
+      if (Number.isFinite(lat) && Number.isFinite(lon) && PH_BOUNDS.contains([lat, lon])) {
+        setForm((p) => ({ ...p, latitude: lat, longitude: lon }));
+        setGeoMsg(
+          level === "barangay"
+            ? "Coordinates set (barangay centre). You can fine-tune by dragging the marker."
+            : `Approximate coordinates (${GEO_LEVEL_LABELS[level] || level} centre). Please drag the marker to the exact spot.`
+        );
       } else {
-        setGeoMsg("No matches found for this address. Please adjust or drag the marker.");
+        setGeoMsg("Found coords outside PH bounds—ignored. Please drag the marker or adjust address.");
       }
     } catch (e) {
-      console.error("geocode error", e);
-      setGeoMsg("Geocoding failed (network). Please adjust manually or drag the marker.");
+      if (run !== latestGeoRun.current) return;
+      if (e?.response?.status === 404) {
+        setGeoMsg("No coordinates for this address yet. Please drag the marker.");
+      } else {
+        console.error("geocode error", e?.response?.data || e.message);
+        setGeoMsg("Geocoding failed. Please adjust manually or drag the marker.");
+      }
     }
   };
 
@@ -546,11 +494,8 @@ const AdminCrime = () => {
   useEffect(() => {
     if (geoTimer.current) clearTimeout(geoTimer.current);
 
-    const { addressLine, barangayName, cityMunName, provinceName, regionName } =
-      form.loc_addr;
-    const hasSome =
-      addressLine || barangayName || cityMunName || provinceName || regionName;
-    if (!hasSome) return;
+    const { regionCode, provinceCode, cityMunCode, barangayCode } = form.loc_addr || {};
+    if (!(regionCode || provinceCode || cityMunCode || barangayCode)) return;
 
     geoTimer.current = setTimeout(() => {
       geocodeLocation();
@@ -561,11 +506,10 @@ const AdminCrime = () => {
     };
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [
-    form.loc_addr.addressLine,
-    form.loc_addr.barangayName,
-    form.loc_addr.cityMunName,
-    form.loc_addr.provinceName,
-    form.loc_addr.regionName,
+    form.loc_addr.regionCode,
+    form.loc_addr.provinceCode,
+    form.loc_addr.cityMunCode,
+    form.loc_addr.barangayCode,
   ]);
 
   /* ================= Submit ================= */
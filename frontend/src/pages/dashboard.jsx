@@ -1,5 +1,5 @@
 // src/pages/Dashboard.jsx
-import React, { useEffect, useMemo, useRef, useState } from "react";
+import React, { useEffect, useMemo, useState } from "react";
 import "../assets/css/dashboard.css";
 import { FontAwesomeIcon } from "@fortawesome/react-fontawesome";
 import {
@@ -14,7 +14,7 @@ import { Link, useNavigate } from "react-router-dom";
 
 /* ===== Map stack ===== */
 import "leaflet/dist/leaflet.css";
-import { MapContainer, TileLayer, useMap } from "react-leaflet";
+import { MapContainer, TileLayer } from "react-leaflet";
 import L from "leaflet";
 const DefaultIcon = L.icon({
   iconUrl: "https://unpkg.com/leaflet@1.9.4/dist/images/marker-icon.png",
@@ -44,6 +44,9 @@ const API_BASE = "http://localhost:8000";
 const ENDPOINTS = {
   crimes: `${API_BASE}/api/crimes/`,
   officers: `${API_BASE}/api/personnel/`,
+  summary: `${API_BASE}/api/dashboard/summary/`,
+  // server-drawn heat tiles, Region IV-A reports only
+  heatTiles: `${API_BASE}/api/heatmap/{z}/{x}/{y}.png?region_4a=1`,
 };
 
 /* PH & Region IV-A bounds */
@@ -79,87 +82,6 @@ function groupIncidentsByDay(rows) {
 const rowsFromPayload = (data) =>
   Array.isArray(data) ? data : (Array.isArray(data?.results) ? data.results : []);
 
-/* Heat layer (dynamic import) */
-function HeatLayer({ points, options }) {
-  const map = useMap();
-  const layerRef = useRef(null);
-
-  useEffect(() => {
-    let mounted = true;
-    import("leaflet.heat")
-      .then(() => {
-        if (!mounted) return;
-        if (layerRef.current) {
-          map.removeLayer(layerRef.current);
-          layerRef.current = null;
-        }
-        if (!points || points.length === 0) return;
-        layerRef.current = L.heatLayer(points, { radius: 22, blur: 18, maxZoom: 5, ...options }).addTo(map);
-        try {
-          const ll = points.map(p => [p[0], p[1]]);
-          const b = L.latLngBounds(ll);
-          if (b.isValid()) map.fitBounds(b.pad(0.2));
-        } catch {}
-      })
-      .catch(e => console.error("leaflet.heat not available:", e));
-    return () => {
-      mounted = false;
-      if (layerRef.current) {
-        map.removeLayer(layerRef.current);
-        layerRef.current = null;
-      }
-    };
-  }, [map, points, options]);
-
-  return null;
-}
-
-/* ======= Officers count helper (exclude archived) ======= */
-async function fetchAllPersonnelVisible() {
-  let url = `${ENDPOINTS.officers}?page_size=1000`;
-  const all = [];
-
-  while (url) {
-    const r = await fetch(url);
-    if (!r.ok) throw new Error(`HTTP ${r.status}`);
-    const data = await r.json();
-
-    const rows = Array.isArray(data) ? data : (Array.isArray(data.results) ? data.results : []);
-    all.push(...rows);
-
-    if (Array.isArray(data)) break; // not paginated
-
-    url = data.next
-      ? (data.next.startsWith("http") ? data.next : `${API_BASE}${data.next}`)
-      : null;
-  }
-
-  const visible = all.filter(p => !(p.is_archived === true || p.archived === true));
-  return visible;
-}
-
-/* ======= Crimes helper: fetch ALL non-archived (handles pagination) ======= */
-async function fetchAllCrimesVisible() {
-  let url = `${ENDPOINTS.crimes}?is_archived=false&page_size=1000`;
-  const all = [];
-
-  while (url) {
-    const r = await fetch(url);
-    if (!r.ok) throw new Error(`HTTP ${r.status}`);
-    const data = await r.json();
-
-    const rows = rowsFromPayload(data);
-    all.push(...rows);
-
-    if (Array.isArray(data)) break; // not paginated
-    url = data.next
-      ? (data.next.startsWith("http") ? data.next : `${API_BASE}${data.next}`)
-      : null;
-  }
-
-  return all;
-}
-
 /* ============= Component ============= */
 const Dashboard = () => {
   const [sidebarOpen, setSidebarOpen] = useState(true);
@@ -176,46 +98,31 @@ const Dashboard = () => {
 
   // Heat + Line chart data
   const [rows, setRows] = useState([]);
-  const [points, setPoints] = useState([]);
   const [loading, setLoading] = useState(false);
   const [err, setErr] = useState("");
 
   const toggleSidebar = () => setSidebarOpen(s => !s);
   const toggleSubmenu = () => setSubmenuOpen(s => !s);
 
-  /* ---------- KPI fetching (accurate, paginated) ---------- */
+  /* ---------- KPI fetching (server-side counts) ---------- */
   async function fetchKPIs() {
     try {
-      // Crimes (all non-archived)
-      const crimes = await fetchAllCrimesVisible();
-
-      // Officers (exclude archived)
-      let totalOfficers = 0;
-      try {
-        const visible = await fetchAllPersonnelVisible();
-        totalOfficers = visible.length;
-      } catch (e) {
-        console.warn("Officers fetch failed:", e);
-        totalOfficers = 0;
-      }
-
-      // Count by exact model choices
-      const totalCrimes = crimes.length;
-      const totalSolved = crimes.filter(r => (r.status || "") === "Solved").length;
-      const totalUnresolved = crimes.filter(r => (r.status || "") === "Unsolved").length; // <-- here
+      const r = await fetch(ENDPOINTS.summary);
+      if (!r.ok) throw new Error(`HTTP ${r.status}`);
+      const { crimes, officers } = await r.json();
 
       setKpis({
-        total_crimes: totalCrimes,
-        total_officers: totalOfficers,
-        total_solved: totalSolved,
-        unresolved: totalUnresolved,
+        total_crimes: crimes.total,
+        total_officers: officers.active,   // archived profiles excluded
+        total_solved: crimes.by_status.Solved || 0,
+        unresolved: crimes.by_status.Unsolved || 0,
       });
     } catch (e) {
       console.error("fetchKPIs error", e);
     }
   }
 
-  /* ---------- Incidents for heatmap + chart ---------- */
+  /* ---------- Incidents for the chart (the heatmap comes as tiles) ---------- */
   async function fetchIncidents() {
     try {
       setLoading(true);
@@ -226,19 +133,7 @@ const Dashboard = () => {
       const all = rowsFromPayload(data);
       const inR4A = all.filter(isRegion4A);
 
-      const pts = inR4A
-        .map(r => {
-          const lat = parseFloat(r.latitude);
-          const lng = parseFloat(r.longitude);
-          if (!Number.isFinite(lat) || !Number.isFinite(lng)) return null;
-          let w = 1;
-          if ((r.crime_type || "").toLowerCase() === "homicide") w = 2;
-          return [lat, lng, w];
-        })
-        .filter(Boolean);
-
       setRows(inR4A);
-      setPoints(pts);
     } catch (e) {
       console.error("incidents error", e);
       setErr("Di makuha ang incidents. Subukan muli.");
@@ -377,7 +272,7 @@ const Dashboard = () => {
                       attribution="&copy; OpenStreetMap contributors"
                       url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
                     />
-                    <HeatLayer points={points} />
+                    <TileLayer url={ENDPOINTS.heatTiles} noWrap opacity={0.8} />
                   </MapContainer>
                 </div>
               </div>